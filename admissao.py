@@ -0,0 +1,135 @@
+"""
+Controle de admissão dos scrapings da API
+
+Limita quantos scrapings rodam ao mesmo tempo e quantos podem esperar na
+fila. Com a fila cheia o pedido é recusado na hora (FilaCheia → HTTP 429
+com Retry-After) em vez de acumular trabalho até o serviço travar.
+
+A fila tem prioridades: uma vaga liberada vai para o pedido de maior
+prioridade (ex: ofertas relâmpago antes de jobs em lote); dentro da mesma
+prioridade, ordem de chegada.
+
+Uso:
+    vaga = admissao.entrar("alta")      # síncrono: FilaCheia se não couber
+    async with vaga:
+        ...                             # roda quando houver vaga
+"""
+
+import asyncio
+import heapq
+import itertools
+import math
+import time
+from collections import deque
+from typing import Optional
+
+
+PRIORIDADES = {"alta": 0, "normal": 1, "baixa": 2}
+
+
+class FilaCheia(Exception):
+    """Fila de espera lotada"""
+
+    def __init__(self, retry_after_s: int):
+        super().__init__(f"Fila de scraping cheia. Tente novamente em {retry_after_s}s")
+        self.retry_after_s = retry_after_s
+
+
+class Vaga:
+    """Lugar reservado no controle (executando ou na fila)"""
+
+    def __init__(self, controle: "ControleAdmissao", prioridade: str, futuro: Optional[asyncio.Future]):
+        self.controle = controle
+        self.prioridade = prioridade
+        self._futuro = futuro
+        self._inicio: Optional[float] = None
+
+    async def __aenter__(self):
+        if self._futuro is not None:
+            try:
+                await self._futuro
+            except asyncio.CancelledError:
+                # Cliente desistiu: se a vaga chegou a ser concedida, devolve
+                if self._futuro.done() and not self._futuro.cancelled():
+                    self.controle._liberar(None)
+                else:
+                    self._futuro.cancel()
+                raise
+        self._inicio = time.monotonic()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        self.controle._liberar(time.monotonic() - self._inicio)
+
+
+class ControleAdmissao:
+    """Semáforo com fila limitada e prioridades"""
+
+    def __init__(self, max_concorrentes: int = 1, max_fila: int = 10):
+        self.max_concorrentes = max_concorrentes
+        self.max_fila = max_fila
+        self.ativos = 0
+        self.recusados = 0
+        self._fila: list[tuple[int, int, asyncio.Future]] = []
+        self._sequencia = itertools.count()
+        self._duracoes: deque = deque(maxlen=20)
+
+    @property
+    def na_fila(self) -> int:
+        return sum(1 for _, _, futuro in self._fila if not futuro.done())
+
+    def entrar(self, prioridade: str = "normal") -> Vaga:
+        """
+        Reserva uma vaga (executa já ou entra na fila).
+
+        Raises:
+            FilaCheia: se a fila de espera estiver lotada
+            ValueError: prioridade desconhecida
+        """
+        if prioridade not in PRIORIDADES:
+            raise ValueError(f"Prioridade invalida: {prioridade}. Use uma de {tuple(PRIORIDADES)}")
+
+        if self.ativos < self.max_concorrentes and not self.na_fila:
+            self.ativos += 1
+            return Vaga(self, prioridade, None)
+
+        if self.na_fila >= self.max_fila:
+            self.recusados += 1
+            raise FilaCheia(self.estimar_espera_s(self.na_fila + 1))
+
+        futuro = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._fila, (PRIORIDADES[prioridade], next(self._sequencia), futuro))
+        return Vaga(self, prioridade, futuro)
+
+    def _liberar(self, duracao_s: Optional[float]):
+        if duracao_s is not None:
+            self._duracoes.append(duracao_s)
+        self.ativos -= 1
+        # Passa a vaga para o próximo da fila (maior prioridade primeiro)
+        while self._fila and self.ativos < self.max_concorrentes:
+            _, _, futuro = heapq.heappop(self._fila)
+            if not futuro.done():
+                self.ativos += 1
+                futuro.set_result(None)
+
+    def estimar_espera_s(self, posicao: int) -> int:
+        """Estimativa de espera para quem ficaria na posição `posicao` da fila"""
+        media = sum(self._duracoes) / len(self._duracoes) if self._duracoes else 60.0
+        return max(1, math.ceil(media * math.ceil(posicao / self.max_concorrentes)))
+
+    def resumo(self) -> dict:
+        """Estado atual do controle"""
+        por_prioridade = {nome: 0 for nome in PRIORIDADES}
+        nomes = {valor: nome for nome, valor in PRIORIDADES.items()}
+        for prioridade, _, futuro in self._fila:
+            if not futuro.done():
+                por_prioridade[nomes[prioridade]] += 1
+        return {
+            "max_concorrentes": self.max_concorrentes,
+            "max_fila": self.max_fila,
+            "ativos": self.ativos,
+            "na_fila": self.na_fila,
+            "fila_por_prioridade": por_prioridade,
+            "recusados": self.recusados,
+            "duracao_media_s": round(sum(self._duracoes) / len(self._duracoes), 1) if self._duracoes else None,
+        }
@@ -0,0 +1,182 @@
+"""
+Agrupamento de ofertas quase iguais (mesmo item, vendedores diferentes)
+
+A listagem traz o mesmo produto várias vezes: anúncios de vendedores
+diferentes, com títulos levemente diferentes ("Fone JBL Tune 520BT Preto" x
+"Fone De Ouvido Jbl Tune 520bt Bluetooth Preto"). A identidade canônica
+(identidade_produto.py) não junta esses casos porque os IDs são outros.
+
+Cada card vira três sinais baratos:
+- palavras do título normalizado (sem acento, pontuação e palavras vazias),
+  com assinatura MinHash para achar candidatos sem comparar todos com todos
+- faixa de preço logarítmica (±FAIXA_PRECO): só junta preços próximos
+- id da foto na CDN do ML (mesma foto = forte indício do mesmo item)
+
+Dois cards são o mesmo item se o preço cai na mesma faixa (ou vizinha) e:
+a foto é a mesma, ou a similaridade de Jaccard das palavras é >= `limiar`
+com os mesmos "códigos" (palavras com dígito: A15, 128gb, 520bt). Títulos
+de uma palavra (ou vazios) nunca se juntam pelo texto.
+
+Candidatos vêm de buckets LSH: a assinatura de 30 mínimos é cortada em 10
+blocos de 3, e a chave do bucket inclui os códigos. Com Jaccard 0,7 o par
+cai num bucket comum em ~98% dos casos; com 0,3, em ~24%. Buckets enormes
+(palavras comuns a quase tudo) são ignorados: o custo fica perto de
+linear. Fica só a melhor oferta de cada grupo: menor preço, depois maior
+desconto.
+"""
+
+import hashlib
+import math
+import random
+import re
+import unicodedata
+from functools import lru_cache
+from typing import Iterable, Optional
+
+
+PERMUTACOES = 30
+BLOCOS_LSH = 10  # 10 blocos de 3 mínimos
+LIMIAR_JACCARD = 0.7
+FAIXA_PRECO = 0.15  # largura relativa de cada faixa de preço
+MAX_BUCKET = 64  # bucket maior que isso vem de palavras comuns ("kit", "preto"): não gera candidatos
+
+# Palavras que não distinguem produtos
+_IRRELEVANTES = {
+    "de", "da", "do", "das", "dos", "e", "com", "para", "pra", "em", "o", "a", "os", "as",
+    "um", "uma", "novo", "nova", "original", "promocao", "oferta", "envio", "imediato", "frete", "gratis",
+}
+_RE_UNIDADE = re.compile(r'(\d+)\s+(gb|tb|mb|ml|l|kg|g|mm|cm|m|w|v|mah|hz|pol)\b')
+_RE_NAO_PALAVRA = re.compile(r'[^a-z0-9]+')
+# Foto na CDN: .../D_NQ_NP_2X_812345-MLA79012345678_012024-F.webp -> 812345-MLA79012345678_012024
+_RE_FOTO = re.compile(r'(\d+-ML[A-Z]\d+_\d+)')
+
+# Hashes universais (a*x + b mod primo) fixos: a mesma palavra tem a mesma assinatura sempre
+_PRIMO = (1 << 61) - 1
+_gerador = random.Random(20240917)
+_COEFICIENTES = [(_gerador.randrange(1, _PRIMO), _gerador.randrange(0, _PRIMO)) for _ in range(PERMUTACOES)]
+
+
+def normalizar_titulo(titulo: str) -> frozenset[str]:
+    """Palavras do título sem acento, pontuação e palavras irrelevantes ("128 GB" -> "128gb")"""
+    texto = unicodedata.normalize("NFKD", titulo or "").encode("ascii", "ignore").decode().lower()
+    texto = _RE_UNIDADE.sub(r'\1\2', texto)
+    return frozenset(p for p in _RE_NAO_PALAVRA.split(texto) if p and p not in _IRRELEVANTES)
+
+
+def codigos(palavras: frozenset[str]) -> frozenset[str]:
+    """Palavras com dígito (modelo, capacidade, voltagem): precisam bater"""
+    return frozenset(p for p in palavras if any(c.isdigit() for c in p))
+
+
+@lru_cache(maxsize=8192)
+def assinatura_titulo(titulo: str) -> tuple[frozenset[str], tuple[int, ...]]:
+    """Palavras normalizadas e assinatura MinHash (PERMUTACOES mínimos)"""
+    palavras = normalizar_titulo(titulo)
+    if not palavras:
+        return palavras, ()
+    hashes = [int.from_bytes(hashlib.blake2b(p.encode(), digest_size=8).digest(), "big") for p in palavras]
+    return palavras, tuple(min((a * h + b) % _PRIMO for h in hashes) for a, b in _COEFICIENTES)
+
+
+def jaccard(a: frozenset, b: frozenset) -> float:
+    return len(a & b) / len(a | b) if a or b else 0.0
+
+
+def faixa_preco(preco: Optional[float]) -> Optional[int]:
+    if not preco or preco <= 0:
+        return None
+    return math.floor(math.log(preco) / math.log(1 + FAIXA_PRECO))
+
+
+def id_foto(url: Optional[str]) -> Optional[str]:
+    """Id da foto na CDN do ML, igual em todos os tamanhos/formatos da mesma foto"""
+    if not url:
+        return None
+    encontrado = _RE_FOTO.search(url)
+    return encontrado.group(1) if encontrado else None
+
+
+class AgrupadorOfertas:
+    """Agrupa cards quase iguais e escolhe um representante por grupo"""
+
+    def __init__(self, limiar: float = LIMIAR_JACCARD):
+        self.limiar = limiar
+        self.agrupados = 0  # cards descartados por serem repetição de outro (última chamada)
+
+    def grupos(self, cards: list[dict]) -> list[list[int]]:
+        """Índices dos cards agrupados (union-find), grupos e membros na ordem da página"""
+        pai = list(range(len(cards)))
+
+        def raiz(i: int) -> int:
+            while pai[i] != i:
+                pai[i] = pai[pai[i]]
+                i = pai[i]
+            return i
+
+        assinaturas = [assinatura_titulo(card.get("nome") or "") for card in cards]
+        faixas = [faixa_preco(card.get("preco_atual")) for card in cards]
+        fotos = [id_foto(card.get("imagem")) for card in cards]
+
+        def mesmo_item(i: int, j: int) -> bool:
+            if faixas[i] is not None and faixas[j] is not None and abs(faixas[i] - faixas[j]) > 1:
+                return False
+            if fotos[i] and fotos[i] == fotos[j]:
+                return True
+            palavras_i, palavras_j = assinaturas[i][0], assinaturas[j][0]
+            if len(palavras_i) < 2 or len(palavras_j) < 2 or codigos(palavras_i) != codigos(palavras_j):
+                return False
+            return jaccard(palavras_i, palavras_j) >= self.limiar
+
+        # Candidatos: mesmos códigos e mesmo bloco da assinatura, ou mesma foto
+        buckets: dict[tuple, list[int]] = {}
+        linhas = PERMUTACOES // BLOCOS_LSH
+        for i, (palavras, minimos) in enumerate(assinaturas):
+            codigos_i = codigos(palavras)
+            for bloco in range(BLOCOS_LSH if minimos else 0):
+                buckets.setdefault((codigos_i, bloco, minimos[bloco * linhas:(bloco + 1) * linhas]), []).append(i)
+            if fotos[i]:
+                buckets.setdefault(("foto", fotos[i]), []).append(i)
+
+        for membros in buckets.values():
+            if len(membros) > MAX_BUCKET:
+                continue
+            for posicao, i in enumerate(membros):
+                for j in membros[posicao + 1:]:
+                    if raiz(i) != raiz(j) and mesmo_item(i, j):
+                        pai[raiz(j)] = raiz(i)
+
+        por_raiz: dict[int, list[int]] = {}
+        for i in range(len(cards)):
+            por_raiz.setdefault(raiz(i), []).append(i)
+        return sorted(por_raiz.values(), key=lambda grupo: grupo[0])
+
+    @staticmethod
+    def _melhor(cards: list[dict]) -> dict:
+        """Menor preço; empate (ou sem preço) -> maior desconto; depois a ordem da página"""
+        return min(
+            cards,
+            key=lambda c: (
+                c.get("preco_atual") if c.get("preco_atual") is not None else math.inf,
+                -(c.get("desconto") or 0),
+            ),
+        )
+
+    def representantes(self, cards: list[dict], fixos: Iterable[str] = ()) -> list[dict]:
+        """
+        Um card por grupo, na ordem da página (posição do primeiro card do grupo).
+        O escolhido ganha `similares`: URLs das outras ofertas do grupo.
+
+        Args:
+            fixos: URLs já escolhidas antes (ex: lote anterior da listagem): o
+                grupo que tem uma delas fica com ela, mesmo surgindo oferta melhor
+        """
+        fixos = set(fixos)
+        escolhidos = []
+        for grupo in self.grupos(cards):
+            membros = [cards[i] for i in grupo]
+            fixado = next((c for c in membros if c["url"] in fixos), None)
+            melhor = fixado or self._melhor(membros)
+            melhor["similares"] = [c["url"] for c in membros if c is not melhor]
+            escolhidos.append(melhor)
+        self.agrupados = len(cards) - len(escolhidos)
+        return escolhidos
@@ -3,25 +3,56 @@ API REST - Scraper ML Afiliado
 Endpoints para scraping de ofertas do Mercado Livre com links de afiliado.
 
 Endpoints:
-- GET  /health           - Health check basico
-- GET  /auth/status      - Verifica se cookies estao validos (NAO inicia browser)
-- GET  /auth/check       - Testa login abrindo browser (mais lento, mais preciso)
+- GET  /health           - Health check basico (liveness)
+- GET  /ready            - Readiness: 200 so depois do aquecimento do browser
+- GET  /auth/status      - Validade real da sessao, lida dos cookies do perfil (NAO inicia browser; ?conta=)
+- GET  /auth/check       - Testa login abrindo browser (mais lento, mais preciso; ?conta=)
+- GET  /stats/estrategias - Ranking adaptativo dos seletores do botao/modal
+- GET  /stats/pacing      - Taxa de navegacao (AIMD) e eventos de back-off
+- GET  /stats/admissao    - Scrapings em execucao, fila e recusas (429)
+- GET  /stats/estaticos   - Cache de JS/CSS do ML (acertos, bytes, despejos)
+- GET  /imagens/{hash}    - Foto do produto em cache local (publico, imutavel)
+- GET  /precos/{mlb_id}   - Historico de precos, ultimo preco e minimo historico
+- GET  /precos/quedas     - Produtos que cairam X% nas ultimas N horas
 - POST /scrape/ofertas   - Executa scraping com links de afiliado
+- POST /scrape/produtos  - Links de afiliado para uma lista de URLs/MLB IDs (cache + paralelo)
+- POST /scrape/jobs      - Scraping em background com checkpoint (resume)
+- POST /monitor/relampago - Monitora ofertas relampago e envia as novas ao callback
+- GET  /webhooks/status   - Outbox de webhooks: pendencias, entregas e dead-letter
+- GET  /traces/{run_id}   - Timeline da execucao (Chrome trace JSON, abre no Perfetto)
 """
 
 import os
-import json
+import time
+import asyncio
 from datetime import datetime
-from typing import Optional
+from typing import Annotated, Literal, Optional
 from pathlib import Path
-from contextlib import asynccontextmanager
+from contextlib import asynccontextmanager, nullcontext
 
-from fastapi import FastAPI, HTTPException, Depends, Security
+from fastapi import FastAPI, HTTPException, Depends, Security, Request, Response, Path as PathParam
 from fastapi.security import APIKeyHeader
-from fastapi.responses import JSONResponse
-from pydantic import BaseModel, ConfigDict
-
-from scraper_ml_afiliado import ScraperMLAfiliado
+from fastapi.responses import JSONResponse, FileResponse
+from pydantic import BaseModel, ConfigDict, Field
+import httpx
+
+from scraper_ml_afiliado import ScraperMLAfiliado, FiltrosOferta
+from ranking_estrategias import RankingEstrategias
+from sinks_resultados import criar_sink
+from checkpoints_execucao import CheckpointStore, PADRAO_RUN_ID
+from cache_imagens import CacheImagens, CONTENT_TYPES
+from cache_estaticos import CacheEstaticos
+from historico_precos import HistoricoPrecos
+from monitor_relampago import MonitorRelampago, URL_RELAMPAGO
+from webhooks_outbox import OutboxWebhooks
+from admissao import ControleAdmissao, FilaCheia, Vaga
+from contas_afiliado import RegistroContas, SessaoConta, PerfilOcupado
+from rastreamento import ArmazemTraces, Rastreador
+from identidade_produto import RegistroIdentidades, url_canonica
+from cookies_perfil import inspecionar_perfil
+from cache_links import CacheLinks
+from respostas_http import resposta_json, normalizar_since, produtos_desde, proximo_cursor
+from modelo_produto import Produto, parse_campos
 
 
 # ============================================
@@ -30,17 +61,106 @@ from scraper_ml_afiliado import ScraperMLAfiliado
 API_KEY = os.getenv("SCRAPER_API_KEY", "egn-2025-secret-key")
 API_KEY_HEADER = APIKeyHeader(name="X-API-Key", auto_error=False)
 
-# Detecta se esta rodando em Docker ou localmente
-if os.path.exists("/app"):
+# Detecta se esta rodando em Docker ou localmente (ML_BROWSER_DATA_DIR/SCRAPER_DATA_DIR sobrepoem)
+if os.getenv("ML_BROWSER_DATA_DIR"):
+    BROWSER_DATA_DIR = os.getenv("ML_BROWSER_DATA_DIR")
+elif os.path.exists("/app"):
     BROWSER_DATA_DIR = "/app/ml_browser_data"
 else:
     BROWSER_DATA_DIR = os.path.join(os.path.dirname(__file__), "ml_browser_data")
 
-METADATA_FILE = os.path.join(BROWSER_DATA_DIR, "login_metadata.json")
+# Estado do scraper (ranking de estrategias, etc) - separado do perfil do browser
+if os.getenv("SCRAPER_DATA_DIR"):
+    DATA_DIR = os.getenv("SCRAPER_DATA_DIR")
+elif os.path.exists("/app"):
+    DATA_DIR = "/app/scraper_data"
+else:
+    DATA_DIR = os.path.join(os.path.dirname(__file__), "scraper_data")
+
+RESULTADOS_DIR = os.path.join(DATA_DIR, "resultados")
+CHECKPOINTS_DIR = os.path.join(DATA_DIR, "checkpoints")
+IMAGENS_DIR = os.path.join(DATA_DIR, "imagens")
+ESTATICOS_DIR = os.path.join(DATA_DIR, "estaticos")
+HISTORICO_FILE = os.path.join(DATA_DIR, "historico_precos.db")
+OUTBOX_FILE = os.path.join(DATA_DIR, "webhooks_outbox.db")
+CONTAS_FILE = os.path.join(DATA_DIR, "contas.json")
+TRACES_DIR = os.path.join(DATA_DIR, "traces")
+IDENTIDADES_FILE = os.path.join(DATA_DIR, "identidades.db")
+LINKS_FILE = os.path.join(DATA_DIR, "cache_links.db")
+
+# Webhooks que recebem os produtos (push): URLs separadas por virgula
+WEBHOOK_URLS = [u.strip() for u in os.getenv("WEBHOOK_URLS", "").split(",") if u.strip()]
+WEBHOOK_TOKEN = os.getenv("WEBHOOK_TOKEN")
+
+
+# Fracao dos scrapings com trace gravado (0 = so quando o request pedir "trace": true)
+TRACE_AMOSTRAGEM = float(os.getenv("TRACE_AMOSTRAGEM", "0"))
+
+# JS/CSS do ML servidos do disco (0 desliga); limite do cache em MB
+CACHE_ESTATICOS = os.getenv("CACHE_ESTATICOS", "1") != "0"
+CACHE_ESTATICOS_MB = int(os.getenv("CACHE_ESTATICOS_MB", "256"))
+# Regex extra para restringir quais bundles sao interceptados (vazio = todo JS/CSS do mlstatic.com)
+CACHE_ESTATICOS_PADRAO = os.getenv("CACHE_ESTATICOS_PADRAO") or None
+
+# Aquece o browser no startup (browser + sessao + pagina de ofertas)
+PREAQUECER = os.getenv("PREAQUECER", "1") != "0"
 
 
 # Estado global
-scraper_instance: Optional[ScraperMLAfiliado] = None
+# Contas de afiliado (etiqueta -> perfil, ritmo AIMD e browser aquecido proprios).
+# Sem contas.json, so a conta padrao (BROWSER_DATA_DIR). Cada execucao reserva
+# o browser da conta ou uma aba dele (reservar_scraper / SessaoConta.liberar)
+registro_contas = RegistroContas(CONTAS_FILE, BROWSER_DATA_DIR)
+# Identidade canonica dos produtos (catalogo/anuncio/variante), comum a todas as contas
+os.makedirs(DATA_DIR, exist_ok=True)
+identidades_produto = RegistroIdentidades(IDENTIDADES_FILE)
+# Bundles JS/CSS do ML em disco, comuns a todas as contas/abas (e a outros processos no mesmo DATA_DIR)
+cache_estaticos = CacheEstaticos(
+    ESTATICOS_DIR, max_bytes=CACHE_ESTATICOS_MB * 1024 * 1024, padrao=CACHE_ESTATICOS_PADRAO
+) if CACHE_ESTATICOS else None
+sessoes: dict[str, SessaoConta] = {
+    conta.etiqueta: SessaoConta(conta, DATA_DIR, identidades_produto, cache_estaticos)
+    for conta in registro_contas.todas()
+}
+# Quantos scrapings simultaneos e quantos esperando; alem disso, 429
+admissao = ControleAdmissao(
+    max_concorrentes=int(os.getenv("MAX_SCRAPES_CONCORRENTES", "1")),
+    max_fila=int(os.getenv("MAX_FILA_SCRAPES", "10"))
+)
+aquecimento = {
+    "status": "pendente",  # pendente | aquecendo | pronto | falhou | desativado
+    "iniciado_em": None,
+    "concluido_em": None,
+    "duracao_s": None,
+    "logado": None,
+    "erro": None,
+    "pronto_em": None,  # primeiro aquecimento bem sucedido (a partir dai /ready = 200)
+    "contas": {},  # etiqueta -> {"logado", "erro"}
+}
+# Aquecimento que falhou no startup e tentado de novo, com espera crescente
+AQUECIMENTO_RETRY_S = (15, 30, 60, 120, 300)
+tarefa_aquecimento: Optional[asyncio.Task] = None
+checkpoint_store = CheckpointStore(CHECKPOINTS_DIR)
+jobs_ativos: dict[str, dict] = {}  # run_id -> {"task", "resultado", "erro"}
+# Cache local das fotos dos produtos (servido em GET /imagens/...)
+cache_imagens = CacheImagens(IMAGENS_DIR)
+# Serie temporal de precos (toda observacao de todo scraping)
+historico_precos = HistoricoPrecos(HISTORICO_FILE)
+# Ultimo link de afiliado de cada produto por etiqueta (POST /scrape/produtos responde dele)
+cache_links = CacheLinks(LINKS_FILE)
+# Produto que ganha ID de catalogo muda de chave: o link guardado vai junto
+identidades_produto.ao_mudar_chave = cache_links.migrar_chaves
+# Outbox duravel: o scraping so enfileira, workers entregam em lotes com retry
+outbox_webhooks = OutboxWebhooks(
+    OUTBOX_FILE,
+    WEBHOOK_URLS,
+    headers={"X-Webhook-Token": WEBHOOK_TOKEN} if WEBHOOK_TOKEN else None
+)
+# Traces por execucao (spans de cada passo), com amostragem
+armazem_traces = ArmazemTraces(TRACES_DIR, amostragem=TRACE_AMOSTRAGEM)
+# Monitor de ofertas relampago (toma o perfil de uma conta enquanto ativo)
+monitor: Optional[MonitorRelampago] = None
+monitor_task: Optional[asyncio.Task] = None
 
 
 async def verify_api_key(api_key: str = Security(API_KEY_HEADER)):
@@ -55,11 +175,30 @@ async def verify_api_key(api_key: str = Security(API_KEY_HEADER)):
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Lifecycle da aplicacao"""
-    global scraper_instance
+    global tarefa_aquecimento
     print("Iniciando API do Scraper ML Afiliado...")
+    checkpoint_store.limpar(max_idade_dias=7)
+    outbox_webhooks.iniciar()
+    # Aquecimento em background: o uvicorn ja responde /health enquanto isso
+    if PREAQUECER:
+        tarefa_aquecimento = asyncio.create_task(aquecer_ate_conseguir())
+    else:
+        aquecimento["status"] = "desativado"
     yield
-    if scraper_instance:
-        await scraper_instance._close_browser()
+    if tarefa_aquecimento and not tarefa_aquecimento.done():
+        tarefa_aquecimento.cancel()
+    if monitor_task and not monitor_task.done():
+        monitor.parar()
+        await monitor_task
+    for sessao in sessoes.values():
+        await sessao.descartar()
+    await cache_imagens.fechar()
+    historico_precos.fechar()
+    identidades_produto.fechar()
+    cache_links.fechar()
+    if cache_estaticos:
+        cache_estaticos.fechar()
+    await outbox_webhooks.fechar()
     print("API encerrada")
 
 
@@ -85,86 +224,268 @@ API para scraping de ofertas do Mercado Livre com links de afiliado.
 # ============================================
 # MODELS
 # ============================================
+class FiltrosRequest(BaseModel):
+    """Filtros aplicados nos cards da listagem (antes de visitar cada produto)"""
+    min_desconto: Optional[int] = Field(default=None, ge=0, le=100)
+    preco_min: Optional[float] = Field(default=None, ge=0)
+    preco_max: Optional[float] = Field(default=None, ge=0)
+    palavras_incluir: list[str] = []
+    palavras_excluir: list[str] = []
+    max_por_vendedor: Optional[int] = Field(default=None, gt=0)
+    max_por_categoria: Optional[int] = Field(default=None, gt=0)
+    # Mesmo item de vendedores/anuncios diferentes (titulo parecido, preco proximo, mesma foto): so a melhor oferta
+    agrupar_similares: bool = False
+
+
 class ScrapeRequest(BaseModel):
     url: Optional[str] = None
     max_produtos: Optional[int] = 20
     headless: Optional[bool] = True
+    # Orcamentos de tempo (segundos). None = sem limite
+    produto_timeout_s: Optional[float] = Field(default=None, gt=0)
+    run_timeout_s: Optional[float] = Field(default=None, gt=0)
+    # Grava cada produto em disco assim que extraido (jsonl, csv ou parquet)
+    salvar_formato: Optional[Literal["jsonl", "csv", "parquet"]] = None
+    salvar_compressao: Optional[Literal["gzip", "zstd"]] = None
+    salvar_rotacao_mb: Optional[float] = Field(default=None, gt=0)
+    # Baixa foto_url para o cache local e preenche foto_local
+    cachear_imagens: bool = True
+    # Checkpoint/resume: run_id da execucao a retomar (resume sem run_id = a mais recente)
+    run_id: Optional[str] = Field(default=None, pattern=PADRAO_RUN_ID)
+    resume: bool = False
+    # Filtros da listagem: so gera link para o que passar
+    filtros: Optional[FiltrosRequest] = None
+    # Enfileira os produtos com link para os webhooks configurados (WEBHOOK_URLS)
+    enviar_webhooks: bool = True
+    # Fila de admissao (padrao: relampago=alta, sincrono=normal, jobs=baixa)
+    prioridade: Optional[Literal["alta", "normal", "baixa"]] = None
+    # Conta de afiliado (etiqueta) que gera os links; None = conta padrao
+    conta: Optional[str] = None
+    # Divide o lote entre as contas (todas, ou as listadas em `contas`) em paralelo
+    distribuir: bool = False
+    contas: Optional[list[str]] = None
+    # Grava o trace da execucao (None = sorteio por TRACE_AMOSTRAGEM)
+    trace: Optional[bool] = None
+    # Produtos extraidos em paralelo (uma aba cada), enquanto a listagem ainda carrega
+    concorrencia: int = Field(default=1, ge=1, le=4)
 
     model_config = ConfigDict(
         json_schema_extra={
             "example": {
                 "max_produtos": 20,
-                "headless": True
+                "headless": True,
+                "produto_timeout_s": 25,
+                "run_timeout_s": 300
             }
         }
     )
 
 
+class ProdutosRequest(BaseModel):
+    """Lote de produtos escolhidos (curadoria): URLs ou MLB IDs"""
+    itens: list[str] = Field(min_length=1, max_length=500)
+    conta: Optional[str] = None
+    # Idade maxima do link/dados em cache (segundos); 0 = visita todos de novo
+    max_idade_s: float = Field(default=6 * 3600, ge=0)
+    concorrencia: int = Field(default=3, ge=1, le=4)
+    headless: bool = True
+    produto_timeout_s: Optional[float] = Field(default=25, gt=0)
+    run_timeout_s: Optional[float] = Field(default=None, gt=0)
+    cachear_imagens: bool = True
+    enviar_webhooks: bool = False
+    prioridade: Optional[Literal["alta", "normal", "baixa"]] = None
+    trace: Optional[bool] = None
+
+    model_config = ConfigDict(
+        json_schema_extra={
+            "example": {
+                "itens": ["MLB4123456789", "https://www.mercadolivre.com.br/produto-x/p/MLB19698034"],
+                "max_idade_s": 21600
+            }
+        }
+    )
+
+
+class MonitorRequest(BaseModel):
+    # Cada oferta nova e enviada (POST JSON) para esta URL assim que o link fica pronto
+    callback_url: str
+    callback_headers: dict[str, str] = {}
+    intervalo_s: float = Field(default=20, ge=5)
+    max_por_ciclo: int = Field(default=10, gt=0)
+    headless: bool = True
+    produto_timeout_s: Optional[float] = Field(default=25, gt=0)
+    # False = ofertas ja no ar na partida viram baseline (so as novas sao enviadas)
+    notificar_existentes: bool = False
+    filtros: Optional[FiltrosRequest] = None
+    # Conta de afiliado cujo perfil o monitor usa; None = conta padrao
+    conta: Optional[str] = None
+
+
 class AuthStatusResponse(BaseModel):
+    conta: Optional[str] = None
     cookies_exist: bool
     cookies_valid: bool
     login_date: Optional[str] = None
     days_since_login: Optional[int] = None
     days_until_expiry: Optional[int] = None
+    expires_at: Optional[str] = None
     message: str
     action_required: Optional[str] = None
 
 
+class ItemProdutoResponse(BaseModel):
+    entrada: str
+    # sucesso | sem_link | timeout | erro | invalido
+    status: str
+    cache: bool = False
+    produto: Optional[Produto] = None
+    erro: Optional[str] = None
+
+
+class ProdutosResponse(BaseModel):
+    success: bool
+    run_id: Optional[str] = None
+    conta: str
+    total: int
+    total_com_link: int
+    do_cache: int
+    visitados: int
+    itens: list[ItemProdutoResponse]
+    trace_url: Optional[str] = None
+    scraped_at: str
+
+
 class ScrapeResponse(BaseModel):
     success: bool
+    run_id: Optional[str] = None
     total: int
     total_com_link: int
     total_sem_link: int
-    produtos: list[dict]
+    total_timeout: int = 0
+    produtos: list[Produto]
+    arquivos: list[str] = []
+    trace_url: Optional[str] = None
     scraped_at: str
 
 
 # ============================================
 # FUNCOES AUXILIARES
 # ============================================
-def check_cookies_files() -> dict:
+async def check_cookies_files(perfil: str = BROWSER_DATA_DIR) -> dict:
     """
-    Verifica se os arquivos de cookies existem.
-    NAO abre o browser, apenas checa arquivos.
+    Sessao do ML no perfil da conta, lida do banco de cookies do Chromium.
+    NAO abre o browser; resultado em cache ate o arquivo mudar. A leitura
+    (copia + SQLite) roda em thread para nao travar o event loop.
     """
-    result = {
-        "cookies_exist": False,
-        "metadata_exist": False,
-        "login_date": None,
-        "days_since_login": None,
-        "days_until_expiry": None,
+    sessao = await asyncio.to_thread(inspecionar_perfil, perfil)
+    login_em = sessao["login_em"]
+    return {
+        "cookies_exist": sessao["cookies_exist"],
+        "session_found": sessao["sessao_encontrada"],
+        "logged_in": sessao["logado"],
+        "login_date": login_em.strftime("%Y-%m-%d %H:%M") if login_em else None,
+        "days_since_login": (datetime.now() - login_em).days if login_em else None,
+        "expires_at": sessao["expira_em"].isoformat(timespec="seconds") if sessao["expira_em"] else None,
+        "days_until_expiry": sessao["dias_restantes"],
+        "error": sessao["erro"],
     }
 
-    # Verifica se diretorio existe
-    if not os.path.exists(BROWSER_DATA_DIR):
-        return result
-
-    # Verifica arquivos importantes do Chromium
-    required_files = ["Default/Cookies", "Default/Network/Cookies"]
-    for file in required_files:
-        full_path = os.path.join(BROWSER_DATA_DIR, file)
-        if os.path.exists(full_path):
-            result["cookies_exist"] = True
-            break
-
-    # Verifica metadata de login
-    if os.path.exists(METADATA_FILE):
-        result["metadata_exist"] = True
-        try:
-            with open(METADATA_FILE, 'r') as f:
-                metadata = json.load(f)
 
-            login_date = datetime.fromisoformat(metadata.get("login_date", ""))
-            expires_date = datetime.fromisoformat(metadata.get("expires_estimate", ""))
+def obter_sessao(etiqueta: Optional[str] = None) -> SessaoConta:
+    """Sessao da conta pela etiqueta (None = conta padrao)"""
+    try:
+        return sessoes[registro_contas.obter(etiqueta).etiqueta]
+    except KeyError:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Conta '{etiqueta}' nao cadastrada. Contas: {list(sessoes)}"
+        )
 
-            result["login_date"] = login_date.strftime("%Y-%m-%d %H:%M")
-            result["days_since_login"] = (datetime.now() - login_date).days
-            result["days_until_expiry"] = (expires_date - datetime.now()).days
 
-        except Exception:
-            pass
+def entrar_na_fila(prioridade: str) -> Vaga:
+    """Reserva vaga no controle de admissao; fila cheia vira 429 com Retry-After"""
+    try:
+        return admissao.entrar(prioridade)
+    except FilaCheia as e:
+        raise HTTPException(
+            status_code=429,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after_s)}
+        )
+
+
+async def reservar_scraper(sessao: SessaoConta, headless: bool = True) -> ScraperMLAfiliado:
+    """
+    Scraper exclusivo para uma execucao: o browser aquecido da conta, se
+    estiver livre, ou uma aba na mesma sessao (execucoes simultaneas nao
+    fecham o browser umas das outras). Devolver com sessao.liberar().
+
+    Aba na mesma sessao herda o modo do browser: `headless` so vale com a
+    conta livre (o fallback e logado em SessaoConta.reservar).
+    """
+    try:
+        return await sessao.reservar(headless)
+    except PerfilOcupado as e:
+        raise HTTPException(
+            status_code=409,
+            detail=f"Conta {sessao.conta.etiqueta}: {e}. Pare com DELETE /monitor/relampago"
+        )
+
+
+async def aquecer_conta(sessao: SessaoConta) -> dict:
+    """Abre o browser da conta e confirma a sessao"""
+    if not (await check_cookies_files(sessao.conta.perfil))["cookies_exist"]:
+        return {"logado": False, "erro": "Cookies nao encontrados"}
+    try:
+        scraper = await sessao.reservar(headless=True)
+    except PerfilOcupado as e:
+        return {"logado": None, "erro": f"Perfil em uso: {e}"}
+    try:
+        logado = await scraper.verificar_login()
+    except Exception as e:
+        await sessao.liberar(scraper, descartar=True)
+        return {"logado": False, "erro": str(e)}
+    await sessao.liberar(scraper)
+    return {"logado": logado, "erro": None if logado else "Nao esta logado como afiliado"}
+
 
-    return result
+async def aquecer(alvo: Optional[list[SessaoConta]] = None):
+    """
+    Abre o browser de cada conta, confirma a sessao e deixa a pagina de ofertas
+    carregada (verificar_login navega ate ela), para o primeiro request nao pagar isso.
+    """
+    alvo = alvo or list(sessoes.values())
+    inicio = time.monotonic()
+    aquecimento.update(status="aquecendo", iniciado_em=datetime.now().isoformat(),
+                       concluido_em=None, duracao_s=None, logado=None, erro=None)
+    try:
+        resultados = await asyncio.gather(*(aquecer_conta(sessao) for sessao in alvo))
+        for sessao, resultado in zip(alvo, resultados):
+            aquecimento["contas"][sessao.conta.etiqueta] = resultado
+        contas = aquecimento["contas"].values()
+        erros = [r["erro"] for r in contas if r["erro"]]
+        aquecimento.update(status="pronto", logado=all(r["logado"] for r in contas),
+                           erro=erros[0] if erros else None)
+        aquecimento["pronto_em"] = aquecimento["pronto_em"] or datetime.now().isoformat()
+    except Exception as e:
+        aquecimento.update(status="falhou", erro=str(e))
+    finally:
+        aquecimento.update(concluido_em=datetime.now().isoformat(),
+                           duracao_s=round(time.monotonic() - inicio, 1))
+        print(f"🔥 Aquecimento: {aquecimento['status']} em {aquecimento['duracao_s']}s (logado={aquecimento['logado']})")
+
+
+async def aquecer_ate_conseguir():
+    """Aquecimento do startup: repete apos falha (a replica fica fora do /ready ate dar certo)"""
+    tentativa = 0
+    while True:
+        await aquecer()
+        if aquecimento["status"] == "pronto":
+            return
+        espera = AQUECIMENTO_RETRY_S[min(tentativa, len(AQUECIMENTO_RETRY_S) - 1)]
+        tentativa += 1
+        print(f"🔥 Aquecimento falhou ({aquecimento['erro']}), nova tentativa em {espera}s")
+        await asyncio.sleep(espera)
 
 
 # ============================================
@@ -178,9 +499,29 @@ async def root():
         "version": "3.0.0",
         "endpoints": {
             "GET /health": "Health check basico",
+            "GET /ready": "Readiness (browser aquecido)",
             "GET /auth/status": "Verifica cookies (rapido, sem browser)",
             "GET /auth/check": "Testa login real (lento, abre browser)",
-            "POST /scrape/ofertas": "Executa scraping"
+            "GET /stats/estrategias": "Ranking adaptativo dos seletores",
+            "GET /stats/pacing": "Taxa atual e eventos de back-off (por conta)",
+            "GET /stats/admissao": "Scrapings ativos, fila por prioridade e recusas",
+            "GET /stats/estaticos": "Cache de JS/CSS do ML (acertos, bytes, despejos)",
+            "GET /imagens/{hash}": "Foto do produto em cache local (foto_local)",
+            "GET /precos/{mlb_id}": "Historico de precos e minimo historico",
+            "GET /precos/quedas": "Produtos que cairam X% nas ultimas N horas",
+            "POST /scrape/ofertas": "Executa scraping (conta escolhida ou lote distribuido entre contas)",
+            "POST /scrape/jobs": "Executa scraping em background (com checkpoint)",
+            "GET /scrape/jobs/{run_id}": "Progresso/resultado do job",
+            "POST /scrape/jobs/{run_id}/resume": "Retoma job interrompido",
+            "POST /scrape/produtos": "Links de afiliado para uma lista de URLs ou MLB IDs",
+            "POST /monitor/relampago": "Inicia monitor de ofertas relampago (push no callback)",
+            "GET /monitor/relampago": "Estado do monitor",
+            "DELETE /monitor/relampago": "Para o monitor",
+            "GET /webhooks/status": "Outbox de webhooks (pendentes, entregues, dead-letter)",
+            "GET /webhooks/dead-letter": "Produtos que esgotaram as tentativas de entrega",
+            "POST /webhooks/dead-letter/reprocessar": "Devolve o dead-letter para a outbox",
+            "GET /traces": "Execucoes com trace gravado",
+            "GET /traces/{run_id}": "Trace da execucao (Chrome trace JSON, abre no Perfetto)"
         },
         "docs": "/docs"
     }
@@ -189,7 +530,7 @@ async def root():
 @app.get("/health")
 async def health():
     """Health check basico"""
-    cookies_info = check_cookies_files()
+    cookies_info = await check_cookies_files()
     return {
         "status": "healthy",
         "cookies_exist": cookies_info["cookies_exist"],
@@ -197,112 +538,134 @@ async def health():
     }
 
 
+@app.get("/ready")
+async def ready():
+    """
+    Readiness: 503 ate o primeiro aquecimento bem sucedido, 200 depois.
+
+    Use no healthcheck do container para o Traefik so rotear para
+    replicas prontas. Aquecimento que falhou continua 503 (e e tentado de
+    novo); re-aquecimentos depois do primeiro (ex: fim do monitor) nao
+    tiram a replica do ar. Falha de login nao bloqueia (ver `logado`/`erro`).
+    """
+    pronto = aquecimento["pronto_em"] is not None or aquecimento["status"] == "desativado"
+    return JSONResponse(
+        status_code=200 if pronto else 503,
+        content={
+            "ready": pronto,
+            **aquecimento,
+            "browser_ativo": {etiqueta: sessao.browser_ativo for etiqueta, sessao in sessoes.items()},
+        }
+    )
+
+
 @app.get("/auth/status", response_model=AuthStatusResponse)
-async def auth_status(api_key: str = Depends(verify_api_key)):
+async def auth_status(conta: Optional[str] = None, api_key: str = Depends(verify_api_key)):
     """
-    Verifica status dos cookies de autenticacao.
+    Verifica status dos cookies de autenticacao da conta (padrao: conta padrao).
 
     Este endpoint e RAPIDO pois NAO abre o browser.
-    Apenas verifica se os arquivos de cookies existem e se estao dentro da validade.
+    Le a expiracao real dos cookies de sessao do ML no perfil do Chromium.
 
     Para verificacao completa (abre browser e testa login real), use GET /auth/check
     """
-    cookies_info = check_cookies_files()
+    sessao = obter_sessao(conta)
+    cookies_info = await check_cookies_files(sessao.conta.perfil)
+    conta = sessao.conta.etiqueta
 
     # Sem cookies
     if not cookies_info["cookies_exist"]:
         return AuthStatusResponse(
+            conta=conta,
             cookies_exist=False,
             cookies_valid=False,
             message="Cookies nao encontrados. Login necessario.",
             action_required="Execute localmente: python login_local.py && ./sync_to_vps.ps1"
         )
 
-    # Com cookies mas sem metadata
-    if not cookies_info.get("metadata_exist"):
+    # Banco de cookies sem a sessao do ML (deslogado ou banco ilegivel)
+    if not cookies_info["session_found"]:
         return AuthStatusResponse(
+            conta=conta,
             cookies_exist=True,
             cookies_valid=False,
-            login_date=None,
-            message="Cookies existem mas sem metadata. Validade desconhecida.",
-            action_required="Recomendado refazer login para ter controle de validade"
+            message=cookies_info["error"] or "Cookies sem sessao do Mercado Livre. Login necessario.",
+            action_required="Execute localmente: python login_local.py && ./sync_to_vps.ps1"
         )
 
-    # Com cookies e metadata
-    days_until_expiry = cookies_info.get("days_until_expiry", 0)
+    # Validade real: expiracao mais proxima entre os cookies de sessao
+    datas = {
+        "login_date": cookies_info["login_date"],
+        "days_since_login": cookies_info["days_since_login"],
+        "days_until_expiry": cookies_info["days_until_expiry"],
+        "expires_at": cookies_info["expires_at"],
+    }
+    days_until_expiry = cookies_info["days_until_expiry"]
 
-    if days_until_expiry <= 0:
+    if not cookies_info["logged_in"]:
         return AuthStatusResponse(
+            conta=conta,
             cookies_exist=True,
             cookies_valid=False,
-            login_date=cookies_info.get("login_date"),
-            days_since_login=cookies_info.get("days_since_login"),
-            days_until_expiry=days_until_expiry,
-            message="Cookies EXPIRADOS!",
+            **datas,
+            message=f"Cookies EXPIRADOS em {cookies_info['expires_at']}!",
             action_required="Execute localmente: python login_local.py && ./sync_to_vps.ps1"
         )
 
+    # Sessao sem data de expiracao: vale ate o logout
+    if days_until_expiry is None:
+        return AuthStatusResponse(
+            conta=conta,
+            cookies_exist=True,
+            cookies_valid=True,
+            **datas,
+            message="Cookies validos (sessao sem data de expiracao)."
+        )
+
     if days_until_expiry <= 2:
         return AuthStatusResponse(
+            conta=conta,
             cookies_exist=True,
             cookies_valid=True,
-            login_date=cookies_info.get("login_date"),
-            days_since_login=cookies_info.get("days_since_login"),
-            days_until_expiry=days_until_expiry,
-            message=f"Cookies validos mas EXPIRANDO EM {days_until_expiry} DIAS!",
+            **datas,
+            message=f"Cookies validos mas EXPIRANDO EM {days_until_expiry} DIAS ({cookies_info['expires_at']})!",
             action_required="Recomendado refazer login em breve"
         )
 
     return AuthStatusResponse(
+        conta=conta,
         cookies_exist=True,
         cookies_valid=True,
-        login_date=cookies_info.get("login_date"),
-        days_since_login=cookies_info.get("days_since_login"),
-        days_until_expiry=days_until_expiry,
-        message=f"Cookies validos. Expiram em {days_until_expiry} dias."
+        **datas,
+        message=f"Cookies validos. Expiram em {days_until_expiry} dias ({cookies_info['expires_at']})."
     )
 
 
 @app.get("/auth/check")
-async def auth_check(api_key: str = Depends(verify_api_key)):
+async def auth_check(conta: Optional[str] = None, api_key: str = Depends(verify_api_key)):
     """
     Verifica login REAL abrindo o browser e testando no site.
 
-    ATENCAO: Este endpoint e LENTO (5-15 segundos) pois abre o browser.
-    Use GET /auth/status para verificacao rapida.
+    ATENCAO: Este endpoint e LENTO (5-15 segundos): navega no site, e abre o
+    browser se nao houver um aquecido. Use GET /auth/status para verificacao rapida.
 
     Este endpoint e util para confirmar que os cookies realmente funcionam
     antes de executar um scraping grande.
     """
-    global scraper_instance
-
+    sessao = obter_sessao(conta)
     try:
-        # Fecha instancia anterior se existir
-        if scraper_instance:
-            try:
-                await scraper_instance._close_browser()
-            except:
-                pass
-            scraper_instance = None
-
-        # Cria nova instancia
-        scraper_instance = ScraperMLAfiliado(
-            headless=True,
-            wait_ms=1500,
-            max_produtos=1,
-            user_data_dir=BROWSER_DATA_DIR
-        )
-        await scraper_instance._init_browser()
-
-        # Verifica login
-        is_logged_in = await scraper_instance.verificar_login()
-
-        # Fecha browser apos verificacao
-        await scraper_instance._close_browser()
-        scraper_instance = None
+        # Reaproveita o browser aquecido da conta; a verificacao em si e sempre real
+        scraper = await reservar_scraper(sessao, headless=True)
+        try:
+            is_logged_in = await scraper.verificar_login()
+        except Exception:
+            await sessao.liberar(scraper, descartar=True)
+            raise
+        await sessao.liberar(scraper)
 
         if is_logged_in:
             return {
+                "conta": sessao.conta.etiqueta,
                 "logged_in": True,
                 "message": "Login de afiliado confirmado! Pronto para scraping.",
                 "checked_at": datetime.now().isoformat()
@@ -311,6 +674,7 @@ async def auth_check(api_key: str = Depends(verify_api_key)):
             return JSONResponse(
                 status_code=401,
                 content={
+                    "conta": sessao.conta.etiqueta,
                     "logged_in": False,
                     "message": "NAO esta logado como afiliado!",
                     "action_required": "Execute localmente: python login_local.py && ./sync_to_vps.ps1",
@@ -318,15 +682,9 @@ async def auth_check(api_key: str = Depends(verify_api_key)):
                 }
             )
 
+    except HTTPException:
+        raise
     except Exception as e:
-        # Garante que browser seja fechado em caso de erro
-        if scraper_instance:
-            try:
-                await scraper_instance._close_browser()
-            except:
-                pass
-            scraper_instance = None
-
         return JSONResponse(
             status_code=500,
             content={
@@ -338,100 +696,803 @@ async def auth_check(api_key: str = Depends(verify_api_key)):
         )
 
 
-@app.post("/scrape/ofertas", response_model=ScrapeResponse)
-async def scrape_ofertas(request: ScrapeRequest, api_key: str = Depends(verify_api_key)):
+@app.get("/stats/estrategias")
+async def stats_estrategias(api_key: str = Depends(verify_api_key)):
     """
-    Executa scraping das ofertas do ML com links de afiliado.
+    Ranking adaptativo das estrategias de seletores.
 
-    Requer que os cookies de login estejam configurados.
-    Verifique com GET /auth/status antes de executar.
+    Mostra taxa de sucesso, latencia media e a ordem atual de tentativa
+    de cada grupo (botao Compartilhar, metodos do modal).
     """
-    global scraper_instance
+    ranking = RankingEstrategias(os.path.join(DATA_DIR, "ranking_estrategias.json"))
+    return ranking.resumo()
 
-    try:
-        # Fecha instancia anterior se existir (evita conflito de sessao)
-        if scraper_instance:
-            try:
-                await scraper_instance._close_browser()
-            except:
-                pass
-            scraper_instance = None
 
-        # Verifica cookies primeiro (rapido)
-        cookies_info = check_cookies_files()
-        if not cookies_info["cookies_exist"]:
-            raise HTTPException(
-                status_code=401,
-                detail={
-                    "error": "Cookies nao encontrados",
-                    "action": "Execute localmente: python login_local.py && ./sync_to_vps.ps1"
-                }
-            )
+@app.get("/stats/admissao")
+async def stats_admissao(api_key: str = Depends(verify_api_key)):
+    """Scrapings em execucao, fila por prioridade e pedidos recusados (429)"""
+    return {
+        **admissao.resumo(),
+        "contas": {
+            etiqueta: {"abas_em_uso": len(sessao.em_uso), "abas_livres": len(sessao.abas_livres)}
+            for etiqueta, sessao in sessoes.items()
+        },
+    }
 
-        # Inicializa scraper
-        scraper_instance = ScraperMLAfiliado(
-            headless=request.headless,
-            wait_ms=1500,
-            max_produtos=request.max_produtos,
-            user_data_dir=BROWSER_DATA_DIR
+
+@app.get("/stats/pacing")
+async def stats_pacing(api_key: str = Depends(verify_api_key)):
+    """
+    Estado do controle de ritmo AIMD das navegacoes, por conta.
+
+    Mostra a taxa atual (req/s), contadores e os ultimos eventos de back-off
+    (HTTP 429/5xx, carregamento lento, redirect para login/verificacao).
+    Cada conta tem o proprio ritmo (teto `taxa_max` em contas.json).
+    """
+    return {etiqueta: sessao.conta.pacing.resumo() for etiqueta, sessao in sessoes.items()}
+
+
+@app.get("/stats/estaticos")
+async def stats_estaticos(api_key: str = Depends(verify_api_key)):
+    """
+    Cache de JS/CSS do ML: tamanho em disco, acertos/faltas e despejos (LRU).
+
+    Contadores sao deste processo; urls/objetos/bytes sao do diretorio
+    compartilhado.
+    """
+    if cache_estaticos is None:
+        return {"ativo": False}
+    return {"ativo": True, **await asyncio.to_thread(cache_estaticos.resumo)}
+
+
+@app.get("/imagens/{nome}")
+async def servir_imagem(
+    nome: str,
+    request: Request,
+    w: Optional[int] = None,
+    formato: Optional[Literal["webp", "jpg"]] = None
+):
+    """
+    Serve uma imagem do cache local (referencia em `foto_local` dos produtos).
+
+    O nome e o hash do conteudo, entao a resposta e imutavel e pode ser
+    cacheada para sempre. Use `w` (e opcionalmente `formato`) para uma
+    variante redimensionada, ex: /imagens/<hash>.jpg?w=800&formato=webp
+    """
+    sha256 = nome.split(".")[0]
+    if len(sha256) != 64 or any(c not in "0123456789abcdef" for c in sha256):
+        raise HTTPException(status_code=404, detail="Imagem nao encontrada")
+
+    if w:
+        formato = formato or "webp"
+        etag = f'"{sha256}-w{w}-{formato}"'
+    else:
+        etag = f'"{sha256}"'
+    cabecalhos = {"Cache-Control": "public, max-age=31536000, immutable", "ETag": etag}
+
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=cabecalhos)
+
+    if w:
+        try:
+            # Pillow é síncrono: redimensionar no event loop travaria as outras requisições
+            caminho = await asyncio.to_thread(cache_imagens.variante, sha256, w, formato)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        except RuntimeError as e:
+            raise HTTPException(status_code=501, detail=str(e))
+        media_type = CONTENT_TYPES.get(formato)
+    else:
+        caminho = cache_imagens.localizar(sha256)
+        media_type = CONTENT_TYPES.get(caminho.rsplit(".", 1)[-1]) if caminho else None
+
+    if not caminho:
+        raise HTTPException(status_code=404, detail="Imagem nao encontrada")
+    return FileResponse(caminho, media_type=media_type, headers=cabecalhos)
+
+
+@app.get("/precos/quedas")
+async def precos_quedas(
+    http: Request,
+    percentual: float = 20,
+    horas: float = 24,
+    limite: int = 100,
+    api_key: str = Depends(verify_api_key)
+):
+    """
+    Produtos cujo preco caiu pelo menos `percentual`% em relacao ao maior
+    preco observado nas ultimas `horas`.
+    """
+    return resposta_json(http, {
+        "percentual": percentual,
+        "horas": horas,
+        "produtos": historico_precos.quedas(percentual, horas, limite)
+    })
+
+
+@app.get("/precos/{mlb_id}")
+async def precos_produto(
+    mlb_id: str,
+    http: Request,
+    horas: Optional[float] = None,
+    limite: int = 500,
+    api_key: str = Depends(verify_api_key)
+):
+    """
+    Historico de precos do produto (mais recentes primeiro) com ultimo
+    preco e minimo historico. Use `horas` para limitar a janela.
+    """
+    resumo = historico_precos.resumo(mlb_id)
+    if resumo is None:
+        raise HTTPException(status_code=404, detail="Produto sem historico")
+    desde = int(datetime.now().timestamp() - horas * 3600) if horas else None
+    return resposta_json(http, {**resumo, "historico": historico_precos.historico(mlb_id, desde, limite)})
+
+
+async def exigir_cookies(sessao: SessaoConta):
+    """401 se a conta nao tem cookies de login ou a sessao expirou (rapido, sem browser)"""
+    cookies_info = await check_cookies_files(sessao.conta.perfil)
+    erro = None
+    if not cookies_info["cookies_exist"]:
+        erro = f"Cookies nao encontrados (conta {sessao.conta.etiqueta})"
+    # Sessao ausente do banco nao bloqueia: quem decide e o verificar_login
+    elif cookies_info["session_found"] and not cookies_info["logged_in"]:
+        erro = f"Sessao expirada em {cookies_info['expires_at']} (conta {sessao.conta.etiqueta})"
+    if erro:
+        raise HTTPException(
+            status_code=401,
+            detail={
+                "error": erro,
+                "action": "Execute localmente: python login_local.py && ./sync_to_vps.ps1"
+            }
         )
-        await scraper_instance._init_browser()
 
-        # Verifica login real
-        is_logged_in = await scraper_instance.verificar_login()
+
+async def executar_na_conta(
+    sessao: SessaoConta,
+    request: ScrapeRequest,
+    sink=None,
+    links: Optional[list[str]] = None,
+    run_id: Optional[str] = None,
+    rastreador: Optional[Rastreador] = None
+) -> tuple[list[dict], Optional[str]]:
+    """
+    Scraping com o browser de uma conta. Com `links`, pula a listagem
+    (fatia de um lote distribuido). Retorna (produtos, run_id).
+    """
+    if rastreador:
+        Rastreador.definir_faixa(sessao.conta.etiqueta)
+
+    # Browser aquecido da conta, ou uma aba dele se outro scraping estiver rodando
+    try:
+        with rastreador.span("reservar_browser", aquecido=sessao.browser_ativo) if rastreador else nullcontext():
+            scraper = await reservar_scraper(sessao, headless=request.headless)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    descartar = False
+    try:
+        scraper.trace = rastreador
+        scraper.max_produtos = request.max_produtos
+        scraper.produto_timeout_s = request.produto_timeout_s
+        scraper.run_timeout_s = request.run_timeout_s
+        scraper.concorrencia = request.concorrencia
+        scraper.cache_imagens = cache_imagens if request.cachear_imagens else None
+
+        # Verifica login real (confirmacao recente do aquecimento vale)
+        is_logged_in = await scraper.verificar_login(max_idade_s=scraper.LOGIN_VALIDADE_S)
 
         if not is_logged_in:
-            await scraper_instance._close_browser()
-            scraper_instance = None
             raise HTTPException(
                 status_code=401,
                 detail={
-                    "error": "Nao esta logado como afiliado",
+                    "error": f"Nao esta logado como afiliado (conta {sessao.conta.etiqueta})",
                     "action": "Execute localmente: python login_local.py && ./sync_to_vps.ps1"
                 }
             )
 
-        # Executa scraping
-        produtos = await scraper_instance.scrape_ofertas(
+        # Executa scraping (o browser continua aberto para o proximo request)
+        produtos = await scraper.scrape_ofertas(
             url=request.url,
-            max_produtos=request.max_produtos
+            max_produtos=request.max_produtos,
+            sink=sink,
+            checkpoint=checkpoint_store,
+            run_id=run_id or request.run_id,
+            resume=request.resume,
+            historico=historico_precos,
+            filtros=FiltrosOferta(**request.filtros.model_dump()) if request.filtros else None,
+            outbox=outbox_webhooks if request.enviar_webhooks else None,
+            links=links,
+            # Fatia de lote: retoma na conta dela, sem redistribuir
+            pedido=request.model_dump(exclude={"run_id", "resume"}) | (
+                {"conta": sessao.conta.etiqueta, "distribuir": False, "contas": None} if links is not None else {}
+            )
         )
+        cache_links.guardar_varios(produtos)
+        return produtos, scraper.run_id
 
-        # Fecha browser apos scraping
-        await scraper_instance._close_browser()
-        scraper_instance = None
-
-        # Calcula estatisticas
-        total_com_link = sum(1 for p in produtos if p.get("url_curta"))
-        total_sem_link = len(produtos) - total_com_link
-
-        return ScrapeResponse(
-            success=True,
-            total=len(produtos),
-            total_com_link=total_com_link,
-            total_sem_link=total_sem_link,
-            produtos=produtos,
-            scraped_at=datetime.now().isoformat()
-        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        # Estado do browser desconhecido: descarta
+        descartar = True
+        raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        scraper.trace = None
+        await sessao.liberar(scraper, descartar=descartar)
+
+
+async def executar_distribuido(
+    alvo: list[SessaoConta],
+    request: ScrapeRequest,
+    sink=None,
+    rastreador: Optional[Rastreador] = None
+) -> tuple[list[dict], str]:
+    """
+    Divide um lote entre contas: a listagem e lida uma vez (primeira conta)
+    e os links sao repartidos em rodizio; cada conta gera os links da propria
+    etiqueta, em paralelo e no proprio ritmo. Cada fatia tem checkpoint
+    proprio ({run_id}_{etiqueta}).
+    """
+    run_id = request.run_id or CheckpointStore.novo_run_id()
+    principal = alvo[0]
 
+    scraper = await reservar_scraper(principal, headless=request.headless)
+    scraper.trace = rastreador
+    descartar = False
+    try:
+        if not await scraper.verificar_login(max_idade_s=scraper.LOGIN_VALIDADE_S):
+            raise HTTPException(
+                status_code=401,
+                detail=f"Nao esta logado como afiliado (conta {principal.conta.etiqueta})"
+            )
+        links = await scraper.obter_links_ofertas(
+            request.url,
+            filtros=FiltrosOferta(**request.filtros.model_dump()) if request.filtros else None,
+            limite=request.max_produtos
+        )
     except HTTPException:
         raise
     except Exception as e:
-        # Garante que browser seja fechado
-        if scraper_instance:
-            try:
-                await scraper_instance._close_browser()
-            except:
-                pass
-            scraper_instance = None
+        descartar = True
         raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        scraper.trace = None
+        await principal.liberar(scraper, descartar=descartar)
+
+    fatias = [links[i::len(alvo)] for i in range(len(alvo))]
+    print(f"🔀 Lote de {len(links)} links dividido entre {len(alvo)} contas")
+    resultados = await asyncio.gather(
+        *(
+            executar_na_conta(sessao, request, sink, links=fatia,
+                              run_id=f"{run_id}_{sessao.conta.etiqueta}", rastreador=rastreador)
+            for sessao, fatia in zip(alvo, fatias) if fatia
+        ),
+        return_exceptions=True
+    )
+
+    # Junta na ordem da listagem; fatia que falhou inteira sai com status "erro"
+    por_url: dict[str, dict] = {}
+    for sessao, fatia, resultado in zip(alvo, [f for f in fatias if f], resultados):
+        if isinstance(resultado, BaseException):
+            erro = resultado.detail if isinstance(resultado, HTTPException) else str(resultado)
+            print(f"⚠️ Conta {sessao.conta.etiqueta} falhou: {erro}")
+            for link in fatia:
+                item = scraper._novo_produto(link, status="erro")
+                item["etiqueta"] = sessao.conta.etiqueta
+                item["erro"] = str(erro)
+                por_url[link] = item
+        else:
+            for produto in resultado[0]:
+                por_url[produto["url_original"]] = produto
+    return [por_url[link] for link in links if link in por_url], run_id
+
+
+def preparar_resume(request: ScrapeRequest) -> ScrapeRequest:
+    """
+    Pedido de retomada com as opcoes da execucao original (conta, filtros,
+    prazos, sinks...), gravadas no checkpoint; campos enviados agora
+    sobrepoem. Sem resume, devolve o proprio pedido.
+
+    Raises:
+        HTTPException: 404 sem execucao/checkpoint com links; 409 ja concluida
+    """
+    if not request.resume:
+        return request
+    run_id = request.run_id or checkpoint_store.ultimo_incompleto()
+    if not run_id:
+        raise HTTPException(status_code=404, detail="Nenhuma execucao incompleta para retomar")
+    estado = checkpoint_store.carregar(run_id)
+    if estado is None or estado.get("links") is None:
+        raise HTTPException(status_code=404, detail=f"Execucao {run_id} sem checkpoint com links para retomar")
+    if estado.get("status") == "concluido":
+        raise HTTPException(status_code=409, detail=f"Execucao {run_id} ja foi concluida")
+    # Checkpoints antigos (sem pedido) so tinham url e max_produtos
+    original = estado.get("pedido") or {"url": estado.get("url"), "max_produtos": estado.get("max_produtos")}
+    enviados = request.model_dump(exclude_unset=True, exclude={"run_id", "resume"})
+    return ScrapeRequest(**{**original, **enviados, "run_id": run_id, "resume": True})
+
+
+async def executar_scrape(request: ScrapeRequest) -> ScrapeResponse:
+    """
+    Fluxo completo de scraping usado pelos endpoints sincronos e pelos jobs.
+
+    Sempre grava checkpoint (run_id); com request.resume=True retoma
+    a execucao request.run_id a partir do que ja foi concluido.
+    Com request.distribuir=True o lote e dividido entre as contas.
+    """
+    if request.distribuir:
+        alvo = [obter_sessao(etiqueta) for etiqueta in (request.contas or list(sessoes))]
+        if request.resume and len(alvo) > 1:
+            raise HTTPException(
+                status_code=400,
+                detail="Lote distribuido nao retoma pelo run_id base: retome cada fatia ({run_id}_{etiqueta})"
+            )
+    else:
+        alvo = [obter_sessao(request.conta)]
+
+    # Verifica cookies primeiro (rapido)
+    for sessao in alvo:
+        await exigir_cookies(sessao)
+
+    # run_id definido antes: nomeia o checkpoint, o trace e os arquivos do sink
+    request.run_id = request.run_id or CheckpointStore.novo_run_id()
+
+    # Sink opcional: grava cada produto assim que extraido
+    # (validado antes de abrir o browser)
+    sink = None
+    if request.salvar_formato:
+        try:
+            sink = criar_sink(
+                request.salvar_formato,
+                RESULTADOS_DIR,
+                compressao=request.salvar_compressao,
+                max_bytes=int(request.salvar_rotacao_mb * 1024 * 1024) if request.salvar_rotacao_mb else None,
+                identificador=request.run_id
+            )
+        except (ValueError, RuntimeError) as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+    rastreador = armazem_traces.novo_rastreador(request.run_id, forcar=request.trace)
+
+    try:
+        if len(alvo) > 1:
+            produtos, run_id = await executar_distribuido(alvo, request, sink, rastreador)
+        else:
+            produtos, run_id = await executar_na_conta(alvo[0], request, sink, rastreador=rastreador)
+    finally:
+        if sink:
+            sink.fechar()
+        # Execucao que falhou tambem grava o trace (e justamente a que interessa)
+        if rastreador:
+            await asyncio.to_thread(armazem_traces.salvar, rastreador)
+
+    # Calcula estatisticas
+    total_com_link = sum(1 for p in produtos if p.get("url_curta"))
+    total_timeout = sum(1 for p in produtos if p.get("status") == "timeout")
+    total_sem_link = len(produtos) - total_com_link - total_timeout
+
+    return ScrapeResponse(
+        success=True,
+        run_id=run_id,
+        total=len(produtos),
+        total_com_link=total_com_link,
+        total_sem_link=total_sem_link,
+        total_timeout=total_timeout,
+        produtos=produtos,
+        arquivos=sink.arquivos if sink else [],
+        trace_url=f"/traces/{run_id}" if rastreador else None,
+        scraped_at=datetime.now().isoformat()
+    )
+
+
+@app.post("/scrape/ofertas", response_model=ScrapeResponse)
+async def scrape_ofertas(
+    request: ScrapeRequest,
+    http: Request,
+    fields: Optional[str] = None,
+    api_key: str = Depends(verify_api_key)
+):
+    """
+    Executa scraping das ofertas do ML com links de afiliado.
+
+    Requer que os cookies de login estejam configurados.
+    Verifique com GET /auth/status antes de executar.
+
+    Para retomar uma execucao interrompida, envie `run_id` e `resume: true`.
+    `?fields=mlb_id,url_curta,preco_atual` devolve so essas colunas de cada produto.
+    """
+    campos = campos_pedidos(fields)
+    request = preparar_resume(request)
+    vaga = entrar_na_fila(request.prioridade or "normal")
+    async with vaga:
+        resposta = await executar_scrape(request)
+    return resposta_json(http, resposta, condicional=False, campos=campos)
 
 
 @app.post("/scrape/ofertas/relampago", response_model=ScrapeResponse)
-async def scrape_ofertas_relampago(request: ScrapeRequest, api_key: str = Depends(verify_api_key)):
-    """Scraping especifico para ofertas relampago"""
-    request.url = "https://www.mercadolivre.com.br/ofertas#deal_type=lightning"
-    return await scrape_ofertas(request, api_key)
+async def scrape_ofertas_relampago(
+    request: ScrapeRequest,
+    http: Request,
+    fields: Optional[str] = None,
+    api_key: str = Depends(verify_api_key)
+):
+    """Scraping especifico para ofertas relampago (fura a fila dos scrapings em lote)"""
+    request.url = URL_RELAMPAGO
+    request.prioridade = request.prioridade or "alta"
+    return await scrape_ofertas(request, http, fields, api_key)
+
+
+@app.post("/scrape/produtos", response_model=ProdutosResponse)
+async def scrape_produtos(
+    request: ProdutosRequest,
+    http: Request,
+    fields: Optional[str] = None,
+    api_key: str = Depends(verify_api_key)
+):
+    """
+    Links de afiliado para uma lista de produtos (URLs ou MLB IDs), sem listagem.
+
+    Produto com link em cache mais novo que `max_idade_s` volta na hora; os
+    outros sao visitados em paralelo (`concorrencia` abas) pelo mesmo fluxo
+    do scraping. Cada item tem status proprio, na ordem do pedido.
+    `?fields=` limita as colunas de cada produto (como em /scrape/ofertas).
+    """
+    campos = campos_pedidos(fields)
+    sessao = obter_sessao(request.conta)
+    etiqueta = sessao.conta.etiqueta
+
+    # Entrada -> URL -> chave do produto; cache por (chave, etiqueta)
+    urls: list[Optional[str]] = [identidades_produto.url_produto(item) for item in request.itens]
+    do_cache: dict[int, dict] = {}
+    faltando: list[str] = []
+    for i, url in enumerate(urls):
+        if url is None:
+            continue
+        produto = cache_links.obter(identidades_produto.chave(url), etiqueta, request.max_idade_s)
+        if produto:
+            do_cache[i] = produto
+        else:
+            faltando.append(url)
+
+    produtos: list[dict] = []
+    run_id = None
+    rastreador = None
+    if faltando:
+        await exigir_cookies(sessao)
+        scrape = ScrapeRequest(
+            max_produtos=len(faltando),
+            headless=request.headless,
+            produto_timeout_s=request.produto_timeout_s,
+            run_timeout_s=request.run_timeout_s,
+            cachear_imagens=request.cachear_imagens,
+            enviar_webhooks=request.enviar_webhooks,
+            conta=etiqueta,
+            concorrencia=request.concorrencia,
+            run_id=CheckpointStore.novo_run_id(),
+        )
+        rastreador = armazem_traces.novo_rastreador(scrape.run_id, forcar=request.trace)
+        vaga = entrar_na_fila(request.prioridade or "normal")
+        try:
+            async with vaga:
+                produtos, run_id = await executar_na_conta(
+                    sessao, scrape, links=faltando, run_id=scrape.run_id, rastreador=rastreador
+                )
+        finally:
+            if rastreador:
+                await asyncio.to_thread(armazem_traces.salvar, rastreador)
+
+    # Produtos visitados por chave (ja com os vinculos aprendidos na visita) e por URL
+    visitados: dict[str, dict] = {}
+    for produto in produtos:
+        visitados[url_canonica(produto["url_original"])] = produto
+        visitados[identidades_produto.chave(produto["url_original"])] = produto
+
+    itens = []
+    for i, (entrada, url) in enumerate(zip(request.itens, urls)):
+        if url is None:
+            itens.append(ItemProdutoResponse(entrada=entrada, status="invalido", erro="Nem URL de produto do Mercado Livre nem MLB ID"))
+            continue
+        if i in do_cache:
+            itens.append(ItemProdutoResponse(entrada=entrada, status="sucesso", cache=True, produto=do_cache[i]))
+            continue
+        produto = visitados.get(identidades_produto.chave(url)) or visitados.get(url_canonica(url))
+        if produto is None:
+            itens.append(ItemProdutoResponse(entrada=entrada, status="timeout", erro="Nao visitado (prazo da execucao)"))
+        else:
+            itens.append(ItemProdutoResponse(
+                entrada=entrada, status=produto["status"], produto=produto, erro=produto.get("erro")
+            ))
+
+    return resposta_json(http, ProdutosResponse(
+        success=True,
+        run_id=run_id,
+        conta=etiqueta,
+        total=len(itens),
+        total_com_link=sum(1 for item in itens if item.produto and item.produto.url_curta),
+        do_cache=len(do_cache),
+        visitados=len(produtos),
+        itens=itens,
+        trace_url=f"/traces/{run_id}" if rastreador else None,
+        scraped_at=datetime.now().isoformat()
+    ), condicional=False, campos=campos)
+
+
+# ============================================
+# JOBS (execucao em background com checkpoint)
+# ============================================
+def campos_pedidos(fields: Optional[str]) -> Optional[tuple[str, ...]]:
+    """`fields` da query (colunas dos produtos na resposta); invalido = 400"""
+    try:
+        return parse_campos(fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def _iniciar_job(request: ScrapeRequest) -> str:
+    """Agenda executar_scrape em background e retorna o run_id"""
+    request.run_id = request.run_id or CheckpointStore.novo_run_id()
+    if request.run_id in jobs_ativos and not jobs_ativos[request.run_id]["task"].done():
+        raise HTTPException(status_code=409, detail=f"Job {request.run_id} ja esta em execucao")
+
+    # Mantem so os jobs terminados mais recentes em memoria (o checkpoint fica em disco)
+    terminados = [rid for rid, j in jobs_ativos.items() if j["task"].done()]
+    for rid in terminados[:-20]:
+        jobs_ativos.pop(rid, None)
+
+    # Jobs em lote entram com prioridade baixa; fila cheia = 429 ja no POST
+    vaga = entrar_na_fila(request.prioridade or "baixa")
+    job = {"task": None, "resultado": None, "erro": None, "na_fila": True}
+
+    async def rodar():
+        try:
+            async with vaga:
+                job["na_fila"] = False
+                job["resultado"] = await executar_scrape(request)
+        except HTTPException as e:
+            job["erro"] = e.detail
+        except Exception as e:
+            job["erro"] = str(e)
+
+    job["task"] = asyncio.create_task(rodar())
+    jobs_ativos[request.run_id] = job
+    return request.run_id
+
+
+@app.post("/scrape/jobs", status_code=202)
+async def criar_job(request: ScrapeRequest, api_key: str = Depends(verify_api_key)):
+    """
+    Inicia um scraping em background.
+
+    Retorna imediatamente o run_id; acompanhe em GET /scrape/jobs/{run_id}.
+    Com `resume: true` (e `run_id` opcional) retoma uma execucao interrompida.
+    """
+    run_id = _iniciar_job(preparar_resume(request))
+    return {"run_id": run_id, "status_url": f"/scrape/jobs/{run_id}"}
+
+
+@app.get("/scrape/jobs")
+async def listar_jobs(http: Request, api_key: str = Depends(verify_api_key)):
+    """Lista as execucoes registradas no checkpoint"""
+    execucoes = checkpoint_store.listar()
+    for meta in execucoes:
+        job = jobs_ativos.get(meta["run_id"])
+        meta["ativo"] = bool(job and not job["task"].done())
+    return resposta_json(http, {"jobs": execucoes})
+
+
+@app.get("/scrape/jobs/{run_id}")
+async def status_job(
+    run_id: Annotated[str, PathParam(pattern=PADRAO_RUN_ID)],
+    http: Request,
+    since: Optional[str] = None,
+    fields: Optional[str] = None,
+    api_key: str = Depends(verify_api_key)
+):
+    """
+    Progresso e resultado de uma execucao.
+
+    Para polling: mande o ETag recebido em If-None-Match (304 se nada mudou)
+    e o `cursor` da resposta anterior em `since` (so os produtos novos).
+    `fields` limita as colunas de cada produto (ex: mlb_id,url_curta,preco_atual).
+    """
+    campos = campos_pedidos(fields)
+    try:
+        since = normalizar_since(since)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="since invalido (use ISO 8601, ex: 2025-01-31T12:00:00)")
+    estado = checkpoint_store.carregar(run_id)
+    job = jobs_ativos.get(run_id)
+    if estado is None and job is None:
+        raise HTTPException(status_code=404, detail="Job nao encontrado")
+
+    ativo = bool(job and not job["task"].done())
+    resposta = {
+        "run_id": run_id,
+        "ativo": ativo,
+        "status": (estado or {}).get("status", "na_fila" if job and job["na_fila"] else "iniciando"),
+        "total_links": len((estado or {}).get("links") or []),
+        "concluidos": len((estado or {}).get("concluidos", [])),
+        "pendentes": len((estado or {}).get("pendentes", [])),
+        "erro": job["erro"] if job else None,
+    }
+    # em_andamento sem task ativa = processo caiu no meio; pode ser retomado
+    resposta["pode_retomar"] = not ativo and resposta["status"] != "concluido"
+    if job and job["resultado"]:
+        # Raso: os produtos (Produto) sao serializados direto, sem copia
+        resultado = dict(job["resultado"])
+        produtos = resultado["produtos"]
+        resultado["produtos"] = produtos_desde(produtos, since)
+        resposta["resultado"] = resultado
+    else:
+        produtos = [Produto.de_dict(p) for p in estado["concluidos"]] if estado else []
+        if estado:
+            resposta["produtos"] = produtos_desde(produtos, since)
+    resposta["since"] = since
+    resposta["cursor"] = proximo_cursor(produtos, since)
+    return resposta_json(http, resposta, campos=campos)
+
+
+@app.post("/scrape/jobs/{run_id}/resume", status_code=202)
+async def retomar_job(run_id: Annotated[str, PathParam(pattern=PADRAO_RUN_ID)], api_key: str = Depends(verify_api_key)):
+    """Retoma uma execucao interrompida a partir do checkpoint (mesma conta, filtros e opcoes)"""
+    if checkpoint_store.carregar(run_id) is None:
+        raise HTTPException(status_code=404, detail="Job nao encontrado")
+    _iniciar_job(preparar_resume(ScrapeRequest(run_id=run_id, resume=True)))
+    return {"run_id": run_id, "status_url": f"/scrape/jobs/{run_id}"}
+
+
+# ============================================
+# MONITOR DE OFERTAS RELAMPAGO
+# ============================================
+@app.post("/monitor/relampago", status_code=202)
+async def iniciar_monitor(request: MonitorRequest, api_key: str = Depends(verify_api_key)):
+    """
+    Inicia o monitor de ofertas relampago em background.
+
+    A pagina de ofertas relampago fica aberta e e recarregada a cada
+    `intervalo_s`; so as ofertas novas tem link gerado, e cada uma e
+    enviada ao `callback_url` assim que fica pronta:
+
+        {"evento": "oferta_relampago", "produto": {...}, "enviado_em": "..."}
+
+    Enquanto o monitor roda, os scrapings na conta dele retornam 409
+    (o perfil do browser so pode ser aberto uma vez); as outras contas seguem.
+    """
+    global monitor, monitor_task
+
+    if monitor_task and not monitor_task.done():
+        raise HTTPException(status_code=409, detail="Monitor ja esta ativo")
+    sessao = obter_sessao(request.conta)
+    await exigir_cookies(sessao)
+
+    # O monitor usa o perfil da conta: fecha o browser aquecido dela antes
+    try:
+        await sessao.tomar_perfil("Monitor de ofertas relampago ativo nesta conta")
+    except PerfilOcupado as e:
+        raise HTTPException(status_code=409, detail=f"{e}. Tente novamente quando terminar")
+
+    scraper = sessao.novo_scraper(
+        request.headless,
+        max_produtos=request.max_por_ciclo,
+        produto_timeout_s=request.produto_timeout_s,
+        cache_imagens=cache_imagens
+    )
+    cliente = httpx.AsyncClient(timeout=10, headers=request.callback_headers)
+
+    async def notificar(produto: dict):
+        resposta = await cliente.post(request.callback_url, json={
+            "evento": "oferta_relampago",
+            "produto": produto,
+            "enviado_em": datetime.now().isoformat()
+        })
+        resposta.raise_for_status()
+
+    monitor = MonitorRelampago(
+        scraper,
+        notificar=notificar,
+        intervalo_s=request.intervalo_s,
+        filtros=FiltrosOferta(**request.filtros.model_dump()) if request.filtros else None,
+        max_por_ciclo=request.max_por_ciclo,
+        notificar_existentes=request.notificar_existentes,
+        historico=historico_precos,
+        outbox=outbox_webhooks,
+        cache_links=cache_links
+    )
+    monitor_atual = monitor
+
+    async def rodar():
+        try:
+            await scraper._init_browser()
+            if not await scraper.verificar_login():
+                monitor_atual.ultimo_erro = "Nao esta logado como afiliado"
+                return
+            await monitor_atual.executar()
+        except Exception as e:
+            monitor_atual.ultimo_erro = str(e)
+        finally:
+            monitor_atual.parar()
+            await cliente.aclose()
+            try:
+                await scraper._close_browser()
+            except Exception:
+                pass
+            sessao.devolver_perfil()
+            # Perfil liberado: volta a ter um browser aquecido para os scrapings
+            if PREAQUECER:
+                asyncio.create_task(aquecer([sessao]))
+
+    monitor_task = asyncio.create_task(rodar())
+    return {"status": "iniciado", "conta": sessao.conta.etiqueta, "status_url": "/monitor/relampago"}
+
+
+@app.get("/monitor/relampago")
+async def status_monitor(api_key: str = Depends(verify_api_key)):
+    """Estado do monitor: ciclos, ofertas novas, notificacoes e latencia deteccao -> envio"""
+    if monitor is None:
+        return {"ativo": False}
+    resumo = monitor.resumo()
+    resumo["ativo"] = bool(monitor_task and not monitor_task.done())
+    return resumo
+
+
+@app.delete("/monitor/relampago")
+async def parar_monitor(api_key: str = Depends(verify_api_key)):
+    """Para o monitor e fecha o browser dele"""
+    if not monitor_task or monitor_task.done():
+        raise HTTPException(status_code=404, detail="Monitor nao esta ativo")
+    monitor.parar()
+    await monitor_task
+    return monitor.resumo()
+
+
+# ============================================
+# WEBHOOKS (outbox duravel)
+# ============================================
+@app.get("/webhooks/status")
+async def status_webhooks(api_key: str = Depends(verify_api_key)):
+    """Pendencias por destino, entregas, falhas e tamanho do dead-letter"""
+    return outbox_webhooks.resumo()
+
+
+@app.get("/webhooks/dead-letter")
+async def listar_dead_letter(limite: int = 100, api_key: str = Depends(verify_api_key)):
+    """Produtos que esgotaram as tentativas de entrega"""
+    return {"itens": outbox_webhooks.dead_letter(limite)}
+
+
+@app.post("/webhooks/dead-letter/reprocessar")
+async def reprocessar_dead_letter(destino: Optional[str] = None, api_key: str = Depends(verify_api_key)):
+    """Devolve os itens do dead-letter (opcionalmente de um destino) para a outbox"""
+    return {"reenfileirados": outbox_webhooks.reprocessar_dead_letter(destino)}
+
+
+# ============================================
+# TRACES
+# ============================================
+@app.get("/traces")
+async def listar_traces(api_key: str = Depends(verify_api_key)):
+    """Execucoes com trace gravado (amostradas ou com `"trace": true`)"""
+    # Primeira listagem le os traces do disco: fora do event loop
+    return {"amostragem": armazem_traces.amostragem, "traces": await asyncio.to_thread(armazem_traces.listar)}
+
+
+@app.get("/traces/{run_id}")
+async def obter_trace(run_id: Annotated[str, PathParam(pattern=PADRAO_RUN_ID)], resumo: bool = False, api_key: str = Depends(verify_api_key)):
+    """
+    Trace da execucao no formato Chrome trace-event: salve o JSON e abra em
+    https://ui.perfetto.dev (ou chrome://tracing). Cada conta/aba e uma faixa.
+
+    Com `resumo=true`, so o total/media/maximo por passo.
+    """
+    trace = await asyncio.to_thread(armazem_traces.carregar, run_id)
+    if trace is None:
+        raise HTTPException(status_code=404, detail="Execucao sem trace (nao amostrada ou inexistente)")
+    if resumo:
+        return trace["metadata"]
+    return trace
 
 
 if __name__ == "__main__":
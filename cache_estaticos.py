@@ -0,0 +1,292 @@
+"""
+Cache local dos JS/CSS estáticos do Mercado Livre (mlstatic.com)
+
+Todo contexto novo (browser reaberto, perfil reciclado, outra conta) baixa de
+novo os mesmos bundles grandes do CDN antes de a página do produto mostrar o
+título e o botão Compartilhar. Aqui os bundles versionados ficam em disco e
+as próximas requisições são respondidas direto dele (context.route), sem rede.
+
+- Só JS/CSS do mlstatic.com com versão na URL (hash no nome, "1.2.3" no
+  caminho ou ?v=): o conteúdo de uma URL dessas não muda. O resto segue para
+  a rede normalmente
+- Endereçado por conteúdo (sha256): URLs diferentes com o mesmo arquivo
+  gravam um objeto só
+- Compartilhado entre contextos e processos: índice SQLite (WAL) e objetos
+  gravados com rename atômico no mesmo diretório
+- Limite de tamanho com despejo LRU (último acesso) até 90% do limite
+
+Custo: com qualquer rota registrada, o Playwright desliga o cache HTTP do
+browser para o contexto INTEIRO, não só para as URLs da rota. Os bundles
+passam a vir daqui; imagens, fontes, HTML e chamadas de API de outros hosts
+deixam de ser reaproveitadas do cache do browser dentro do contexto. A rota
+só intercepta JS/CSS do mlstatic.com (PADRAO_ROTA, opcionalmente
+restringido por `padrao`), então o resto nem passa pelo Python. Mas o custo
+acima vale mesmo assim. Compensa quando os contextos são recriados com
+frequência (API com várias contas, perfis reciclados), porque aí o cache do
+browser começa vazio de qualquer forma. Num contexto único e longo, o cache
+HTTP do próprio browser pode sair melhor: desligue (CACHE_ESTATICOS=0 /
+--sem-cache-estaticos) e compare bytes_rede e o tempo por produto em
+/stats/estaticos e nos traces.
+
+Estrutura em disco:
+    {diretorio}/index.db
+    {diretorio}/objetos/ab/abcdef...
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Optional
+from urllib.parse import urlsplit
+
+
+MAX_BYTES_PADRAO = 256 * 1024 * 1024
+MAX_OBJETO = 16 * 1024 * 1024  # bundle maior que isso não é guardado
+MAX_IDADE_PADRAO_S = 7 * 24 * 3600  # por segurança, mesmo com versão na URL
+ATUALIZAR_ACESSO_S = 60  # acessado_em só é regravado se mais velho que isso (evita escrita a cada acerto)
+
+# Rota registrada no contexto: o resto das requisições nem passa pelo Python
+PADRAO_ROTA = re.compile(r"^https://[^/?#]*mlstatic\.com/[^?#]+\.(?:js|css)(?:[?#].*)?$")
+# Versão na URL: hash no nome (vpp.desktop.3d2f1a9c.js), semver no caminho (/5.21.0/) ou ?v=
+_RE_VERSAO = re.compile(r"[.\-_~][0-9a-f]{8,}\.(?:js|css)$|/v?\d+\.\d+\.\d+[/\-.]|[?&]v=[^&]+", re.IGNORECASE)
+
+# Cabeçalhos da resposta original repetidos ao servir do cache
+CABECALHOS_GUARDADOS = ("content-type", "access-control-allow-origin", "timing-allow-origin")
+# Não repassados ao servir da rede: o corpo de route.fetch() já vem descomprimido
+_CABECALHOS_TRANSPORTE = {"content-encoding", "content-length", "transfer-encoding"}
+
+
+class CacheEstaticos:
+    """JS/CSS versionados do ML em disco, servidos via context.route"""
+
+    def __init__(
+        self,
+        diretorio: str,
+        max_bytes: int = MAX_BYTES_PADRAO,
+        max_idade_s: Optional[float] = MAX_IDADE_PADRAO_S,
+        padrao: Optional[str] = None
+    ):
+        """
+        Args:
+            padrao: regex extra (sintaxe comum a Python e JS) que a URL também
+                precisa casar para ser interceptada (ex: r"/(vpp|pdp)[./-]" só
+                para os bundles da página do produto); None = todo JS/CSS do
+                mlstatic.com
+        """
+        self.diretorio = diretorio
+        self.max_bytes = max_bytes
+        self.max_idade_s = max_idade_s
+        self.padrao = re.compile(padrao) if padrao else None
+        os.makedirs(os.path.join(diretorio, "objetos"), exist_ok=True)
+
+        self._lock = threading.Lock()
+        # timeout: outros processos podem estar gravando no mesmo índice
+        self._db = sqlite3.connect(os.path.join(diretorio, "index.db"), check_same_thread=False, timeout=10)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS urls (
+                url TEXT PRIMARY KEY,
+                sha256 TEXT NOT NULL,
+                tamanho INTEGER NOT NULL,
+                cabecalhos TEXT NOT NULL,
+                baixado_em REAL NOT NULL,
+                acessado_em REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_urls_acesso ON urls (acessado_em);
+            CREATE INDEX IF NOT EXISTS idx_urls_sha256 ON urls (sha256);
+        """)
+        self._db.commit()
+
+        # Contadores deste processo
+        self.acertos = 0
+        self.faltas = 0
+        self.bytes_servidos = 0
+        self.bytes_rede = 0  # baixados nas faltas (o que o cache ainda não evitou)
+        self.repassados = 0  # interceptados mas não cacheáveis (sem versão na URL)
+        self.despejados = 0
+
+    def fechar(self):
+        with self._lock:
+            self._db.close()
+
+    # -----------------------------------------
+    # Índice e objetos
+    # -----------------------------------------
+
+    def cacheavel(self, url: str) -> bool:
+        """JS/CSS do mlstatic.com com versão na URL (e que casa com `padrao`, se houver)"""
+        if not PADRAO_ROTA.match(url):
+            return False
+        if self.padrao and not self.padrao.search(url):
+            return False
+        partes = urlsplit(url)
+        return bool(_RE_VERSAO.search(partes.path + (f"?{partes.query}" if partes.query else "")))
+
+    def caminho_objeto(self, sha256: str) -> str:
+        return os.path.join(self.diretorio, "objetos", sha256[:2], sha256)
+
+    def buscar(self, url: str) -> Optional[tuple[dict, bytes]]:
+        """(cabeçalhos, corpo) em cache, ou None (ausente, velho demais ou objeto despejado)"""
+        agora = time.time()
+        with self._lock:
+            linha = self._db.execute(
+                "SELECT sha256, cabecalhos, baixado_em, acessado_em FROM urls WHERE url = ?", (url,)
+            ).fetchone()
+        if linha is None:
+            return None
+        sha256, cabecalhos, baixado_em, acessado_em = linha
+        if self.max_idade_s is not None and agora - baixado_em > self.max_idade_s:
+            return None
+        try:
+            with open(self.caminho_objeto(sha256), "rb") as f:
+                corpo = f.read()
+        except OSError:
+            # Despejado por outro processo entre o SELECT e a leitura
+            with self._lock:
+                self._db.execute("DELETE FROM urls WHERE url = ? AND sha256 = ?", (url, sha256))
+                self._db.commit()
+            return None
+        if agora - acessado_em > ATUALIZAR_ACESSO_S:
+            with self._lock:
+                self._db.execute("UPDATE urls SET acessado_em = ? WHERE url = ?", (agora, url))
+                self._db.commit()
+        return json.loads(cabecalhos), corpo
+
+    def guardar(self, url: str, corpo: bytes, cabecalhos: dict):
+        sha256 = hashlib.sha256(corpo).hexdigest()
+        caminho = self.caminho_objeto(sha256)
+        # Dedupe: só grava se o conteúdo ainda não existe
+        if not os.path.exists(caminho):
+            os.makedirs(os.path.dirname(caminho), exist_ok=True)
+            tmp = f"{caminho}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp, "wb") as f:
+                f.write(corpo)
+            os.replace(tmp, caminho)
+
+        agora = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO urls (url, sha256, tamanho, cabecalhos, baixado_em, acessado_em) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (url, sha256, len(corpo), json.dumps(cabecalhos), agora, agora),
+            )
+            self._db.commit()
+            self._despejar()
+
+    def _total_bytes(self) -> int:
+        """Bytes em disco (cada objeto conta uma vez, mesmo com várias URLs)"""
+        (total,) = self._db.execute(
+            "SELECT COALESCE(SUM(tamanho), 0) FROM (SELECT MAX(tamanho) AS tamanho FROM urls GROUP BY sha256)"
+        ).fetchone()
+        return total
+
+    def _despejar(self):
+        """Acima do limite, remove as URLs menos acessadas até 90% dele (chamado com o lock)"""
+        if self._total_bytes() <= self.max_bytes:
+            return
+        alvo = self.max_bytes * 0.9
+        while self._total_bytes() > alvo:
+            antigas = self._db.execute(
+                "SELECT url, sha256 FROM urls ORDER BY acessado_em LIMIT 32"
+            ).fetchall()
+            if not antigas:
+                break
+            self._db.executemany("DELETE FROM urls WHERE url = ?", [(url,) for url, _ in antigas])
+            for sha256 in {sha256 for _, sha256 in antigas}:
+                if self._db.execute("SELECT 1 FROM urls WHERE sha256 = ? LIMIT 1", (sha256,)).fetchone():
+                    continue
+                try:
+                    os.remove(self.caminho_objeto(sha256))
+                except OSError:
+                    pass
+            self._db.commit()
+            self.despejados += len(antigas)
+
+    def resumo(self) -> dict:
+        with self._lock:
+            urls, objetos = self._db.execute("SELECT COUNT(*), COUNT(DISTINCT sha256) FROM urls").fetchone()
+            total = self._total_bytes()
+        return {
+            "urls": urls,
+            "objetos": objetos,
+            "bytes": total,
+            "max_bytes": self.max_bytes,
+            "acertos": self.acertos,
+            "faltas": self.faltas,
+            "bytes_servidos": self.bytes_servidos,
+            "bytes_rede": self.bytes_rede,
+            "repassados": self.repassados,
+            "despejados": self.despejados,
+        }
+
+    # -----------------------------------------
+    # Rota do Playwright
+    # -----------------------------------------
+
+    async def instalar(self, context):
+        """
+        Registra a rota no contexto (vale para todas as páginas/abas dele).
+        Desliga o cache HTTP do browser no contexto (ver docstring do módulo).
+        """
+        await context.route(self.padrao_rota, self._rota)
+
+    @property
+    def padrao_rota(self) -> re.Pattern:
+        """
+        PADRAO_ROTA restrito por `padrao` (lookahead). Regex e não função:
+        o Playwright filtra no browser e só as URLs que casam vêm para o Python
+        """
+        if self.padrao is None:
+            return PADRAO_ROTA
+        return re.compile(rf"^(?=.*(?:{self.padrao.pattern})){PADRAO_ROTA.pattern[1:]}")
+
+    async def _rota(self, route):
+        request = route.request
+        if request.method != "GET" or not self.cacheavel(request.url):
+            self.repassados += 1
+            await route.fallback()
+            return
+
+        try:
+            encontrado = await asyncio.to_thread(self.buscar, request.url)
+        except sqlite3.Error as e:
+            print(f"⚠️ Cache de estáticos indisponível: {e}")
+            encontrado = None
+        if encontrado:
+            cabecalhos, corpo = encontrado
+            self.acertos += 1
+            self.bytes_servidos += len(corpo)
+            await route.fulfill(status=200, headers=cabecalhos, body=corpo)
+            return
+
+        self.faltas += 1
+        try:
+            resposta = await route.fetch()
+            corpo = await resposta.body()
+        except Exception:
+            # Falha de rede: o browser tenta sozinho (e mostra o erro real)
+            await route.fallback()
+            return
+        self.bytes_rede += len(corpo)
+
+        cache_control = resposta.headers.get("cache-control", "").lower()
+        if (
+            resposta.status == 200
+            and 0 < len(corpo) <= MAX_OBJETO
+            and "no-store" not in cache_control
+            and "private" not in cache_control
+        ):
+            guardados = {k: resposta.headers[k] for k in CABECALHOS_GUARDADOS if k in resposta.headers}
+            try:
+                await asyncio.to_thread(self.guardar, request.url, corpo, guardados)
+            except (OSError, sqlite3.Error) as e:
+                print(f"⚠️ Não foi possível guardar estático em cache: {e}")
+
+        cabecalhos = {k: v for k, v in resposta.headers.items() if k.lower() not in _CABECALHOS_TRANSPORTE}
+        await route.fulfill(status=resposta.status, headers=cabecalhos, body=corpo)
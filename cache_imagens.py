@@ -0,0 +1,241 @@
+"""
+Cache local de imagens de produtos (foto_url)
+
+- Download assíncrono com pool de conexões (httpx) e limite de concorrência
+- Armazenamento endereçado por conteúdo (sha256): a mesma imagem vinda de
+  URLs diferentes é gravada uma vez só
+- Índice url -> hash em SQLite, para não baixar de novo a mesma URL
+- Variantes redimensionadas/WebP geradas sob demanda (requer Pillow)
+
+Estrutura em disco:
+    {diretorio}/index.db
+    {diretorio}/objetos/ab/abcdef...jpg
+    {diretorio}/variantes/abcdef..._w800.webp
+"""
+
+import asyncio
+import hashlib
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Optional
+
+import httpx
+
+try:
+    from PIL import Image
+except ImportError:  # opcional (variantes)
+    Image = None
+
+
+EXTENSOES = {
+    "image/jpeg": "jpg",
+    "image/jpg": "jpg",
+    "image/png": "png",
+    "image/webp": "webp",
+    "image/gif": "gif",
+    "image/avif": "avif",
+}
+CONTENT_TYPES = {
+    "jpg": "image/jpeg",
+    "png": "image/png",
+    "webp": "image/webp",
+    "gif": "image/gif",
+    "avif": "image/avif",
+}
+
+# Variantes permitidas (evita gerar arquivos arbitrários via API)
+LARGURAS_VARIANTES = (320, 640, 800, 1080, 1200)
+FORMATOS_VARIANTES = ("webp", "jpg")
+
+
+class CacheImagens:
+    """Cache de imagens endereçado por conteúdo"""
+
+    def __init__(self, diretorio: str, max_conexoes: int = 8, timeout_s: float = 15.0):
+        self.diretorio = diretorio
+        self.max_conexoes = max_conexoes
+        self.timeout_s = timeout_s
+        os.makedirs(os.path.join(diretorio, "objetos"), exist_ok=True)
+        os.makedirs(os.path.join(diretorio, "variantes"), exist_ok=True)
+
+        self._db = sqlite3.connect(os.path.join(diretorio, "index.db"), check_same_thread=False)
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS urls (
+                url TEXT PRIMARY KEY,
+                sha256 TEXT NOT NULL,
+                content_type TEXT,
+                tamanho INTEGER,
+                baixado_em TEXT
+            )
+        """)
+        self._db.commit()
+        self._db_lock = threading.Lock()
+
+        self._client: Optional[httpx.AsyncClient] = None
+        self._semaforo = asyncio.Semaphore(max_conexoes)
+        self._em_andamento: dict[str, asyncio.Future] = {}
+
+    def _cliente(self) -> httpx.AsyncClient:
+        """Cliente HTTP reaproveitado (keep-alive / pool de conexões)"""
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout_s,
+                follow_redirects=True,
+                limits=httpx.Limits(max_connections=self.max_conexoes, max_keepalive_connections=self.max_conexoes),
+                headers={"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0.0.0 Safari/537.36"},
+            )
+        return self._client
+
+    async def fechar(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+        with self._db_lock:
+            self._db.close()
+
+    # -----------------------------------------
+    # Caminhos
+    # -----------------------------------------
+
+    def caminho_objeto(self, sha256: str, extensao: str) -> str:
+        return os.path.join(self.diretorio, "objetos", sha256[:2], f"{sha256}.{extensao}")
+
+    def localizar(self, sha256: str) -> Optional[str]:
+        """Caminho do objeto pelo hash (qualquer extensão)"""
+        pasta = os.path.join(self.diretorio, "objetos", sha256[:2])
+        if not os.path.isdir(pasta):
+            return None
+        for nome in os.listdir(pasta):
+            if nome.startswith(f"{sha256}."):
+                return os.path.join(pasta, nome)
+        return None
+
+    # -----------------------------------------
+    # Download
+    # -----------------------------------------
+
+    def _buscar_indice(self, url: str) -> Optional[dict]:
+        with self._db_lock:
+            linha = self._db.execute(
+                "SELECT sha256, content_type, tamanho FROM urls WHERE url = ?", (url,)
+            ).fetchone()
+        if not linha:
+            return None
+        sha256, content_type, tamanho = linha
+        extensao = EXTENSOES.get(content_type, "bin")
+        if not os.path.exists(self.caminho_objeto(sha256, extensao)):
+            return None
+        return {"sha256": sha256, "content_type": content_type, "tamanho": tamanho, "extensao": extensao}
+
+    async def obter(self, url: str) -> Optional[dict]:
+        """
+        Garante a imagem no cache.
+
+        Returns:
+            Dict com sha256, content_type, tamanho, extensao, ou None se falhar
+        """
+        if not url or not url.startswith("http"):
+            return None
+
+        existente = self._buscar_indice(url)
+        if existente:
+            return existente
+
+        # Mesma URL pedida em paralelo: um único download
+        # (shield: quem desiste de esperar não cancela o download dos outros)
+        if url in self._em_andamento:
+            return await asyncio.shield(self._em_andamento[url])
+
+        futuro = asyncio.get_running_loop().create_future()
+        self._em_andamento[url] = futuro
+        try:
+            resultado = await self._baixar(url)
+            futuro.set_result(resultado)
+            return resultado
+        except Exception as e:
+            print(f"⚠️ Falha ao baixar imagem {url[:60]}: {e}")
+            futuro.set_result(None)
+            return None
+        finally:
+            # Cancelado no meio (prazo do produto): libera quem espera a mesma URL
+            if not futuro.done():
+                futuro.set_result(None)
+            self._em_andamento.pop(url, None)
+
+    async def _baixar(self, url: str) -> dict:
+        async with self._semaforo:
+            resposta = await self._cliente().get(url)
+            resposta.raise_for_status()
+            conteudo = resposta.content
+
+        content_type = resposta.headers.get("content-type", "").split(";")[0].strip().lower()
+        extensao = EXTENSOES.get(content_type, "bin")
+        sha256 = hashlib.sha256(conteudo).hexdigest()
+        caminho = self.caminho_objeto(sha256, extensao)
+
+        # Dedupe: só grava se o conteúdo ainda não existe
+        if not os.path.exists(caminho):
+            os.makedirs(os.path.dirname(caminho), exist_ok=True)
+            tmp = f"{caminho}.tmp"
+            with open(tmp, 'wb') as f:
+                f.write(conteudo)
+            os.replace(tmp, caminho)
+
+        with self._db_lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO urls (url, sha256, content_type, tamanho, baixado_em) VALUES (?, ?, ?, ?, ?)",
+                (url, sha256, content_type, len(conteudo), datetime.now().isoformat()),
+            )
+            self._db.commit()
+
+        return {"sha256": sha256, "content_type": content_type, "tamanho": len(conteudo), "extensao": extensao}
+
+    async def obter_varios(self, urls: list[str]) -> dict[str, Optional[dict]]:
+        """Baixa várias URLs em paralelo (limitado por max_conexoes)"""
+        unicas = list(dict.fromkeys(u for u in urls if u))
+        resultados = await asyncio.gather(*(self.obter(u) for u in unicas))
+        return dict(zip(unicas, resultados))
+
+    # -----------------------------------------
+    # Variantes
+    # -----------------------------------------
+
+    def variante(self, sha256: str, largura: int, formato: str = "webp") -> Optional[str]:
+        """
+        Caminho de uma variante redimensionada (gerada na primeira chamada).
+
+        Raises:
+            RuntimeError: se Pillow não estiver instalado
+            ValueError: largura/formato fora dos permitidos
+        """
+        if Image is None:
+            raise RuntimeError("Variantes de imagem requerem o pacote 'Pillow' (pip install Pillow)")
+        if largura not in LARGURAS_VARIANTES or formato not in FORMATOS_VARIANTES:
+            raise ValueError(f"Variante invalida. Larguras: {LARGURAS_VARIANTES}, formatos: {FORMATOS_VARIANTES}")
+
+        destino = os.path.join(self.diretorio, "variantes", f"{sha256}_w{largura}.{formato}")
+        if os.path.exists(destino):
+            return destino
+
+        original = self.localizar(sha256)
+        if not original:
+            return None
+
+        with Image.open(original) as img:
+            img = img.convert("RGB")
+            if img.width > largura:
+                altura = round(img.height * largura / img.width)
+                img = img.resize((largura, altura), Image.LANCZOS)
+            tmp = f"{destino}.tmp"
+            img.save(tmp, format="WEBP" if formato == "webp" else "JPEG", quality=85)
+        os.replace(tmp, destino)
+        return destino
+
+
+def referencia_local(info: Optional[dict]) -> Optional[str]:
+    """Caminho da rota da API que serve a imagem em cache"""
+    if not info:
+        return None
+    return f"/imagens/{info['sha256']}.{info['extensao']}"
@@ -0,0 +1,107 @@
+"""
+Cache dos links de afiliado por produto e etiqueta (SQLite)
+
+Gerar o link custa uma visita à página do produto e o modal Compartilhar.
+O link de um produto não muda para a mesma etiqueta, então todo produto
+que sai com link (scraping, lote, monitor) é guardado aqui pela chave
+canônica (ver identidade_produto.py). Um pedido do mesmo produto depois
+sai direto do cache. Quando a chave de um produto muda (ganhou ID de
+catálogo), as linhas da chave antiga passam para a nova (migrar_chaves).
+
+Preço e estoque mudam: quem consulta decide a idade máxima aceitável
+(max_idade_s); acima dela o produto é visitado de novo.
+"""
+
+import json
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+
+class CacheLinks:
+    """Último produto com link, por (chave do produto, etiqueta)"""
+
+    def __init__(self, arquivo: str):
+        self.arquivo = arquivo
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(arquivo, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS links (
+                chave TEXT NOT NULL,
+                etiqueta TEXT NOT NULL,
+                ts INTEGER NOT NULL,
+                produto TEXT NOT NULL,
+                PRIMARY KEY (chave, etiqueta)
+            ) WITHOUT ROWID;
+        """)
+        self._db.commit()
+        self.acertos = 0
+        self.faltas = 0
+
+    def fechar(self):
+        with self._lock:
+            self._db.close()
+
+    def guardar(self, produto: dict, ts: Optional[int] = None) -> bool:
+        """
+        Guarda o produto se ele tem link de afiliado.
+
+        Returns:
+            False se faltou chave, etiqueta ou link
+        """
+        chave, etiqueta = produto.get("chave"), produto.get("etiqueta")
+        if not chave or not etiqueta or not produto.get("url_curta"):
+            return False
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO links (chave, etiqueta, ts, produto) VALUES (?, ?, ?, ?)",
+                (chave, etiqueta, int(ts or time.time()), json.dumps(produto, ensure_ascii=False)),
+            )
+            self._db.commit()
+        return True
+
+    def guardar_varios(self, produtos: list[dict]) -> int:
+        return sum(1 for p in produtos if self.guardar(p))
+
+    def migrar_chaves(self, antigas: list[str], nova: str):
+        """
+        Move os produtos guardados nas chaves antigas para a nova (ver
+        RegistroIdentidades.ao_mudar_chave). Por etiqueta, o mais recente vence.
+        """
+        marcadores = ",".join("?" * len(antigas))
+        with self._lock:
+            self._db.execute(
+                f"""
+                INSERT OR REPLACE INTO links (chave, etiqueta, ts, produto)
+                SELECT ?, etiqueta, ts, json_set(produto, '$.chave', ?) FROM links AS antigo
+                WHERE chave IN ({marcadores})
+                  AND ts > COALESCE((SELECT ts FROM links WHERE chave = ? AND etiqueta = antigo.etiqueta), -1)
+                ORDER BY ts
+                """,
+                (nova, nova, *antigas, nova),
+            )
+            self._db.execute(f"DELETE FROM links WHERE chave IN ({marcadores})", antigas)
+            self._db.commit()
+
+    def obter(self, chave: str, etiqueta: str, max_idade_s: Optional[float] = None) -> Optional[dict]:
+        """Produto em cache (com `cache_idade_s`), ou None se ausente ou mais velho que max_idade_s"""
+        with self._lock:
+            linha = self._db.execute(
+                "SELECT ts, produto FROM links WHERE chave = ? AND etiqueta = ?", (chave, etiqueta)
+            ).fetchone()
+        idade = time.time() - linha[0] if linha else None
+        if linha is None or (max_idade_s is not None and idade > max_idade_s):
+            self.faltas += 1
+            return None
+        self.acertos += 1
+        produto = json.loads(linha[1])
+        produto["cache_idade_s"] = round(idade)
+        return produto
+
+    def resumo(self) -> dict:
+        with self._lock:
+            (total,) = self._db.execute("SELECT COUNT(*) FROM links").fetchone()
+        return {"produtos": total, "acertos": self.acertos, "faltas": self.faltas}
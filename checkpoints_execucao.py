@@ -0,0 +1,197 @@
+"""
+Checkpoints de execução do scraper
+
+Cada execução (run_id) tem dois arquivos no diretório de checkpoints:
+- {run_id}.json     metadados + lista de links coletados (reescrito raramente)
+- {run_id}.jsonl    produtos concluídos, um por linha (append após cada produto)
+
+Se o container reiniciar ou o browser cair no meio de scrape_ofertas,
+a execução pode ser retomada: os links já coletados e os produtos já
+concluídos são reaproveitados e só a fila pendente é processada.
+"""
+
+import json
+import os
+import threading
+import time
+import uuid
+from datetime import datetime
+from typing import Optional
+
+
+# Status que encerram um produto; os demais (erro, timeout) são refeitos no resume
+STATUS_FINAIS = ("sucesso", "sem_link")
+
+# run_id vindo do cliente vira nome de arquivo: só letras, dígitos, _ e -
+PADRAO_RUN_ID = r"^[A-Za-z0-9_-]{1,64}$"
+
+
+def caminho_contido(diretorio: str, nome: str) -> str:
+    """
+    Caminho de `nome` dentro de `diretorio`, já resolvido.
+
+    Raises:
+        ValueError: se o caminho resolvido escapa do diretório (ex: '../', '/')
+    """
+    base = os.path.realpath(diretorio)
+    caminho = os.path.realpath(os.path.join(base, nome))
+    if os.path.dirname(caminho) != base:
+        raise ValueError(f"Nome de arquivo invalido: {nome!r}")
+    return caminho
+
+
+class CheckpointStore:
+    """Armazena o estado das execuções em disco local"""
+
+    def __init__(self, diretorio: str):
+        self.diretorio = diretorio
+        self._lock = threading.Lock()
+        os.makedirs(self.diretorio, exist_ok=True)
+
+    @staticmethod
+    def novo_run_id() -> str:
+        return f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:6]}"
+
+    def _meta_path(self, run_id: str) -> str:
+        return caminho_contido(self.diretorio, f"{run_id}.json")
+
+    def _produtos_path(self, run_id: str) -> str:
+        return caminho_contido(self.diretorio, f"{run_id}.jsonl")
+
+    def _ler_meta(self, run_id: str) -> Optional[dict]:
+        try:
+            with open(self._meta_path(run_id), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def _gravar_meta(self, meta: dict):
+        meta["atualizado_em"] = datetime.now().isoformat()
+        caminho = self._meta_path(meta["run_id"])
+        tmp = f"{caminho}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False)
+        os.replace(tmp, caminho)
+
+    # -----------------------------------------
+    # Escrita
+    # -----------------------------------------
+
+    def iniciar(
+        self,
+        run_id: str,
+        url: Optional[str],
+        max_produtos: Optional[int],
+        pedido: Optional[dict] = None
+    ) -> dict:
+        """
+        Cria o checkpoint da execução (ou devolve o existente)
+
+        Args:
+            pedido: Parâmetros completos da execução (conta, filtros, prazos...),
+                usados para retomá-la com as mesmas opções
+        """
+        with self._lock:
+            meta = self._ler_meta(run_id)
+            if meta is None:
+                meta = {
+                    "run_id": run_id,
+                    "url": url,
+                    "max_produtos": max_produtos,
+                    "pedido": pedido,
+                    "links": None,
+                    "status": "em_andamento",
+                    "criado_em": datetime.now().isoformat(),
+                }
+            else:
+                meta["status"] = "em_andamento"
+                if pedido is not None:
+                    meta["pedido"] = pedido
+            self._gravar_meta(meta)
+            return meta
+
+    def salvar_links(self, run_id: str, links: list[str]):
+        """Registra a lista de links coletada na página de ofertas"""
+        with self._lock:
+            meta = self._ler_meta(run_id) or {"run_id": run_id}
+            meta["links"] = links
+            self._gravar_meta(meta)
+
+    def registrar_produto(self, run_id: str, produto: dict):
+        """Acrescenta um produto processado (append + fsync)"""
+        with self._lock:
+            with open(self._produtos_path(run_id), 'a', encoding='utf-8') as f:
+                f.write(json.dumps(produto, ensure_ascii=False) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+
+    def finalizar(self, run_id: str, status: str = "concluido"):
+        """Marca a execução como encerrada"""
+        with self._lock:
+            meta = self._ler_meta(run_id)
+            if meta:
+                meta["status"] = status
+                self._gravar_meta(meta)
+
+    # -----------------------------------------
+    # Leitura
+    # -----------------------------------------
+
+    def carregar(self, run_id: str) -> Optional[dict]:
+        """
+        Estado da execução.
+
+        Returns:
+            Dict com metadados, `concluidos` (produtos finais, na ordem dos
+            links) e `pendentes` (links ainda não concluídos), ou None
+        """
+        meta = self._ler_meta(run_id)
+        if meta is None:
+            return None
+
+        # Último registro de cada URL vence
+        ultimos: dict[str, dict] = {}
+        try:
+            with open(self._produtos_path(run_id), 'r', encoding='utf-8') as f:
+                for linha in f:
+                    try:
+                        produto = json.loads(linha)
+                    except json.JSONDecodeError:
+                        continue  # linha truncada por crash
+                    ultimos[produto.get("url_original")] = produto
+        except FileNotFoundError:
+            pass
+
+        links = meta.get("links") or []
+        concluidos = [ultimos[l] for l in links if l in ultimos and ultimos[l].get("status") in STATUS_FINAIS]
+        pendentes = [l for l in links if not (l in ultimos and ultimos[l].get("status") in STATUS_FINAIS)]
+
+        return {**meta, "concluidos": concluidos, "pendentes": pendentes}
+
+    def listar(self) -> list[dict]:
+        """Metadados de todas as execuções, mais recentes primeiro"""
+        execucoes = []
+        for nome in os.listdir(self.diretorio):
+            if nome.endswith(".json"):
+                meta = self._ler_meta(nome[:-5])
+                if meta:
+                    execucoes.append({k: v for k, v in meta.items() if k != "links"})
+        return sorted(execucoes, key=lambda m: m.get("criado_em", ""), reverse=True)
+
+    def ultimo_incompleto(self) -> Optional[str]:
+        """run_id da execução mais recente que não foi concluída"""
+        for meta in self.listar():
+            if meta.get("status") != "concluido":
+                return meta["run_id"]
+        return None
+
+    def limpar(self, max_idade_dias: float = 7):
+        """Remove checkpoints mais antigos que max_idade_dias"""
+        limite = time.time() - max_idade_dias * 86400
+        for nome in os.listdir(self.diretorio):
+            caminho = os.path.join(self.diretorio, nome)
+            try:
+                if os.path.getmtime(caminho) < limite:
+                    os.remove(caminho)
+            except OSError:
+                pass
@@ -0,0 +1,220 @@
+"""
+Contas de afiliado (etiquetas) e seus browsers
+
+Cada etiqueta de afiliado tem o próprio perfil do Chromium (sessão logada),
+o próprio controle de ritmo (AIMD com teto por conta) e o próprio browser
+aquecido. Assim cada etiqueta gera os seus links, e um lote grande pode ser
+dividido entre contas rodando em paralelo.
+
+Registro em {data_dir}/contas.json (opcional):
+    [
+        {"etiqueta": "egnofertas", "perfil": "/app/ml_browser_data", "padrao": true},
+        {"etiqueta": "outraetiqueta", "perfil": "/app/ml_browser_data_outra", "taxa_max": 0.5}
+    ]
+
+Sem o arquivo, existe uma única conta (etiqueta e perfil padrão).
+"""
+
+import asyncio
+import json
+import os
+from dataclasses import dataclass, field
+from typing import Optional
+
+from scraper_ml_afiliado import ScraperMLAfiliado
+from pacing_aimd import ControladorTaxa
+from identidade_produto import RegistroIdentidades
+from cache_estaticos import CacheEstaticos
+
+
+class PerfilOcupado(Exception):
+    """O perfil da conta está em uso exclusivo (ex: monitor relâmpago)"""
+
+
+@dataclass
+class ContaAfiliado:
+    etiqueta: str
+    perfil: str  # user_data_dir do Chromium
+    taxa_max: float = 1.0  # teto de navegações/s desta conta
+    padrao: bool = False
+    pacing: ControladorTaxa = field(init=False, repr=False)
+
+    def __post_init__(self):
+        self.pacing = ControladorTaxa(taxa_inicial=min(0.4, self.taxa_max), taxa_max=self.taxa_max)
+
+
+class RegistroContas:
+    """Contas configuradas, por etiqueta"""
+
+    def __init__(self, arquivo: str, perfil_padrao: str, etiqueta_padrao: str = "egnofertas"):
+        self.arquivo = arquivo
+        self._contas: dict[str, ContaAfiliado] = {}
+
+        configuradas = []
+        if os.path.exists(arquivo):
+            with open(arquivo, 'r', encoding='utf-8') as f:
+                configuradas = json.load(f)
+        for item in configuradas:
+            conta = ContaAfiliado(
+                etiqueta=item["etiqueta"],
+                perfil=item["perfil"],
+                taxa_max=item.get("taxa_max", 1.0),
+                padrao=item.get("padrao", False),
+            )
+            self._contas[conta.etiqueta] = conta
+
+        if not self._contas:
+            self._contas[etiqueta_padrao] = ContaAfiliado(etiqueta_padrao, perfil_padrao, padrao=True)
+
+        perfis = [c.perfil for c in self._contas.values()]
+        if len(set(perfis)) != len(perfis):
+            raise ValueError(f"Cada conta precisa de um perfil proprio ({arquivo})")
+
+    @property
+    def padrao(self) -> ContaAfiliado:
+        return next((c for c in self._contas.values() if c.padrao), next(iter(self._contas.values())))
+
+    def obter(self, etiqueta: Optional[str] = None) -> ContaAfiliado:
+        """
+        Conta pela etiqueta (None = conta padrão).
+
+        Raises:
+            KeyError: etiqueta não cadastrada
+        """
+        if etiqueta is None:
+            return self.padrao
+        return self._contas[etiqueta]
+
+    def todas(self) -> list[ContaAfiliado]:
+        return list(self._contas.values())
+
+
+class SessaoConta:
+    """
+    Browser aquecido de uma conta, reaproveitado entre execuções.
+
+    Cada execução reserva o browser principal ou, se ele estiver ocupado,
+    uma aba na mesma sessão (abrir_aba). O lock protege só
+    abrir/fechar/reservar, não a execução inteira.
+    """
+
+    def __init__(
+        self,
+        conta: ContaAfiliado,
+        data_dir: str,
+        identidades: Optional[RegistroIdentidades] = None,
+        cache_estaticos: Optional[CacheEstaticos] = None
+    ):
+        self.conta = conta
+        self.data_dir = data_dir
+        self.identidades = identidades  # compartilhado entre contas (mesmos produtos)
+        self.cache_estaticos = cache_estaticos  # idem (mesmos JS/CSS do ML)
+        self.scraper: Optional[ScraperMLAfiliado] = None
+        self.lock = asyncio.Lock()
+        self.em_uso: set[ScraperMLAfiliado] = set()
+        self.abas_livres: list[ScraperMLAfiliado] = []
+        self.bloqueio: Optional[str] = None  # motivo do uso exclusivo do perfil
+
+    @property
+    def browser_ativo(self) -> bool:
+        return bool(self.scraper and self.scraper.browser_ativo)
+
+    def novo_scraper(self, headless: bool = True, **kwargs) -> ScraperMLAfiliado:
+        """Scraper configurado para esta conta (perfil, etiqueta e ritmo próprios)"""
+        return ScraperMLAfiliado(
+            headless=headless,
+            wait_ms=1500,
+            etiqueta=self.conta.etiqueta,
+            user_data_dir=self.conta.perfil,
+            data_dir=self.data_dir,
+            pacing=self.conta.pacing,
+            identidades=self.identidades,
+            cache_estaticos=self.cache_estaticos,
+            **kwargs
+        )
+
+    async def reservar(self, headless: bool = True) -> ScraperMLAfiliado:
+        """
+        Scraper exclusivo para uma execução. Devolver com liberar().
+
+        O modo headless pedido só é garantido com a conta livre: com o
+        browser em uso por outra execução, a reserva vira uma aba dele, no
+        modo em que ele está (o perfil só aceita um browser). O fallback é
+        logado e o modo real fica em scraper.headless.
+
+        Raises:
+            PerfilOcupado: perfil em uso exclusivo (ver bloqueio)
+        """
+        async with self.lock:
+            if self.bloqueio:
+                raise PerfilOcupado(self.bloqueio)
+            principal = self.scraper
+            # headless diferente só troca o browser se ninguém estiver usando
+            if not self.browser_ativo or (principal.headless != headless and not self.em_uso):
+                await self._descartar()
+                principal = self.scraper = self.novo_scraper(headless)
+                await principal._init_browser()
+
+            if principal not in self.em_uso:
+                scraper = principal
+            elif self.abas_livres:
+                scraper = self.abas_livres.pop()
+            else:
+                scraper = await principal.abrir_aba()
+            if scraper.headless != headless:
+                print(
+                    f"⚠️ Conta {self.conta.etiqueta}: pedido headless={headless}, mas o browser "
+                    f"em uso está com headless={scraper.headless}; usando uma aba dele"
+                )
+            self.em_uso.add(scraper)
+            return scraper
+
+    async def liberar(self, scraper: ScraperMLAfiliado, descartar: bool = False):
+        """Devolve o scraper reservado; descartar=True após erro (estado desconhecido)"""
+        async with self.lock:
+            self.em_uso.discard(scraper)
+            if scraper is self.scraper:
+                # O browser principal só fecha se nenhuma aba estiver em uso
+                if descartar and not self.em_uso:
+                    await self._descartar()
+                return
+            mesma_sessao = self.scraper is not None and scraper.context is self.scraper.context
+            if descartar or not mesma_sessao or not scraper.browser_ativo:
+                try:
+                    await scraper._close_browser()
+                except Exception:
+                    pass
+            else:
+                self.abas_livres.append(scraper)
+
+    async def tomar_perfil(self, motivo: str):
+        """
+        Fecha o browser da conta e bloqueia novas reservas até devolver_perfil().
+
+        Raises:
+            PerfilOcupado: há execuções usando a conta
+        """
+        async with self.lock:
+            if self.bloqueio:
+                raise PerfilOcupado(self.bloqueio)
+            if self.em_uso:
+                raise PerfilOcupado("Scraping em andamento nesta conta")
+            await self._descartar()
+            self.bloqueio = motivo
+
+    def devolver_perfil(self):
+        self.bloqueio = None
+
+    async def descartar(self):
+        """Fecha o browser e as abas da conta"""
+        async with self.lock:
+            await self._descartar()
+
+    async def _descartar(self):
+        self.abas_livres.clear()
+        if self.scraper:
+            try:
+                await self.scraper._close_browser()
+            except Exception:
+                pass
+            self.scraper = None
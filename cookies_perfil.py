@@ -0,0 +1,167 @@
+"""
+Validade real da sessão do Mercado Livre, lida do perfil do Chromium
+
+O login_local gravava uma estimativa fixa (login + 7 dias). Aqui a
+validade vem dos próprios cookies: o banco SQLite do perfil
+(Default/Network/Cookies) guarda, por cookie, domínio, criação e
+expiração. Os valores são criptografados, mas não são necessários.
+
+Sem abrir o browser e sem travar o Chromium: o banco e os arquivos do WAL
+(-wal/-shm, onde ficam as gravações recentes) são copiados para um
+diretório temporário e lidos de lá. O resultado fica em cache até o banco
+ou o WAL mudarem (mtime/tamanho).
+
+Uso:
+    sessao = inspecionar_perfil("/app/ml_browser_data")
+    sessao["logado"], sessao["expira_em"], sessao["dias_restantes"]
+"""
+
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Optional
+
+
+# Banco de cookies do perfil (Chromium novo, depois o antigo)
+ARQUIVOS_COOKIES = ("Default/Network/Cookies", "Default/Cookies")
+
+# Domínios do login (o cookie é gravado como ".mercadolivre.com.br" etc.)
+DOMINIOS_ML = ("mercadolivre.com.br", "mercadolibre.com")
+
+# Cookies que só existem com a conta logada; a sessão vale até o primeiro expirar
+COOKIES_SESSAO = ("ssid", "orguseridp", "orgnickp")
+
+# Arquivos do WAL copiados junto com o banco
+SUFIXOS_WAL = ("-wal", "-shm")
+
+# Tempos do Chromium: microssegundos desde 1601-01-01 UTC
+_EPOCA_CHROMIUM = datetime(1601, 1, 1, tzinfo=timezone.utc)
+
+_cache: dict[str, tuple[tuple, dict]] = {}
+_lock = threading.Lock()
+
+
+def _de_chromium(microssegundos: int) -> Optional[datetime]:
+    if not microssegundos:
+        return None
+    return (_EPOCA_CHROMIUM + timedelta(microseconds=microssegundos)).astimezone().replace(tzinfo=None)
+
+
+def arquivo_cookies(perfil: str) -> Optional[str]:
+    """Caminho do banco de cookies do perfil (None se não houver)"""
+    for relativo in ARQUIVOS_COOKIES:
+        caminho = os.path.join(perfil, relativo)
+        if os.path.exists(caminho):
+            return caminho
+    return None
+
+
+def _versao(caminho: str) -> tuple:
+    """(mtime, tamanho) do banco e dos arquivos do WAL: muda a cada gravação do Chromium"""
+    versao = []
+    for arquivo in (caminho, *(caminho + sufixo for sufixo in SUFIXOS_WAL)):
+        try:
+            estado = os.stat(arquivo)
+        except FileNotFoundError:
+            versao.append(None)
+            continue
+        versao.append((estado.st_mtime_ns, estado.st_size))
+    return tuple(versao)
+
+
+def _ler_cookies(caminho: str) -> list[dict]:
+    """
+    Cookies de sessão do ML no banco (sem os valores).
+
+    Lê uma cópia (banco + WAL): abrir o original com immutable=1 ignoraria
+    o WAL e leria cookies velhos; sem immutable, a leitura disputaria os
+    locks com o Chromium.
+    """
+    with tempfile.TemporaryDirectory(prefix="cookies_perfil_") as tmp:
+        copia = os.path.join(tmp, "Cookies")
+        shutil.copyfile(caminho, copia)
+        for sufixo in SUFIXOS_WAL:
+            try:
+                shutil.copyfile(caminho + sufixo, copia + sufixo)
+            except FileNotFoundError:
+                pass
+        return _consultar(copia)
+
+
+def _consultar(caminho: str) -> list[dict]:
+    db = sqlite3.connect(Path(caminho).resolve().as_uri(), uri=True)
+    try:
+        filtro_dominio = " OR ".join("host_key LIKE ?" for _ in DOMINIOS_ML)
+        marcadores = ",".join("?" * len(COOKIES_SESSAO))
+        linhas = db.execute(
+            f"SELECT name, host_key, creation_utc, expires_utc, has_expires FROM cookies "
+            f"WHERE name IN ({marcadores}) AND ({filtro_dominio})",
+            [*COOKIES_SESSAO, *(f"%{dominio}" for dominio in DOMINIOS_ML)],
+        ).fetchall()
+    finally:
+        db.close()
+    return [
+        {
+            "nome": nome,
+            "dominio": dominio,
+            "criado_em": _de_chromium(criacao),
+            # has_expires=0: cookie de sessão do browser (sem data de expiração)
+            "expira_em": _de_chromium(expira) if tem_expiracao else None,
+        }
+        for nome, dominio, criacao, expira, tem_expiracao in linhas
+    ]
+
+
+def _resumir(caminho: Optional[str], cookies: list[dict], erro: Optional[str] = None) -> dict:
+    agora = datetime.now()
+    expiracoes = [c["expira_em"] for c in cookies if c["expira_em"]]
+    criacoes = [c["criado_em"] for c in cookies if c["criado_em"]]
+    expira_em = min(expiracoes) if expiracoes else None
+    login_em = max(criacoes) if criacoes else None
+    return {
+        "arquivo": caminho,
+        "cookies_exist": caminho is not None,
+        "sessao_encontrada": bool(cookies),
+        "logado": bool(cookies) and (expira_em is None or expira_em > agora),
+        "login_em": login_em,
+        "expira_em": expira_em,
+        "dias_restantes": (expira_em - agora).days if expira_em else None,
+        "cookies": sorted({c["nome"] for c in cookies}),
+        "erro": erro,
+    }
+
+
+def inspecionar_perfil(perfil: str) -> dict:
+    """
+    Sessão do ML no perfil: logado, login_em, expira_em, dias_restantes.
+
+    `expira_em` é a expiração mais próxima entre os cookies de sessão;
+    None com a sessão encontrada = cookies sem data (duram até o logout).
+    """
+    caminho = arquivo_cookies(perfil)
+    if caminho is None:
+        return _resumir(None, [])
+
+    try:
+        versao = _versao(caminho)
+    except OSError as e:
+        return _resumir(None, [], erro=str(e))
+
+    with _lock:
+        em_cache = _cache.get(caminho)
+    if em_cache and em_cache[0] == versao:
+        cookies = em_cache[1]
+    else:
+        try:
+            cookies = _ler_cookies(caminho)
+        except (sqlite3.Error, OSError) as e:
+            return _resumir(caminho, [], erro=f"Banco de cookies ilegivel: {e}")
+        with _lock:
+            _cache[caminho] = (versao, cookies)
+
+    # O resumo é refeito a cada chamada: dias_restantes/logado dependem da hora atual
+    return _resumir(caminho, cookies)
@@ -0,0 +1,194 @@
+"""
+Histórico de preços (série temporal local em SQLite)
+
+Cada observação (mlb_id, preço atual, preço original, desconto, timestamp)
+vai para a tabela `observacoes`, uma tabela WITHOUT ROWID com chave
+(mlb_id, ts). As linhas de um produto ficam juntas e em ordem de tempo, então
+histórico e mínimo são leituras de faixa no índice. Um índice em ts atende as
+consultas por janela ("caiu X% nas últimas N horas"), e a tabela `produtos`
+guarda o último preço e o mínimo histórico de cada item, atualizados a cada
+observação.
+"""
+
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from typing import Optional
+
+
+class HistoricoPrecos:
+    """Série temporal de preços por MLB ID"""
+
+    def __init__(self, arquivo: str):
+        self.arquivo = arquivo
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(arquivo, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS observacoes (
+                mlb_id TEXT NOT NULL,
+                ts INTEGER NOT NULL,
+                preco_atual REAL NOT NULL,
+                preco_original REAL,
+                desconto INTEGER,
+                PRIMARY KEY (mlb_id, ts)
+            ) WITHOUT ROWID;
+
+            CREATE INDEX IF NOT EXISTS idx_observacoes_ts ON observacoes (ts);
+
+            CREATE TABLE IF NOT EXISTS produtos (
+                mlb_id TEXT PRIMARY KEY,
+                nome TEXT,
+                url_curta TEXT,
+                primeiro_ts INTEGER,
+                ultimo_ts INTEGER,
+                ultimo_preco REAL,
+                minimo REAL,
+                minimo_ts INTEGER,
+                observacoes INTEGER DEFAULT 0
+            );
+        """)
+        self._db.commit()
+
+    def fechar(self):
+        with self._lock:
+            self._db.close()
+
+    # -----------------------------------------
+    # Escrita
+    # -----------------------------------------
+
+    def registrar(self, produto: dict, ts: Optional[int] = None) -> bool:
+        """
+        Registra uma observação de preço do produto.
+
+        Returns:
+            False se o produto não tem mlb_id ou preco_atual
+        """
+        mlb_id = produto.get("mlb_id")
+        preco = produto.get("preco_atual")
+        if not mlb_id or preco is None:
+            return False
+        ts = int(ts or time.time())
+
+        with self._lock:
+            # Mesmo produto duas vezes no mesmo segundo: a última observação
+            # substitui a anterior e não conta como observação nova
+            nova = self._db.execute(
+                "INSERT OR IGNORE INTO observacoes (mlb_id, ts, preco_atual, preco_original, desconto) VALUES (?, ?, ?, ?, ?)",
+                (mlb_id, ts, preco, produto.get("preco_original"), produto.get("desconto")),
+            ).rowcount == 1
+            if not nova:
+                self._db.execute(
+                    "UPDATE observacoes SET preco_atual = ?, preco_original = ?, desconto = ? WHERE mlb_id = ? AND ts = ?",
+                    (preco, produto.get("preco_original"), produto.get("desconto"), mlb_id, ts),
+                )
+            self._db.execute("""
+                INSERT INTO produtos (mlb_id, nome, url_curta, primeiro_ts, ultimo_ts, ultimo_preco, minimo, minimo_ts, observacoes)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (mlb_id) DO UPDATE SET
+                    nome = COALESCE(excluded.nome, nome),
+                    url_curta = COALESCE(excluded.url_curta, url_curta),
+                    primeiro_ts = MIN(primeiro_ts, excluded.primeiro_ts),
+                    ultimo_ts = MAX(ultimo_ts, excluded.ultimo_ts),
+                    ultimo_preco = CASE WHEN excluded.ultimo_ts >= ultimo_ts THEN excluded.ultimo_preco ELSE ultimo_preco END,
+                    minimo_ts = CASE WHEN excluded.minimo < minimo THEN excluded.minimo_ts ELSE minimo_ts END,
+                    minimo = MIN(minimo, excluded.minimo),
+                    observacoes = observacoes + excluded.observacoes
+            """, (mlb_id, produto.get("nome"), produto.get("url_curta"), ts, ts, preco, preco, ts, int(nova)))
+            self._db.commit()
+        return True
+
+    def registrar_varios(self, produtos: list[dict], ts: Optional[int] = None) -> int:
+        """Registra vários produtos com o mesmo timestamp; retorna quantos entraram"""
+        return sum(1 for p in produtos if self.registrar(p, ts))
+
+    # -----------------------------------------
+    # Consultas
+    # -----------------------------------------
+
+    @staticmethod
+    def _iso(ts: Optional[int]) -> Optional[str]:
+        return datetime.fromtimestamp(ts).isoformat() if ts is not None else None
+
+    def historico(self, mlb_id: str, desde_ts: Optional[int] = None, limite: int = 500) -> list[dict]:
+        """Observações do produto, mais recentes primeiro"""
+        with self._lock:
+            linhas = self._db.execute(
+                """
+                SELECT ts, preco_atual, preco_original, desconto FROM observacoes
+                WHERE mlb_id = ? AND ts >= ?
+                ORDER BY ts DESC LIMIT ?
+                """,
+                (mlb_id, desde_ts or 0, limite),
+            ).fetchall()
+        return [
+            {"quando": self._iso(ts), "preco_atual": atual, "preco_original": original, "desconto": desconto}
+            for ts, atual, original, desconto in linhas
+        ]
+
+    def resumo(self, mlb_id: str) -> Optional[dict]:
+        """Último preço e mínimo histórico do produto"""
+        with self._lock:
+            linha = self._db.execute(
+                """
+                SELECT nome, url_curta, primeiro_ts, ultimo_ts, ultimo_preco, minimo, minimo_ts, observacoes
+                FROM produtos WHERE mlb_id = ?
+                """,
+                (mlb_id,),
+            ).fetchone()
+        if not linha:
+            return None
+        nome, url_curta, primeiro_ts, ultimo_ts, ultimo_preco, minimo, minimo_ts, observacoes = linha
+        return {
+            "mlb_id": mlb_id,
+            "nome": nome,
+            "url_curta": url_curta,
+            "primeira_observacao": self._iso(primeiro_ts),
+            "ultima_observacao": self._iso(ultimo_ts),
+            "ultimo_preco": ultimo_preco,
+            "minimo_historico": minimo,
+            "minimo_em": self._iso(minimo_ts),
+            "no_minimo": ultimo_preco is not None and minimo is not None and ultimo_preco <= minimo,
+            "observacoes": observacoes,
+        }
+
+    def quedas(self, percentual: float, horas: float, limite: int = 100) -> list[dict]:
+        """
+        Produtos cujo preço atual caiu pelo menos `percentual`% em relação
+        ao maior preço observado nas últimas `horas`.
+        """
+        desde = int(time.time() - horas * 3600)
+        with self._lock:
+            linhas = self._db.execute(
+                """
+                WITH janela AS (
+                    SELECT mlb_id, MAX(preco_atual) AS maximo
+                    FROM observacoes
+                    WHERE ts >= ?
+                    GROUP BY mlb_id
+                )
+                SELECT p.mlb_id, p.nome, p.url_curta, j.maximo, p.ultimo_preco, p.ultimo_ts, p.minimo
+                FROM janela j
+                JOIN produtos p ON p.mlb_id = j.mlb_id
+                WHERE j.maximo > 0 AND (j.maximo - p.ultimo_preco) * 100.0 / j.maximo >= ?
+                ORDER BY (j.maximo - p.ultimo_preco) / j.maximo DESC
+                LIMIT ?
+                """,
+                (desde, percentual, limite),
+            ).fetchall()
+        return [
+            {
+                "mlb_id": mlb_id,
+                "nome": nome,
+                "url_curta": url_curta,
+                "preco_maximo_janela": maximo,
+                "preco_atual": atual,
+                "queda_percentual": round((maximo - atual) * 100 / maximo, 1),
+                "minimo_historico": minimo,
+                "ultima_observacao": self._iso(ultimo_ts),
+            }
+            for mlb_id, nome, url_curta, maximo, atual, ultimo_ts, minimo in linhas
+        ]
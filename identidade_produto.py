@@ -0,0 +1,241 @@
+"""
+Identidade canônica dos produtos
+
+O mesmo produto aparece com URLs diferentes: página de catálogo
+(/p/MLB123), anúncio (produto.mercadolivre.com.br/MLB-456-...), página de
+"user product" (/up/MLBU789), variantes com ?attributes=, #wid=, tracking
+etc. Cada forma vira uma lista de IDs tipados:
+
+    p:MLB123     produto de catálogo
+    i:MLB456     anúncio (item)
+    u:MLBU789    user product
+
+IDs que se descobre serem do mesmo produto (catálogo + wid/item_id da URL,
+redirect do anúncio para o catálogo, item_id lido da página) são vinculados
+e persistidos em SQLite: a chave do produto é a mesma em todas as URLs dele,
+em todas as páginas de listagem e em todas as execuções.
+"""
+
+import re
+import sqlite3
+import threading
+from typing import Callable, Optional
+from urllib.parse import parse_qs, urlsplit, urlunsplit
+
+
+# Ordem de preferência da chave de um produto novo
+TIPOS = ("p", "i", "u")
+
+_RE_CATALOGO = re.compile(r'/p/(MLB\d+)', re.IGNORECASE)
+_RE_USER_PRODUCT = re.compile(r'/up/(MLBU\d+)', re.IGNORECASE)
+_RE_ITEM = re.compile(r'(?:^|/)(MLB)-?(\d{6,})(?:[-_/]|$)', re.IGNORECASE)
+_RE_ID_SOLTO = re.compile(r'\b(MLB)-?(\d{6,})\b', re.IGNORECASE)
+_RE_ENTRADA_ID = re.compile(r'(MLBU|MLB)-?(\d{6,})', re.IGNORECASE)
+# mercadolivre.com.br, produto.mercadolivre.com.br, mercadolibre.com.ar...
+_RE_HOST_ML = re.compile(r'(?:^|\.)mercadoli(?:vre|bre)\.com(?:\.[a-z]{2})?$')
+
+
+def url_canonica(url: str) -> str:
+    """URL sem query, hash e barra final (host em minúsculas, https)"""
+    partes = urlsplit(url.strip())
+    caminho = partes.path.rstrip('/') or '/'
+    return urlunsplit(("https", partes.netloc.lower(), caminho, "", ""))
+
+
+def url_mercadolivre(url: str) -> bool:
+    """URL http(s) de um domínio do Mercado Livre / Mercado Libre"""
+    partes = urlsplit(url.strip())
+    return partes.scheme in ("http", "https") and bool(_RE_HOST_ML.search((partes.hostname or "").lower()))
+
+
+def _normalizar_id(prefixo: str, numero: str) -> str:
+    return f"{prefixo.upper()}{numero}"
+
+
+def extrair_ids(url: str) -> list[str]:
+    """
+    IDs tipados que a URL revela, do mais específico da página para os extras.
+
+    Ex: https://www.mercadolivre.com.br/x/p/MLB123?pdp_filters=item_id:MLB456#wid=MLB456
+        -> ["p:MLB123", "i:MLB456"]
+    """
+    partes = urlsplit(url.strip())
+    caminho = partes.path
+    ids: list[str] = []
+
+    def adicionar(tipo_id: str):
+        if tipo_id not in ids:
+            ids.append(tipo_id)
+
+    catalogo = _RE_CATALOGO.search(caminho)
+    if catalogo:
+        adicionar(f"p:{catalogo.group(1).upper()}")
+    user_product = _RE_USER_PRODUCT.search(caminho)
+    if user_product:
+        adicionar(f"u:{user_product.group(1).upper()}")
+    if not catalogo and not user_product:
+        item = _RE_ITEM.search(caminho)
+        if item:
+            adicionar(f"i:{_normalizar_id(item.group(1), item.group(2))}")
+
+    # Anúncio vencedor/variante na query ou no hash (wid=, item_id=, pdp_filters=item_id:...)
+    extras = parse_qs(partes.query)
+    extras.update(parse_qs(partes.fragment))
+    for chave in ("wid", "item_id", "pdp_filters"):
+        for valor in extras.get(chave, []):
+            for prefixo, numero in _RE_ID_SOLTO.findall(valor):
+                adicionar(f"i:{_normalizar_id(prefixo, numero)}")
+    return ids
+
+
+def id_principal(url: str) -> Optional[str]:
+    """MLB ID da página que a URL abre (catálogo, anúncio ou user product), sem tipo"""
+    ids = extrair_ids(url)
+    return ids[0].split(":", 1)[1] if ids else None
+
+
+def url_de_id(mlb_id: str, catalogo: bool = False) -> Optional[str]:
+    """
+    URL da página de um MLB ID solto ("MLB123456", "MLB-123456", "MLBU789").
+
+    O formato não distingue catálogo de anúncio: catalogo=True monta /p/,
+    senão a página do anúncio (que redireciona ao catálogo quando houver).
+    """
+    encontrado = _RE_ENTRADA_ID.fullmatch(mlb_id.strip())
+    if not encontrado:
+        return None
+    prefixo, numero = encontrado.group(1).upper(), encontrado.group(2)
+    if prefixo == "MLBU":
+        return f"https://www.mercadolivre.com.br/up/MLBU{numero}"
+    if catalogo:
+        return f"https://www.mercadolivre.com.br/p/MLB{numero}"
+    return f"https://produto.mercadolivre.com.br/MLB-{numero}"
+
+
+class RegistroIdentidades:
+    """Vínculos entre IDs do mesmo produto (id tipado -> chave), em SQLite"""
+
+    def __init__(
+        self,
+        arquivo: str = ":memory:",
+        ao_mudar_chave: Optional[Callable[[list[str], str], None]] = None,
+    ):
+        """
+        Args:
+            ao_mudar_chave: Chamado com (chaves antigas, chave nova) quando grupos
+                se fundem, para quem guarda dados pela chave migrá-los (ex: CacheLinks)
+        """
+        self.arquivo = arquivo
+        self.ao_mudar_chave = ao_mudar_chave
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(arquivo, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS aliases (
+                id TEXT PRIMARY KEY,
+                chave TEXT NOT NULL
+            ) WITHOUT ROWID;
+
+            CREATE INDEX IF NOT EXISTS idx_aliases_chave ON aliases (chave);
+        """)
+        self._db.commit()
+
+    def fechar(self):
+        with self._lock:
+            self._db.close()
+
+    def _chaves_conhecidas(self, ids: list[str]) -> list[str]:
+        marcadores = ",".join("?" * len(ids))
+        return [
+            chave for (chave,) in
+            self._db.execute(f"SELECT DISTINCT chave FROM aliases WHERE id IN ({marcadores})", ids)
+        ]
+
+    def vincular(self, *ids: Optional[str]) -> Optional[str]:
+        """
+        Registra que os IDs tipados são do mesmo produto; retorna a chave.
+
+        Grupos já conhecidos são fundidos numa só chave, escolhida por
+        preferência (catálogo > anúncio > user product): a chave de um
+        produto só muda quando ele ganha um ID de catálogo.
+        """
+        ids = [i for i in dict.fromkeys(ids) if i]
+        if not ids:
+            return None
+        with self._lock:
+            conhecidas = self._chaves_conhecidas(ids)
+            # ID de catálogo novo também concorre: o produto conhecido passa a usá-lo
+            candidatas = [*conhecidas, *(i for i in ids if i.startswith("p:"))] if conhecidas else ids
+            chave = min(candidatas, key=lambda c: (TIPOS.index(c[0]) if c[0] in TIPOS else len(TIPOS), c))
+            outras = [c for c in conhecidas if c != chave]
+            if outras:
+                marcadores = ",".join("?" * len(outras))
+                self._db.execute(f"UPDATE aliases SET chave = ? WHERE chave IN ({marcadores})", [chave, *outras])
+            self._db.executemany(
+                "INSERT OR REPLACE INTO aliases (id, chave) VALUES (?, ?)",
+                [(i, chave) for i in ids],
+            )
+            self._db.commit()
+        if outras and self.ao_mudar_chave:
+            self.ao_mudar_chave(outras, chave)
+        return chave
+
+    def chave(self, url: str) -> str:
+        """
+        Chave estável do produto da URL.
+
+        IDs da mesma URL são vinculados entre si; URL sem ID reconhecível
+        usa a própria URL canônica como chave.
+        """
+        ids = extrair_ids(url)
+        if not ids:
+            return url_canonica(url)
+        if len(ids) > 1:
+            return self.vincular(*ids)
+        with self._lock:
+            linha = self._db.execute("SELECT chave FROM aliases WHERE id = ?", (ids[0],)).fetchone()
+        return linha[0] if linha else ids[0]
+
+    def url_produto(self, entrada: str) -> Optional[str]:
+        """
+        URL para visitar a partir de uma URL ou de um MLB ID solto (None se
+        não reconhecer). ID já visto como catálogo vira a página /p/.
+
+        Só aceita URLs do Mercado Livre que revelem um ID de produto: o
+        scraper não deve ser mandado para outros sites.
+        """
+        entrada = entrada.strip()
+        if entrada.lower().startswith(("http://", "https://")):
+            return entrada if url_mercadolivre(entrada) and extrair_ids(entrada) else None
+        url = url_de_id(entrada)
+        if url is None:
+            return None
+        catalogo = f"p:{id_principal(url)}"
+        with self._lock:
+            conhecido = self._db.execute("SELECT 1 FROM aliases WHERE id = ?", (catalogo,)).fetchone()
+        return url_de_id(entrada, catalogo=True) if conhecido else url
+
+    def aprender(self, url: str, url_final: Optional[str] = None, item_id: Optional[str] = None) -> str:
+        """
+        Vincula o que a visita ao produto revelou: URL final (redirect do
+        anúncio para o catálogo, ou o inverso) e item_id lido da página.
+        Retorna a chave do produto.
+        """
+        ids = extrair_ids(url)
+        if url_final:
+            ids += extrair_ids(url_final)
+        if item_id and _RE_ID_SOLTO.fullmatch(item_id):
+            ids.append(f"i:{item_id.upper().replace('-', '')}")
+        return self.vincular(*ids) or url_canonica(url)
+
+    def deduplicar(self, urls: list[str]) -> list[str]:
+        """URLs canônicas, uma por produto, na ordem original"""
+        vistas: set[str] = set()
+        unicas = []
+        for url in urls:
+            chave = self.chave(url)
+            if chave not in vistas:
+                vistas.add(chave)
+                unicas.append(url_canonica(url))
+        return unicas
@@ -19,54 +19,36 @@ import asyncio
 import tarfile
 import os
 import sys
-import json
 from pathlib import Path
-from datetime import datetime, timedelta
+from datetime import datetime
 from scraper_ml_afiliado import ScraperMLAfiliado
+from cookies_perfil import inspecionar_perfil
 
 
 # Configuracoes
-BROWSER_DATA_DIR = "./ml_browser_data"
+# Outra conta de afiliado: ML_BROWSER_DATA_DIR=./ml_browser_data_outra (ver contas.json)
+BROWSER_DATA_DIR = os.getenv("ML_BROWSER_DATA_DIR", "./ml_browser_data").rstrip("/")
 EXPORT_FILE = "ml_cookies_export.tar.gz"
-METADATA_FILE = f"{BROWSER_DATA_DIR}/login_metadata.json"
-
-
-def save_metadata():
-    """Salva metadata sobre quando o login foi feito"""
-    os.makedirs(BROWSER_DATA_DIR, exist_ok=True)
-    metadata = {
-        "login_date": datetime.now().isoformat(),
-        "expires_estimate": (datetime.now() + timedelta(days=7)).isoformat(),
-        "version": "3.0"
-    }
-    with open(METADATA_FILE, 'w') as f:
-        json.dump(metadata, f, indent=2)
-    print(f"[OK] Metadata salvo em {METADATA_FILE}")
 
 
 def get_status() -> dict:
-    """Retorna status dos cookies"""
-    if not os.path.exists(METADATA_FILE):
+    """Retorna status dos cookies (validade real, lida do banco de cookies do perfil)"""
+    sessao = inspecionar_perfil(BROWSER_DATA_DIR)
+    if not sessao["cookies_exist"]:
         return {"exists": False, "message": "Nenhum login encontrado"}
-
-    try:
-        with open(METADATA_FILE, 'r') as f:
-            metadata = json.load(f)
-
-        login_date = datetime.fromisoformat(metadata["login_date"])
-        expires_date = datetime.fromisoformat(metadata["expires_estimate"])
-        days_since = (datetime.now() - login_date).days
-        days_until = (expires_date - datetime.now()).days
-
-        return {
-            "exists": True,
-            "login_date": login_date.strftime("%d/%m/%Y %H:%M"),
-            "days_since_login": days_since,
-            "days_until_expiry": days_until,
-            "expired": days_until <= 0
-        }
-    except Exception as e:
-        return {"exists": False, "error": str(e)}
+    if not sessao["sessao_encontrada"]:
+        return {"exists": False, "message": sessao["erro"] or "Cookies sem sessao do Mercado Livre"}
+
+    login_date = sessao["login_em"]
+    expires_date = sessao["expira_em"]
+    return {
+        "exists": True,
+        "login_date": login_date.strftime("%d/%m/%Y %H:%M") if login_date else "N/A",
+        "days_since_login": (datetime.now() - login_date).days if login_date else "N/A",
+        "expires_date": expires_date.strftime("%d/%m/%Y %H:%M") if expires_date else "sem data (ate o logout)",
+        "days_until_expiry": sessao["dias_restantes"] if expires_date else "N/A",
+        "expired": not sessao["logado"]
+    }
 
 
 def export_cookies():
@@ -79,7 +61,7 @@ def export_cookies():
     print("\n[...] Exportando cookies...")
 
     with tarfile.open(EXPORT_FILE, "w:gz") as tar:
-        tar.add(BROWSER_DATA_DIR, arcname="ml_browser_data")
+        tar.add(BROWSER_DATA_DIR, arcname=os.path.basename(BROWSER_DATA_DIR))
 
     size_mb = os.path.getsize(EXPORT_FILE) / 1024 / 1024
     print(f"[OK] Arquivo criado: {EXPORT_FILE} ({size_mb:.1f} MB)")
@@ -124,7 +106,7 @@ LOGIN - MERCADO LIVRE AFILIADO
     if status.get("exists") and not status.get("expired"):
         print(f"[INFO] Login existente encontrado:")
         print(f"       Data: {status['login_date']}")
-        print(f"       Expira em: {status['days_until_expiry']} dias")
+        print(f"       Expira em: {status['expires_date']} ({status['days_until_expiry']} dias)")
         response = input("\nDeseja fazer login novamente? (s/N): ").lower()
         if response != 's':
             print("\n[OK] Usando login existente")
@@ -151,7 +133,6 @@ LOGIN - MERCADO LIVRE AFILIADO
         is_logged = await scraper.verificar_login()
 
         if is_logged:
-            save_metadata()
             print("\n[OK] Login salvo com sucesso!")
             await context.close()
             await browser.close()
@@ -172,7 +153,7 @@ def show_status():
     status = get_status()
 
     if not status.get("exists"):
-        print("[X] Nenhum login encontrado")
+        print(f"[X] {status.get('message', 'Nenhum login encontrado')}")
         print("    Execute: python login_local.py")
         return
 
@@ -184,7 +165,7 @@ def show_status():
     print(f"""
     Login em:     {status.get('login_date', 'N/A')}
     Dias atras:   {status.get('days_since_login', 'N/A')}
-    Expira em:    {status.get('days_until_expiry', 'N/A')} dias
+    Expira em:    {status.get('expires_date', 'N/A')} ({status.get('days_until_expiry', 'N/A')} dias)
 """)
 
     if os.path.exists(EXPORT_FILE):
@@ -0,0 +1,112 @@
+"""
+Modelo tipado do produto e serialização rápida das respostas
+
+O scraper monta e grava produtos como dicts (checkpoint, sinks, histórico,
+webhooks). Na API eles viram `Produto`: dataclass com __slots__ (menos
+memória que um dict por produto nos resultados guardados em jobs_ativos) e
+tipos validados pelo pydantic nos modelos de resposta.
+
+Serialização com orjson (se instalado; senão json da biblioteca padrão),
+direto dos objetos, sem model_dump() intermediário. Com `campos`, cada
+Produto sai só com as colunas pedidas (ex: ?fields=mlb_id,url_curta,preco_atual).
+"""
+
+import json
+from dataclasses import dataclass, field, fields
+from typing import Iterable, Optional
+
+from pydantic import ConfigDict, TypeAdapter
+
+try:
+    import orjson
+except ImportError:  # opcional (serialização mais rápida)
+    orjson = None
+
+
+@dataclass(slots=True)
+class Produto:
+    # IDs lidos do JSON da página (sku, item_id) podem vir como número
+    __pydantic_config__ = ConfigDict(coerce_numbers_to_str=True)
+
+    url_original: str
+    chave: Optional[str] = None  # identidade canônica (ver identidade_produto.py)
+    url_afiliado: Optional[str] = None
+    url_curta: Optional[str] = None
+    product_id: Optional[str] = None
+    mlb_id: Optional[str] = None
+    item_id: Optional[str] = None
+    nome: Optional[str] = None
+    foto_url: Optional[str] = None
+    foto_local: Optional[str] = None
+    fotos: list[str] = field(default_factory=list)
+    preco_original: Optional[float] = None
+    preco_atual: Optional[float] = None
+    preco_pix: Optional[float] = None
+    desconto: Optional[int] = None
+    parcelas: Optional[dict] = None
+    etiqueta: Optional[str] = None  # conta de afiliado que gerou o link
+    status: str = "pendente"
+    erro: Optional[str] = None
+    atualizado_em: Optional[str] = None  # carimbado ao ser gravado (scrape_ofertas)
+    cache_idade_s: Optional[int] = None  # só em produtos vindos do cache de links
+
+    @classmethod
+    def de_dict(cls, dados: dict) -> "Produto":
+        """
+        Produto validado a partir do dict do scraper ou do checkpoint (chaves
+        desconhecidas são ignoradas). Converte como nos modelos de resposta:
+        item_id 123 -> "123", preco "10" -> 10.0.
+
+        Raises:
+            pydantic.ValidationError: valor que não converte para o tipo do campo
+        """
+        return _VALIDADOR.validate_python({campo: dados[campo] for campo in CAMPOS_RESPOSTA if campo in dados})
+
+    def para_dict(self, campos: Optional[Iterable[str]] = None) -> dict:
+        return {campo: getattr(self, campo) for campo in (campos or CAMPOS_RESPOSTA)}
+
+
+# Todas as colunas; as gravadas (sinks) não incluem as que só existem na resposta
+CAMPOS_RESPOSTA = tuple(f.name for f in fields(Produto))
+CAMPOS_PRODUTO = [campo for campo in CAMPOS_RESPOSTA if campo != "cache_idade_s"]
+_VALIDADOR = TypeAdapter(Produto)
+
+
+def parse_campos(texto: Optional[str]) -> Optional[tuple[str, ...]]:
+    """
+    "mlb_id,url_curta" -> ("mlb_id", "url_curta"); vazio = todos (None)
+
+    Raises:
+        ValueError: campo inexistente
+    """
+    if not texto or not texto.strip():
+        return None
+    campos = tuple(dict.fromkeys(c.strip() for c in texto.split(",") if c.strip()))
+    desconhecidos = [c for c in campos if c not in CAMPOS_RESPOSTA]
+    if desconhecidos:
+        raise ValueError(f"Campos desconhecidos: {', '.join(desconhecidos)}. Disponiveis: {', '.join(CAMPOS_RESPOSTA)}")
+    return campos or None
+
+
+def serializar(dados, campos: Optional[Iterable[str]] = None) -> bytes:
+    """
+    JSON compacto (UTF-8) de dicts/listas com modelos pydantic e Produto aninhados.
+
+    Args:
+        campos: colunas de cada Produto (None = todas)
+    """
+    campos = tuple(campos) if campos else None
+
+    def converter(obj):
+        if isinstance(obj, Produto):
+            return obj.para_dict(campos)
+        if hasattr(obj, "model_fields"):
+            # Modelo pydantic: raso; os valores aninhados passam por aqui de novo
+            return dict(obj)
+        if hasattr(obj, "isoformat"):
+            return obj.isoformat()
+        return str(obj)
+
+    if orjson is not None:
+        return orjson.dumps(dados, default=converter, option=orjson.OPT_PASSTHROUGH_DATACLASS | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(dados, ensure_ascii=False, separators=(",", ":"), default=converter).encode("utf-8")
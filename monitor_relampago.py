@@ -0,0 +1,229 @@
+"""
+Monitor de ofertas relâmpago
+
+Ofertas relâmpago duram minutos: rodar o scraping completo a cada N
+minutos chega tarde. O monitor mantém a página de ofertas relâmpago aberta
+numa aba própria, recarrega em intervalo curto, compara os cards com os já
+vistos e gera link de afiliado SÓ para as ofertas novas, entregando cada
+produto ao callback assim que o link fica pronto.
+
+Uso:
+    async with ScraperMLAfiliado(...) as scraper:
+        monitor = MonitorRelampago(scraper, notificar=enviar, intervalo_s=20)
+        await monitor.executar()          # até monitor.parar()
+"""
+
+import asyncio
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Awaitable, Callable, Optional
+
+from scraper_ml_afiliado import FiltrosOferta, ScraperMLAfiliado
+from cache_links import CacheLinks
+from historico_precos import HistoricoPrecos
+from webhooks_outbox import OutboxWebhooks
+
+
+URL_RELAMPAGO = "https://www.mercadolivre.com.br/ofertas#deal_type=lightning"
+
+
+class MonitorRelampago:
+    """Observa a página de ofertas relâmpago e notifica ofertas novas"""
+
+    def __init__(
+        self,
+        scraper: ScraperMLAfiliado,
+        notificar: Callable[[dict], Awaitable[None]],
+        url: str = URL_RELAMPAGO,
+        intervalo_s: float = 20.0,
+        filtros: Optional[FiltrosOferta] = None,
+        max_por_ciclo: int = 10,
+        notificar_existentes: bool = False,
+        historico: Optional[HistoricoPrecos] = None,
+        outbox: Optional[OutboxWebhooks] = None,
+        cache_links: Optional[CacheLinks] = None,
+        max_vistos: int = 5000,
+    ):
+        """
+        Args:
+            scraper: Scraper com browser já inicializado (e logado)
+            notificar: Corrotina chamada com cada produto novo (com link)
+            intervalo_s: Intervalo entre recarregamentos da página
+            filtros: Filtros de card (mesmos do scrape_ofertas)
+            max_por_ciclo: Máximo de ofertas novas processadas por ciclo
+            notificar_existentes: Se False, as ofertas já no ar na partida só viram baseline
+            historico: Se informado, registra os preços das ofertas novas
+            outbox: Se informado, as ofertas novas também vão para os webhooks
+            cache_links: Se informado, o link de cada oferta nova fica no cache de links
+            max_vistos: Tamanho da memória de produtos já vistos
+        """
+        self.scraper = scraper
+        self.notificar = notificar
+        self.url = url
+        self.intervalo_s = intervalo_s
+        self.filtros = filtros if filtros and filtros.ativo() else None
+        self.max_por_ciclo = max_por_ciclo
+        self.notificar_existentes = notificar_existentes
+        self.historico = historico
+        self.outbox = outbox
+        self.cache_links = cache_links
+        self.max_vistos = max_vistos
+
+        self.pagina = None
+        self._vistos: OrderedDict[str, float] = OrderedDict()  # chave do produto -> visto em
+        self._parar = asyncio.Event()
+
+        self.iniciado_em: Optional[str] = None
+        self.ciclos = 0
+        self.ultimo_ciclo: Optional[str] = None
+        self.novas = 0
+        self.notificadas = 0
+        self.falhas_notificacao = 0
+        self.ultimo_erro: Optional[str] = None
+        self._latencias: list[float] = []  # detecção -> notificação (s)
+
+    # -----------------------------------------
+    # Controle
+    # -----------------------------------------
+
+    def parar(self):
+        self._parar.set()
+
+    @property
+    def ativo(self) -> bool:
+        return self.iniciado_em is not None and not self._parar.is_set()
+
+    async def executar(self):
+        """Loop principal: roda até parar() ser chamado"""
+        self.iniciado_em = datetime.now().isoformat()
+        self.pagina = await self.scraper.context.new_page()
+        print(f"\n⚡ Monitor relâmpago: {self.url} (a cada {self.intervalo_s:.0f}s)")
+
+        try:
+            primeiro = True
+            while not self._parar.is_set():
+                inicio = time.monotonic()
+                try:
+                    await self.ciclo(recarregar=not primeiro, baseline=primeiro and not self.notificar_existentes)
+                    primeiro = False
+                except Exception as e:
+                    self.ultimo_erro = f"{datetime.now().isoformat()}: {e}"
+                    print(f"   ⚠️ Ciclo do monitor falhou: {e}")
+
+                # Intervalo conta a partir do início do ciclo
+                espera = max(0.0, self.intervalo_s - (time.monotonic() - inicio))
+                try:
+                    await asyncio.wait_for(self._parar.wait(), timeout=espera)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            self._parar.set()
+            try:
+                await self.pagina.close()
+            except Exception:
+                pass
+            print("⚡ Monitor relâmpago encerrado")
+
+    # -----------------------------------------
+    # Ciclo
+    # -----------------------------------------
+
+    async def ciclo(self, recarregar: bool = True, baseline: bool = False) -> list[dict]:
+        """
+        Recarrega a listagem, detecta cards novos e processa cada um.
+
+        Args:
+            recarregar: page.reload() em vez de goto (a aba já está na URL)
+            baseline: Só memoriza os cards atuais, sem gerar links
+
+        Returns:
+            Produtos novos processados neste ciclo
+        """
+        await self.scraper._navegar(self.url, wait_until='domcontentloaded', timeout=30000,
+                                    pagina=self.pagina, recarregar=recarregar)
+        cards = self.scraper._normalizar_cards(await self.pagina.evaluate(self.scraper.JS_CARDS_OFERTAS))
+        self.ciclos += 1
+        self.ultimo_ciclo = datetime.now().isoformat()
+
+        detectado_em = time.monotonic()
+        # Pela chave do produto: a mesma oferta com outra URL (variante, anúncio) não é nova
+        novos = [card for card in cards if card["chave"] not in self._vistos]
+
+        if baseline:
+            for card in novos:
+                self._memorizar(card["chave"])
+            print(f"   ⚡ Baseline: {len(cards)} ofertas no ar")
+            return []
+        if not novos:
+            return []
+
+        # Só são memorizados os cards reprovados pelos filtros e os processados (abaixo):
+        # os que sobraram (max_por_ciclo, limite por vendedor/categoria) voltam no próximo ciclo
+        por_url = {card["url"]: card for card in novos}
+        if self.filtros:
+            for card in novos:
+                if self.filtros.motivo_rejeicao(card):
+                    self._memorizar(card["chave"])
+            novos = self.filtros.selecionar(novos, self.max_por_ciclo)
+        else:
+            novos = novos[:self.max_por_ciclo]
+        if not novos:
+            return []
+
+        print(f"   ⚡ {len(novos)} oferta(s) relâmpago nova(s)")
+        self.novas += len(novos)
+
+        produtos = []
+        for card in novos:
+            if self._parar.is_set():
+                break
+            # Processado (mesmo que falhe): não volta; as repetições do mesmo item (agrupamento) também não
+            for url in (card["url"], *card.get("similares", [])):
+                self._memorizar(por_url[url]["chave"] if url in por_url else card["chave"])
+            produto = await self.scraper.extrair_dados_produto(card["url"])
+            if self.historico and produto.get("preco_atual") is not None:
+                self.historico.registrar(produto)
+            produtos.append(produto)
+            if produto.get("url_curta"):
+                # Notifica na hora, sem esperar o resto do ciclo
+                await self._notificar(produto, detectado_em)
+                if self.outbox:
+                    self.outbox.enfileirar(produto)
+                if self.cache_links:
+                    self.cache_links.guardar(produto)
+        return produtos
+
+    def _memorizar(self, chave: str):
+        self._vistos[chave] = time.time()
+        self._vistos.move_to_end(chave)
+        while len(self._vistos) > self.max_vistos:
+            self._vistos.popitem(last=False)
+
+    async def _notificar(self, produto: dict, detectado_em: float):
+        try:
+            await self.notificar(produto)
+            self.notificadas += 1
+            self._latencias = (self._latencias + [time.monotonic() - detectado_em])[-100:]
+        except Exception as e:
+            self.falhas_notificacao += 1
+            self.ultimo_erro = f"{datetime.now().isoformat()}: notificação falhou: {e}"
+            print(f"   ⚠️ Falha ao notificar {produto.get('mlb_id')}: {e}")
+
+    def resumo(self) -> dict:
+        """Estado atual do monitor"""
+        latencias = sorted(self._latencias)
+        return {
+            "ativo": self.ativo,
+            "url": self.url,
+            "intervalo_s": self.intervalo_s,
+            "iniciado_em": self.iniciado_em,
+            "ciclos": self.ciclos,
+            "ultimo_ciclo": self.ultimo_ciclo,
+            "ofertas_vistas": len(self._vistos),
+            "ofertas_novas": self.novas,
+            "notificadas": self.notificadas,
+            "falhas_notificacao": self.falhas_notificacao,
+            "latencia_mediana_s": round(latencias[len(latencias) // 2], 1) if latencias else None,
+            "ultimo_erro": self.ultimo_erro,
+        }
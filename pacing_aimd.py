@@ -0,0 +1,143 @@
+"""
+Controle adaptativo de ritmo (AIMD) para as navegações do scraper
+
+Em vez de um delay fixo entre produtos, a taxa de navegações por segundo
+sobe de forma aditiva enquanto as páginas carregam rápido e sem erro, e
+cai de forma multiplicativa quando o site dá sinais de throttling:
+HTTP 429/5xx, carregamento lento ou redirecionamento para login/verificação.
+"""
+
+import random
+import time
+from collections import deque
+from datetime import datetime
+from typing import Optional
+
+
+# Trechos de URL que indicam que o ML nos mandou para login/verificação
+URLS_BLOQUEIO = ("/login", "lgz/login", "account-verification", "captcha", "/security/", "/gz/challenge")
+
+
+class ControladorTaxa:
+    """
+    Taxa de navegações (req/s) controlada por AIMD.
+
+    Uso:
+        espera = controlador.tempo_espera()   # reserva o horário da navegação
+        await asyncio.sleep(espera)
+        ... goto ...
+        controlador.registrar(status, latencia_s, url_final)
+    """
+
+    def __init__(
+        self,
+        taxa_inicial: float = 0.4,
+        taxa_min: float = 0.05,
+        taxa_max: float = 1.0,
+        incremento: float = 0.05,
+        fator_reducao: float = 0.5,
+        latencia_lenta_s: float = 8.0,
+        jitter: float = 0.2,
+        max_eventos: int = 50,
+    ):
+        self.taxa = taxa_inicial
+        self.taxa_min = taxa_min
+        self.taxa_max = taxa_max
+        self.incremento = incremento
+        self.fator_reducao = fator_reducao
+        self.latencia_lenta_s = latencia_lenta_s
+        self.jitter = jitter
+
+        self.sucessos = 0
+        self.backoffs = 0
+        self.eventos: deque = deque(maxlen=max_eventos)
+
+        self._ultimo_envio: Optional[float] = None
+        self._bloqueado_ate = 0.0  # Retry-After
+
+    @property
+    def intervalo_s(self) -> float:
+        return 1.0 / self.taxa
+
+    def tempo_espera(self) -> float:
+        """
+        Segundos a esperar antes da próxima navegação (com jitter humanizado).
+
+        Já reserva o horário: o próximo envio é contado a partir dele, então
+        abas que pedem a vez ao mesmo tempo saem espaçadas pelo intervalo em
+        vez de dispararem juntas depois da mesma espera.
+        """
+        agora = time.monotonic()
+        espera = 0.0
+        if self._ultimo_envio is not None:
+            intervalo = self.intervalo_s * random.uniform(1 - self.jitter, 1 + self.jitter)
+            espera = self._ultimo_envio + intervalo - agora
+        espera = max(0.0, espera, self._bloqueado_ate - agora)
+        self._ultimo_envio = agora + espera
+        return espera
+
+    def registrar(
+        self,
+        status: Optional[int],
+        latencia_s: float,
+        url_final: str = "",
+        retry_after_s: Optional[float] = None,
+    ) -> bool:
+        """
+        Ajusta a taxa a partir da resposta da navegação.
+
+        Args:
+            status: HTTP status do documento (None = falha/timeout)
+            latencia_s: tempo do goto
+            url_final: URL após redirecionamentos
+            retry_after_s: valor do header Retry-After, se houver
+
+        Returns:
+            True se houve back-off
+        """
+        motivo = None
+        if status is None:
+            motivo = "falha"
+        elif status == 429:
+            motivo = "http_429"
+        elif status >= 500:
+            motivo = f"http_{status}"
+        elif any(trecho in (url_final or "").lower() for trecho in URLS_BLOQUEIO):
+            motivo = "redirect_bloqueio"
+        elif latencia_s >= self.latencia_lenta_s:
+            motivo = "lento"
+
+        if motivo is None:
+            # Aumento aditivo
+            self.sucessos += 1
+            self.taxa = min(self.taxa_max, self.taxa + self.incremento)
+            return False
+
+        # Redução multiplicativa
+        taxa_anterior = self.taxa
+        self.backoffs += 1
+        self.taxa = max(self.taxa_min, self.taxa * self.fator_reducao)
+        if retry_after_s:
+            self._bloqueado_ate = time.monotonic() + retry_after_s
+        self.eventos.append({
+            "quando": datetime.now().isoformat(),
+            "motivo": motivo,
+            "status": status,
+            "latencia_s": round(latencia_s, 2),
+            "taxa_anterior": round(taxa_anterior, 3),
+            "taxa_nova": round(self.taxa, 3),
+            "retry_after_s": retry_after_s,
+        })
+        return True
+
+    def resumo(self) -> dict:
+        """Estado atual do controlador"""
+        return {
+            "taxa_req_s": round(self.taxa, 3),
+            "intervalo_s": round(self.intervalo_s, 2),
+            "taxa_min": self.taxa_min,
+            "taxa_max": self.taxa_max,
+            "sucessos": self.sucessos,
+            "backoffs": self.backoffs,
+            "eventos": list(self.eventos),
+        }
@@ -0,0 +1,125 @@
+"""
+Ranking adaptativo de estratégias de seletores
+
+Cada grupo (ex: "btn_compartilhar", "modal_link") tem várias estratégias
+candidatas. O ranking registra taxa de sucesso e latência de cada uma
+(médias móveis exponenciais, para reagir rápido a mudanças de layout),
+persiste em JSON entre execuções e devolve as candidatas ordenadas pelo
+custo esperado. Estratégias que passam a falhar são rebaixadas sozinhas.
+
+Uma estratégia rebaixada quase nunca é tentada (a primeira resolve), então a
+média dela não se recupera sozinha se o layout voltar. Por isso uma fração
+das ordenações (EXPLORACAO) põe na frente uma das outras candidatas, sorteada.
+"""
+
+import json
+import os
+import random
+import threading
+from typing import Optional
+
+
+class RankingEstrategias:
+    """Estatísticas de sucesso/latência por estratégia, persistidas em disco"""
+
+    # Peso da observação mais recente nas médias móveis
+    ALPHA = 0.3
+    # Taxa de sucesso mínima considerada no custo (evita divisão por zero)
+    TAXA_MINIMA = 0.05
+    # Fração das ordenações que testa primeiro uma candidata fora do topo
+    EXPLORACAO = 0.05
+
+    def __init__(self, arquivo: Optional[str] = None, exploracao: Optional[float] = None):
+        self.arquivo = arquivo
+        self.exploracao = self.EXPLORACAO if exploracao is None else exploracao
+        self.stats: dict[str, dict[str, dict]] = {}
+        self._random = random.Random()
+        self._lock = threading.Lock()
+        self._alterado = False
+        self._carregar()
+
+    def _carregar(self):
+        """Carrega estatísticas salvas (arquivo ausente/corrompido = vazio)"""
+        if not self.arquivo or not os.path.exists(self.arquivo):
+            return
+        try:
+            with open(self.arquivo, 'r', encoding='utf-8') as f:
+                self.stats = json.load(f)
+        except Exception:
+            self.stats = {}
+
+    def salvar(self):
+        """Grava as estatísticas de forma atômica (tmp + rename)"""
+        if not self.arquivo or not self._alterado:
+            return
+        with self._lock:
+            os.makedirs(os.path.dirname(os.path.abspath(self.arquivo)), exist_ok=True)
+            tmp = f"{self.arquivo}.tmp"
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(self.stats, f, ensure_ascii=False, indent=2)
+            os.replace(tmp, self.arquivo)
+            self._alterado = False
+
+    def registrar(self, grupo: str, nome: str, sucesso: bool, latencia_ms: float):
+        """Registra o resultado de uma tentativa da estratégia"""
+        with self._lock:
+            s = self.stats.setdefault(grupo, {}).setdefault(nome, {
+                "tentativas": 0,
+                "sucessos": 0,
+                "taxa_sucesso": 0.5,
+                "latencia_ms": None,
+            })
+            s["tentativas"] += 1
+            s["taxa_sucesso"] = (1 - self.ALPHA) * s["taxa_sucesso"] + self.ALPHA * (1.0 if sucesso else 0.0)
+            if sucesso:
+                s["sucessos"] += 1
+                # Latência só das tentativas bem sucedidas: é o custo do caminho feliz
+                if s["latencia_ms"] is None:
+                    s["latencia_ms"] = latencia_ms
+                else:
+                    s["latencia_ms"] = (1 - self.ALPHA) * s["latencia_ms"] + self.ALPHA * latencia_ms
+            self._alterado = True
+
+    def _custo(self, grupo: str, nome: str) -> float:
+        """Custo esperado: latência média dividida pela taxa de sucesso"""
+        s = self.stats.get(grupo, {}).get(nome)
+        if not s or s["tentativas"] == 0:
+            # Nunca testada: custo zero para ser explorada
+            return 0.0
+        latencia = s["latencia_ms"] if s["latencia_ms"] is not None else 1000.0
+        return latencia / max(s["taxa_sucesso"], self.TAXA_MINIMA)
+
+    def ordenar(self, grupo: str, nomes: list[str], explorar: bool = True) -> list[str]:
+        """
+        Ordena as estratégias do grupo do menor para o maior custo (estável).
+
+        Com explorar, em uma fração das chamadas (exploracao) uma das outras
+        candidatas, sorteada, passa para a frente.
+        """
+        ordem = sorted(nomes, key=lambda nome: self._custo(grupo, nome))
+        if explorar and len(ordem) > 1 and self._random.random() < self.exploracao:
+            ordem.insert(0, ordem.pop(self._random.randrange(1, len(ordem))))
+        return ordem
+
+    def timeout_ms(self, grupo: str, nome: str, padrao: int, minimo: int = 1500) -> int:
+        """
+        Timeout sugerido para a estratégia.
+
+        Com histórico confiável, usa 4x a latência observada (limitado pelo
+        padrão); sem histórico, usa o padrão.
+        """
+        s = self.stats.get(grupo, {}).get(nome)
+        if not s or s["sucessos"] < 3 or s["latencia_ms"] is None:
+            return padrao
+        return int(min(padrao, max(minimo, s["latencia_ms"] * 4)))
+
+    def resumo(self) -> dict:
+        """Cópia das estatísticas com a ordem atual de cada grupo"""
+        with self._lock:
+            return {
+                grupo: {
+                    "ordem": self.ordenar(grupo, list(estrategias.keys()), explorar=False),
+                    "estrategias": {nome: dict(s) for nome, s in estrategias.items()},
+                }
+                for grupo, estrategias in self.stats.items()
+            }
@@ -0,0 +1,222 @@
+"""
+Rastreamento (traces) das execuções do scraper
+
+Números agregados (/stats/pacing, ranking) não mostram por que UMA execução
+foi lenta. Com um Rastreador ativo, cada passo vira um span com início e
+duração: init do browser, verificar_login, listagem, scroll, e por produto
+goto, espera do título, busca do botão Compartilhar, espera do modal e cada
+método de extração do link.
+
+O trace é exportado no formato Chrome trace-event (JSON), que abre no
+Perfetto (https://ui.perfetto.dev) ou em chrome://tracing. Cada conta/aba
+fica numa faixa (tid) própria, então num lote distribuído as fatias
+aparecem lado a lado.
+
+Uso:
+    rastreador = Rastreador("run_123")
+    with rastreador.span("goto", url=url) as args:
+        ...
+        args["status"] = 200       # args podem ser completados dentro do span
+    armazem.salvar(rastreador)
+"""
+
+import contextvars
+import json
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Optional
+
+from checkpoints_execucao import caminho_contido
+
+
+# Faixa (tid) da tarefa asyncio atual: cada tarefa herda a do criador
+_faixa_atual: contextvars.ContextVar[str] = contextvars.ContextVar("faixa_trace", default="principal")
+
+
+class Rastreador:
+    """Spans de uma execução, em memória"""
+
+    def __init__(self, run_id: Optional[str] = None, max_spans: int = 20000):
+        self.run_id = run_id
+        self.max_spans = max_spans
+        self.iniciado_em = datetime.now().isoformat()
+        self._t0 = time.monotonic()
+        self._spans: list[tuple] = []  # (nome, categoria, inicio_s, duracao_s, faixa, args)
+        self._faixas: dict[str, int] = {}
+        self.descartados = 0
+
+    @staticmethod
+    def definir_faixa(nome: str):
+        """Spans desta tarefa asyncio (e das que ela criar) vão para a faixa `nome`"""
+        _faixa_atual.set(nome)
+
+    @staticmethod
+    def faixa_atual() -> str:
+        return _faixa_atual.get()
+
+    @contextmanager
+    def span(self, nome: str, categoria: str = "scraper", **args):
+        """Mede o bloco; yield devolve `args` para completar (ex: status HTTP)"""
+        inicio = time.monotonic()
+        try:
+            yield args
+        except BaseException as e:
+            args["erro"] = type(e).__name__
+            raise
+        finally:
+            self.registrar(nome, inicio, time.monotonic(), categoria, **args)
+
+    def registrar(self, nome: str, inicio: float, fim: float, categoria: str = "scraper", **args):
+        """Registra um span já medido (instantes de time.monotonic())"""
+        if len(self._spans) >= self.max_spans:
+            self.descartados += 1
+            return
+        faixa = _faixa_atual.get()
+        self._faixas.setdefault(faixa, len(self._faixas) + 1)
+        self._spans.append((nome, categoria, inicio - self._t0, fim - inicio, faixa, args))
+
+    # -----------------------------------------
+    # Exportação
+    # -----------------------------------------
+
+    def exportar_chrome(self) -> dict:
+        """Trace no formato Chrome trace-event (abre no Perfetto)"""
+        eventos = [
+            {"name": "process_name", "ph": "M", "pid": 1, "tid": 0,
+             "args": {"name": f"scraper {self.run_id or ''}".strip()}},
+        ]
+        for faixa, tid in self._faixas.items():
+            eventos.append({"name": "thread_name", "ph": "M", "pid": 1, "tid": tid, "args": {"name": faixa}})
+            eventos.append({"name": "thread_sort_index", "ph": "M", "pid": 1, "tid": tid, "args": {"sort_index": tid}})
+        for nome, categoria, inicio, duracao, faixa, args in self._spans:
+            eventos.append({
+                "name": nome,
+                "cat": categoria,
+                "ph": "X",
+                "ts": round(inicio * 1e6),
+                "dur": round(duracao * 1e6),
+                "pid": 1,
+                "tid": self._faixas[faixa],
+                "args": args,
+            })
+        return {
+            "traceEvents": eventos,
+            "displayTimeUnit": "ms",
+            "metadata": {
+                "run_id": self.run_id,
+                "iniciado_em": self.iniciado_em,
+                "spans": len(self._spans),
+                "descartados": self.descartados,
+            },
+        }
+
+    def resumo(self) -> dict:
+        """Total, média e máximo por nome de span (ms)"""
+        por_nome: dict[str, list[float]] = {}
+        for nome, _, _, duracao, _, _ in self._spans:
+            por_nome.setdefault(nome, []).append(duracao * 1000)
+        return {
+            nome: {
+                "quantidade": len(duracoes),
+                "total_ms": round(sum(duracoes)),
+                "media_ms": round(sum(duracoes) / len(duracoes)),
+                "max_ms": round(max(duracoes)),
+            }
+            for nome, duracoes in sorted(por_nome.items(), key=lambda item: -sum(item[1]))
+        }
+
+
+class ArmazemTraces:
+    """
+    Traces gravados em disco ({diretorio}/{run_id}.json, formato Chrome),
+    com amostragem: só uma fração das execuções é rastreada.
+
+    Os metadados ficam num índice em memória (lido do disco na primeira
+    listagem e mantido por salvar/_podar): listar() não reabre os traces.
+    Métodos síncronos; na API, chame via asyncio.to_thread.
+    """
+
+    def __init__(self, diretorio: str, amostragem: float = 0.0, max_traces: int = 200):
+        """
+        Args:
+            amostragem: Fração das execuções rastreadas (0 = só quando pedido)
+            max_traces: Mantém só os N traces mais recentes
+        """
+        self.diretorio = diretorio
+        self.amostragem = amostragem
+        self.max_traces = max_traces
+        self._lock = threading.Lock()
+        self._indice: Optional[dict[str, dict]] = None  # run_id -> metadados (None = ainda não lido)
+        os.makedirs(self.diretorio, exist_ok=True)
+
+    def novo_rastreador(self, run_id: Optional[str] = None, forcar: Optional[bool] = None) -> Optional[Rastreador]:
+        """
+        Rastreador para a execução, ou None se ela não foi sorteada.
+
+        Args:
+            forcar: True/False decide direto; None usa a amostragem
+        """
+        rastrear = forcar if forcar is not None else random.random() < self.amostragem
+        return Rastreador(run_id) if rastrear else None
+
+    def _caminho(self, run_id: str) -> str:
+        return caminho_contido(self.diretorio, f"{run_id}.json")
+
+    def salvar(self, rastreador: Rastreador):
+        trace = rastreador.exportar_chrome()
+        trace["metadata"]["resumo"] = rastreador.resumo()
+        caminho = self._caminho(rastreador.run_id)
+        with self._lock:
+            tmp = f"{caminho}.tmp"
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(trace, f, ensure_ascii=False)
+            os.replace(tmp, caminho)
+            if self._indice is not None:
+                self._indice[rastreador.run_id] = self._metadados(trace)
+            self._podar()
+
+    def carregar(self, run_id: str) -> Optional[dict]:
+        """Trace Chrome da execução (None se não foi rastreada)"""
+        try:
+            with open(self._caminho(run_id), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    @staticmethod
+    def _metadados(trace: dict) -> dict:
+        return {k: v for k, v in trace.get("metadata", {}).items() if k != "resumo"}
+
+    def listar(self) -> list[dict]:
+        """Metadados dos traces, mais recentes primeiro"""
+        with self._lock:
+            if self._indice is None:
+                indice = {}
+                for nome in os.listdir(self.diretorio):
+                    if nome.endswith(".json"):
+                        trace = self.carregar(nome[:-5])
+                        if trace:
+                            indice[nome[:-5]] = self._metadados(trace)
+                self._indice = indice
+            traces = list(self._indice.values())
+        return sorted(traces, key=lambda m: m.get("iniciado_em") or "", reverse=True)
+
+    def _podar(self):
+        arquivos = [
+            os.path.join(self.diretorio, nome)
+            for nome in os.listdir(self.diretorio) if nome.endswith(".json")
+        ]
+        if len(arquivos) <= self.max_traces:
+            return
+        arquivos.sort(key=os.path.getmtime)
+        for caminho in arquivos[:len(arquivos) - self.max_traces]:
+            if self._indice is not None:
+                self._indice.pop(os.path.basename(caminho)[:-5], None)
+            try:
+                os.remove(caminho)
+            except OSError:
+                pass
@@ -0,0 +1,136 @@
+"""
+Respostas JSON com ETag, compressão e cursor `since`
+
+Quem faz polling (n8n em GET /scrape/jobs/{run_id}, por exemplo) recebia o
+JSON inteiro, sem compressão, a cada chamada, mesmo sem nada novo.
+
+- ETag (fraco) = hash do JSON; If-None-Match igual -> 304 sem corpo
+- Accept-Encoding: br (se o pacote brotli estiver instalado) ou gzip,
+  só acima de COMPRIMIR_ACIMA_DE bytes
+- `since`: só os produtos gravados depois do instante informado; a
+  resposta traz `cursor`, o valor a mandar no próximo `since`
+
+Os produtos levam `atualizado_em` (ISO, hora local), carimbado quando cada
+um é gravado pela execução (ver ScraperMLAfiliado.scrape_ofertas).
+
+O JSON sai de modelo_produto.serializar (orjson, se instalado), com
+`campos` para devolver só algumas colunas de cada produto.
+"""
+
+import gzip
+import hashlib
+from datetime import datetime
+from typing import Iterable, Optional
+
+from fastapi import Request, Response
+
+from modelo_produto import Produto, serializar
+
+try:
+    import brotli
+except ImportError:  # opcional (Content-Encoding: br)
+    brotli = None
+
+
+COMPRIMIR_ACIMA_DE = 1024  # bytes; abaixo disso a compressão não compensa
+NIVEL_GZIP = 6
+QUALIDADE_BROTLI = 5  # 11 é lento demais para resposta on-line
+
+
+def calcular_etag(corpo: bytes) -> str:
+    """ETag fraco: o mesmo JSON vale para qualquer Content-Encoding"""
+    return f'W/"{hashlib.blake2b(corpo, digest_size=16).hexdigest()}"'
+
+
+def etag_confere(if_none_match: Optional[str], etag: str) -> bool:
+    """Comparação fraca (RFC 9110) contra a lista do If-None-Match"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    alvo = etag.removeprefix("W/")
+    return any(item.strip().removeprefix("W/") == alvo for item in if_none_match.split(","))
+
+
+def escolher_codificacao(accept_encoding: Optional[str]) -> Optional[str]:
+    """br ou gzip conforme o Accept-Encoding (q=0 recusa); None = sem compressão"""
+    aceitas: dict[str, float] = {}
+    for parte in (accept_encoding or "").lower().split(","):
+        nome, _, parametros = parte.strip().partition(";")
+        q = 1.0
+        if parametros.strip().startswith("q="):
+            try:
+                q = float(parametros.strip()[2:])
+            except ValueError:
+                q = 0.0
+        if nome:
+            aceitas[nome] = q
+    disponiveis = (["br"] if brotli else []) + ["gzip"]
+    candidatas = [c for c in disponiveis if aceitas.get(c, aceitas.get("*", 0)) > 0]
+    return max(candidatas, key=lambda c: aceitas.get(c, aceitas.get("*", 0)), default=None)
+
+
+def comprimir(corpo: bytes, codificacao: str) -> bytes:
+    if codificacao == "br":
+        return brotli.compress(corpo, quality=QUALIDADE_BROTLI)
+    return gzip.compress(corpo, compresslevel=NIVEL_GZIP)
+
+
+def resposta_json(
+    request: Request,
+    dados,
+    status_code: int = 200,
+    condicional: bool = True,
+    campos: Optional[Iterable[str]] = None
+) -> Response:
+    """
+    JSON com ETag/304 (condicional=True, para GET) e compressão negociada.
+
+    Args:
+        dados: dict/list (ou modelo pydantic) serializável
+        condicional: False em POST (ETag não se aplica; só comprime)
+        campos: colunas de cada Produto na resposta (None = todas), ver parse_campos
+    """
+    corpo = serializar(dados, campos)
+    cabecalhos = {"Vary": "Accept-Encoding"}
+
+    if condicional:
+        etag = calcular_etag(corpo)
+        cabecalhos["ETag"] = etag
+        cabecalhos["Cache-Control"] = "no-cache"  # pode guardar, mas revalida (If-None-Match)
+        if etag_confere(request.headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers=cabecalhos)
+
+    codificacao = escolher_codificacao(request.headers.get("accept-encoding"))
+    if codificacao and len(corpo) > COMPRIMIR_ACIMA_DE:
+        corpo = comprimir(corpo, codificacao)
+        cabecalhos["Content-Encoding"] = codificacao
+    return Response(content=corpo, status_code=status_code, media_type="application/json", headers=cabecalhos)
+
+
+def normalizar_since(since: Optional[str]) -> Optional[str]:
+    """
+    `since` como o atualizado_em dos produtos (ISO, hora local, sem fuso),
+    para comparar como texto. Aceita data ou data/hora, com ou sem fuso.
+
+    Raises:
+        ValueError: formato inválido
+    """
+    if not since:
+        return None
+    instante = datetime.fromisoformat(since.strip().replace("Z", "+00:00"))
+    if instante.tzinfo:
+        instante = instante.astimezone().replace(tzinfo=None)
+    return instante.isoformat(timespec="microseconds")
+
+
+def produtos_desde(produtos: list[Produto], since: Optional[str]) -> list[Produto]:
+    """Produtos gravados depois de `since` (ISO); sem since, todos"""
+    if not since:
+        return produtos
+    return [p for p in produtos if (p.atualizado_em or "") > since]
+
+
+def proximo_cursor(produtos: list[Produto], since: Optional[str] = None) -> Optional[str]:
+    """Valor para o próximo `since`: o atualizado_em mais recente (ou o since atual)"""
+    return max((p.atualizado_em for p in produtos if p.atualizado_em), default=since)
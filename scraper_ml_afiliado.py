@@ -13,10 +13,137 @@ import asyncio
 import json
 import os
 import re
+import time
+from contextlib import nullcontext
+from dataclasses import dataclass, field
 from datetime import datetime
 from pathlib import Path
-from typing import Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+from typing import Iterable, Optional
 from playwright.async_api import async_playwright, Page, Browser, BrowserContext
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+
+from ranking_estrategias import RankingEstrategias
+from sinks_resultados import FORMATOS, SinkResultados, criar_sink
+from checkpoints_execucao import CheckpointStore
+from pacing_aimd import ControladorTaxa
+from cache_estaticos import CacheEstaticos
+from cache_imagens import CacheImagens, referencia_local
+from modelo_produto import CAMPOS_PRODUTO, Produto
+from historico_precos import HistoricoPrecos
+from webhooks_outbox import OutboxWebhooks
+from rastreamento import Rastreador
+from identidade_produto import RegistroIdentidades, id_principal, url_canonica
+from agrupamento_ofertas import AgrupadorOfertas
+
+
+class PrazoEsgotado(Exception):
+    """Orçamento de tempo do produto ou da execução acabou"""
+
+
+class Prazo:
+    """
+    Deadline monotônico usado para limitar esperas internas.
+
+    Um Prazo sem segundos (None) nunca expira; 0 ou negativo já nasce esgotado.
+    """
+
+    def __init__(self, segundos: Optional[float] = None):
+        self.segundos = segundos
+        self.fim = time.monotonic() + segundos if segundos is not None else None
+
+    def restante_ms(self) -> Optional[float]:
+        """Milissegundos restantes (None = sem limite)"""
+        if self.fim is None:
+            return None
+        return max(0.0, (self.fim - time.monotonic()) * 1000)
+
+    @property
+    def esgotado(self) -> bool:
+        restante = self.restante_ms()
+        return restante is not None and restante <= 0
+
+
+@dataclass
+class FiltrosOferta:
+    """
+    Filtros avaliados nos cards da página de ofertas, ANTES de visitar o produto.
+    
+    Campos ausentes no card (ex: desconto não exibido) não reprovam a oferta.
+    """
+    min_desconto: Optional[int] = None
+    preco_min: Optional[float] = None
+    preco_max: Optional[float] = None
+    palavras_incluir: list[str] = field(default_factory=list)  # basta uma aparecer no título
+    palavras_excluir: list[str] = field(default_factory=list)  # nenhuma pode aparecer
+    max_por_vendedor: Optional[int] = None
+    max_por_categoria: Optional[int] = None
+    # Mesmo item em vários anúncios (título parecido, preço próximo, mesma foto): só a melhor oferta
+    agrupar_similares: bool = False
+    agrupados: int = field(default=0, init=False, repr=False)  # repetições descartadas na última seleção
+    
+    def ativo(self) -> bool:
+        return any([
+            self.min_desconto, self.preco_min, self.preco_max, self.palavras_incluir,
+            self.palavras_excluir, self.max_por_vendedor, self.max_por_categoria,
+            self.agrupar_similares,
+        ])
+    
+    def motivo_rejeicao(self, card: dict) -> Optional[str]:
+        """Motivo pelo qual o card não passa nos filtros de valor/texto (None = passa)"""
+        desconto = card.get("desconto")
+        preco = card.get("preco_atual")
+        titulo = (card.get("nome") or "").lower()
+        
+        if self.min_desconto and desconto is not None and desconto < self.min_desconto:
+            return "desconto"
+        if self.preco_min is not None and preco is not None and preco < self.preco_min:
+            return "preco_min"
+        if self.preco_max is not None and preco is not None and preco > self.preco_max:
+            return "preco_max"
+        if self.palavras_incluir and titulo and not any(p.lower() in titulo for p in self.palavras_incluir):
+            return "palavras_incluir"
+        if self.palavras_excluir and any(p.lower() in titulo for p in self.palavras_excluir):
+            return "palavras_excluir"
+        return None
+    
+    def selecionar(self, cards: list[dict], limite: int, fixos: Iterable[str] = ()) -> list[dict]:
+        """
+        Aplica os filtros e os limites por vendedor/categoria, preservando a ordem.
+        
+        Ordem: filtros de valor/texto, depois o agrupamento (só entre os cards
+        aprovados: um grupo não some porque a oferta mais barata foi reprovada),
+        depois os limites por vendedor/categoria.
+        
+        Args:
+            fixos: URLs já escolhidas numa seleção anterior da mesma listagem
+                (com agrupar_similares, continuam representando o grupo delas)
+        """
+        cards = [card for card in cards if not self.motivo_rejeicao(card)]
+        if self.agrupar_similares:
+            agrupador = AgrupadorOfertas()
+            cards = agrupador.representantes(cards, fixos)
+            self.agrupados = agrupador.agrupados
+        selecionados = []
+        por_vendedor: dict[str, int] = {}
+        por_categoria: dict[str, int] = {}
+        
+        for card in cards:
+            if len(selecionados) >= limite:
+                break
+            vendedor = card.get("vendedor")
+            categoria = card.get("categoria")
+            if self.max_por_vendedor and vendedor and por_vendedor.get(vendedor, 0) >= self.max_por_vendedor:
+                continue
+            if self.max_por_categoria and categoria and por_categoria.get(categoria, 0) >= self.max_por_categoria:
+                continue
+            if vendedor:
+                por_vendedor[vendedor] = por_vendedor.get(vendedor, 0) + 1
+            if categoria:
+                por_categoria[categoria] = por_categoria.get(categoria, 0) + 1
+            selecionados.append(card)
+        
+        return selecionados
 
 
 class ScraperMLAfiliado:
@@ -25,12 +152,23 @@ class ScraperMLAfiliado:
     # Configurações
     COOKIES_FILE = "ml_cookies.json"
     USER_DATA_DIR = "./ml_browser_data"
+    DATA_DIR = "./scraper_data"  # Estado do scraper (ranking, checkpoints...)
     
     # URLs
     URL_LOGIN = "https://www.mercadolivre.com.br/login"
     URL_OFERTAS = "https://www.mercadolivre.com.br/ofertas"
     URL_OFERTAS_RELAMPAGO = "https://www.mercadolivre.com.br/ofertas#nav-header"
     
+    # Browser reaproveitado entre execuções (API): evita repetir navegações recentes
+    LOGIN_VALIDADE_S = 300      # login confirmado há menos que isso não é reverificado
+    LISTAGEM_VALIDADE_S = 60    # página de ofertas carregada há menos que isso não é recarregada
+    
+    # Pipeline de scrape_ofertas: links na fila entre estágios, por extrator (backpressure)
+    FILA_PIPELINE = 4
+    
+    # Watchdog da página: sem resposta a um evaluate trivial nesse tempo = travada
+    SAUDE_TIMEOUT_S = 5
+    
     # Seletores (atualizados baseado nas imagens)
     SELECTORS = {
         # Página de ofertas
@@ -58,13 +196,157 @@ class ScraperMLAfiliado:
         "btn_entrar": "button[type='submit'], button:has-text('Entrar')",
     }
     
+    # Estratégias para achar o botão Compartilhar: (nome, seletor, timeout padrão ms)
+    ESTRATEGIAS_BTN_COMPARTILHAR = [
+        # XPath específico (mais rápido e confiável se estrutura não mudou)
+        ("xpath_nav", "xpath=/html/body/div[1]/nav/div/div[3]/div[2]/div/button", 5000),
+        # Busca no header/nav da página
+        ("nav_header", "nav button:has-text('Compartilhar'), header button:has-text('Compartilhar')", 5000),
+        # Busca em qualquer lugar (último recurso)
+        ("global", "button:has-text('Compartilhar')", 3000),
+    ]
+    
+    # Métodos de extração do link no modal, na ordem padrão (ver _extrair_link_afiliado)
+    METODOS_MODAL_LINK = ["xpath", "inputs", "clipboard", "js"]
+    
+    # Extração de dados do produto em um único evaluate:
+    # JSON-LD + estado pré-carregado (__PRELOADED_STATE__) + seletores CSS como fallback
+    JS_DADOS_PRODUTO = """
+        () => {
+            const r = { jsonld: null, estado: null, css: {} };
+            const num = (v) => (typeof v === 'number' && isFinite(v)) ? v : null;
+            
+            // 1. JSON-LD (schema.org Product)
+            for (const s of document.querySelectorAll('script[type="application/ld+json"]')) {
+                try {
+                    const d = JSON.parse(s.textContent);
+                    const itens = Array.isArray(d) ? d : (d['@graph'] || [d]);
+                    const p = itens.find(x => x && [].concat(x['@type'] || []).includes('Product'));
+                    if (!p) continue;
+                    const oferta = [].concat(p.offers || [])[0] || {};
+                    r.jsonld = {
+                        nome: p.name || null,
+                        fotos: [].concat(p.image || []).filter(x => typeof x === 'string'),
+                        sku: p.sku || p.productID || null,
+                        preco: parseFloat(oferta.price ?? oferta.lowPrice) || null,
+                    };
+                    break;
+                } catch (e) {}
+            }
+            
+            // 2. Estado pré-carregado da página
+            let estado = window.__PRELOADED_STATE__ || null;
+            if (!estado) {
+                const s = document.querySelector('script#__PRELOADED_STATE__');
+                try { estado = s ? JSON.parse(s.textContent) : null; } catch (e) {}
+            }
+            if (estado) {
+                const raiz = estado.initialState || estado.pageState?.initialState || estado;
+                const e = {
+                    item_id: typeof raiz.id === 'string' ? raiz.id : (raiz.item_id || null),
+                    titulo: null, fotos: [], preco_atual: null, preco_original: null,
+                    desconto: null, preco_pix: null, parcelas: null,
+                };
+                // Ignora componentes com preços de OUTROS produtos
+                const ignorar = /recommend|carousel|related|similar|compat|variation|shipping/i;
+                const pilha = [[raiz, '', 0]];
+                let visitados = 0;
+                while (pilha.length && visitados < 50000) {
+                    const [no, caminho, prof] = pilha.pop();
+                    visitados++;
+                    if (!no || typeof no !== 'object' || prof > 15 || ignorar.test(caminho)) continue;
+                    const chave = caminho.slice(caminho.lastIndexOf('.') + 1).toLowerCase();
+                    const textos = Object.values(no).filter(v => typeof v === 'string').join(' ');
+                    
+                    if (!Array.isArray(no)) {
+                        if (!e.titulo && /header/i.test(caminho) && typeof no.title === 'string') {
+                            e.titulo = no.title;
+                        }
+                        if (!e.fotos.length && Array.isArray(no.pictures)) {
+                            e.fotos = no.pictures
+                                .map(p => p && (p.url || p.secure_url || (p.id ? `https://http2.mlstatic.com/D_NQ_NP_${p.id}-O.webp` : null)))
+                                .filter(Boolean);
+                        }
+                        // Pix só dentro do bloco de preço (meios de pagamento e banners também falam de Pix)
+                        if (e.preco_pix === null && /price/i.test(caminho)
+                                && (/pix/i.test(chave) || /\\bpix\\b/i.test(textos))) {
+                            e.preco_pix = num(no.value) ?? num(no.amount) ?? num(no.price?.value);
+                        }
+                        if (!e.parcelas && /installment/i.test(caminho) && num(no.quantity) !== null) {
+                            e.parcelas = {
+                                quantidade: no.quantity,
+                                valor: num(no.amount) ?? num(no.value) ?? num(no.price?.value),
+                                sem_juros: no.rate === 0 || no.no_interest === true || /sem juros/i.test(textos),
+                            };
+                        }
+                        if (e.preco_atual === null && chave === 'price' && num(no.value) !== null
+                                && !/installment|pix/i.test(caminho)) {
+                            e.preco_atual = no.value;
+                            e.preco_original = num(no.original_value);
+                        }
+                        if (e.desconto === null && /discount/.test(chave)) {
+                            e.desconto = num(no.value) ?? num(no.rate);
+                        }
+                    }
+                    for (const [k, v] of Object.entries(no)) {
+                        if (v && typeof v === 'object') pilha.push([v, `${caminho}.${k}`, prof + 1]);
+                    }
+                }
+                r.estado = e;
+            }
+            
+            // 3. Fallback CSS (preço com centavos)
+            const valor = (sel) => {
+                const el = document.querySelector(sel);
+                if (!el) return '';
+                const fracao = el.querySelector('.andes-money-amount__fraction') || el;
+                const centavos = el.querySelector('.andes-money-amount__cents');
+                const texto = fracao.textContent?.trim() || '';
+                return centavos ? `${texto},${centavos.textContent.trim()}` : texto;
+            };
+            const titulo = document.querySelector('h1.ui-pdp-title, .ui-pdp-title, h1');
+            const foto = document.querySelector('.ui-pdp-image, img[data-zoom], .ui-pdp-gallery__figure img');
+            const desconto = document.querySelector('.ui-pdp-price__second-line__label, .andes-money-amount__discount');
+            const subtitulos = document.querySelector('.ui-pdp-price__subtitles, #pricing_price_subtitle');
+            r.css = {
+                nome: titulo?.textContent?.trim() || '',
+                foto: foto?.src || foto?.dataset?.src || '',
+                preco_atual: valor('.ui-pdp-price__second-line .andes-money-amount'),
+                preco_original: valor('.ui-pdp-price__original-value, s.andes-money-amount, s .andes-money-amount'),
+                desconto: desconto?.textContent?.trim() || '',
+                parcelas: subtitulos?.textContent?.trim() || '',
+                preco_pix: '',
+            };
+            for (const el of document.querySelectorAll(
+                    '.ui-pdp-price__subtitles, #pricing_price_subtitle, .ui-pdp-price [class*="pix"], #price [class*="pix"]')) {
+                const dinheiro = el.querySelector('.andes-money-amount');
+                if (dinheiro && /pix/i.test(el.textContent || '')) {
+                    const fracao = dinheiro.querySelector('.andes-money-amount__fraction');
+                    const centavos = dinheiro.querySelector('.andes-money-amount__cents');
+                    r.css.preco_pix = (fracao?.textContent?.trim() || '') + (centavos ? `,${centavos.textContent.trim()}` : '');
+                    break;
+                }
+            }
+            
+            return r;
+        }
+    """
+    
     def __init__(
         self, 
         headless: bool = False,  # False para ver o navegador durante login
         wait_ms: int = 1500,
         max_produtos: int = 50,
         etiqueta: str = "egnofertas",
-        user_data_dir: Optional[str] = None  # Permite customizar caminho dos cookies
+        user_data_dir: Optional[str] = None,  # Permite customizar caminho dos cookies
+        data_dir: Optional[str] = None,  # Diretório de estado do scraper
+        produto_timeout_s: Optional[float] = None,  # Orçamento por produto (None = sem limite)
+        run_timeout_s: Optional[float] = None,  # Orçamento da execução inteira (None = sem limite)
+        pacing: Optional[ControladorTaxa] = None,  # Controle de ritmo compartilhado (ex: pela API)
+        cache_imagens: Optional[CacheImagens] = None,  # Cache local das fotos (foto_local)
+        cache_estaticos: Optional[CacheEstaticos] = None,  # JS/CSS do ML em disco (compartilhável)
+        identidades: Optional[RegistroIdentidades] = None,  # Chave canônica dos produtos (compartilhável)
+        concorrencia: int = 1  # Extratores simultâneos (uma aba cada) no pipeline de scrape_ofertas
     ):
         self.headless = headless
         self.wait_ms = wait_ms
@@ -72,11 +354,53 @@ class ScraperMLAfiliado:
         self.etiqueta = etiqueta
         # Se user_data_dir for fornecido, usa ele; caso contrário usa o padrão
         self.user_data_dir = user_data_dir or self.USER_DATA_DIR
+        self.data_dir = data_dir or self.DATA_DIR
+        self.produto_timeout_s = produto_timeout_s
+        self.run_timeout_s = run_timeout_s
+        self.concorrencia = concorrencia
+        
+        # Deadlines ativos (produto atual e execução)
+        self._prazo_produto = Prazo()
+        self._prazo_run = Prazo()
+        
+        # Ritmo adaptativo (AIMD) de todas as navegações
+        self.pacing = pacing or ControladorTaxa()
+        self.cache_imagens = cache_imagens
+        self.cache_estaticos = cache_estaticos
+        
+        # Identificador da execução atual no checkpoint (ver scrape_ofertas)
+        self.run_id: Optional[str] = None
+        
+        # Spans dos passos da execução (None = sem rastreamento), ver rastreamento.py
+        self.trace: Optional[Rastreador] = None
+        
+        # Dados dos cards da última listagem (url -> card), ver obter_links_ofertas
+        self.cards_listagem: dict[str, dict] = {}
+        
+        # Última confirmação de login e último carregamento da página de ofertas (monotonic)
+        self.login_verificado_em: Optional[float] = None
+        self._listagem_carregada: Optional[tuple[str, float]] = None
+        
+        # Ranking adaptativo das estratégias de seletores (persistido entre execuções)
+        self.ranking = RankingEstrategias(os.path.join(self.data_dir, "ranking_estrategias.json"))
+        
+        # Vínculos catálogo/anúncio/variante -> chave do produto (persistidos entre execuções)
+        if identidades is None:
+            os.makedirs(self.data_dir, exist_ok=True)
+            identidades = RegistroIdentidades(os.path.join(self.data_dir, "identidades.db"))
+        self.identidades = identidades
         
         self.browser: Optional[Browser] = None
         self.context: Optional[BrowserContext] = None
         self.page: Optional[Page] = None
         self.playwright = None
+        self._aba = False  # True = página extra de outro scraper (ver abrir_aba)
+        
+        # Watchdog: motivo da página atual estar quebrada (crash/fechada), ver _vigiar_pagina
+        self._pagina_quebrada: Optional[str] = None
+        self.paginas_trocadas = 0
+        # Fechamentos de páginas substituídas em andamento (aguardados em _close_browser)
+        self._fechamentos: set[asyncio.Task] = set()
         
     async def __aenter__(self):
         await self._init_browser()
@@ -87,6 +411,10 @@ class ScraperMLAfiliado:
     
     async def _init_browser(self):
         """Inicializa o browser com contexto persistente e anti-detecção avançada"""
+        with self._span("init_browser", headless=self.headless):
+            await self._abrir_browser()
+    
+    async def _abrir_browser(self):
         self.playwright = await async_playwright().start()
         
         # Detecta se está rodando em Docker (sem Chrome instalado)
@@ -123,10 +451,8 @@ class ScraperMLAfiliado:
             ignore_default_args=['--enable-automation'],  # Remove flag de automação
         )
         
-        self.page = await self.context.new_page()
-        
-        # Anti-detecção AVANÇADA
-        await self.page.add_init_script("""
+        # Anti-detecção AVANÇADA (no contexto: vale para todas as páginas abertas nele)
+        await self.context.add_init_script("""
             // =============================================
             // ANTI-DETECÇÃO PARA reCAPTCHA
             // =============================================
@@ -221,39 +547,297 @@ class ScraperMLAfiliado:
             }
         """)
         
+        # Bundles JS/CSS do ML servidos do disco (antes da primeira página)
+        if self.cache_estaticos:
+            await self.cache_estaticos.instalar(self.context)
+        
+        self.page = await self.context.new_page()
+        self._vigiar_pagina()
+        
         print("✅ Browser inicializado com anti-detecção avançada")
     
+    async def abrir_aba(self) -> "ScraperMLAfiliado":
+        """
+        Outro scraper na mesma sessão (mesmo contexto/cookies) com página própria.
+        
+        Permite execuções simultâneas sem abrir outro browser no mesmo perfil;
+        ranking e controle de ritmo são compartilhados. Fechar a aba não fecha o browser.
+        """
+        aba = ScraperMLAfiliado(
+            headless=self.headless,
+            wait_ms=self.wait_ms,
+            max_produtos=self.max_produtos,
+            etiqueta=self.etiqueta,
+            user_data_dir=self.user_data_dir,
+            data_dir=self.data_dir,
+            produto_timeout_s=self.produto_timeout_s,
+            run_timeout_s=self.run_timeout_s,
+            pacing=self.pacing,
+            cache_imagens=self.cache_imagens,
+            cache_estaticos=self.cache_estaticos,
+            identidades=self.identidades
+        )
+        aba.ranking = self.ranking
+        aba.context = self.context
+        aba.page = await self.context.new_page()
+        aba._vigiar_pagina()
+        aba.login_verificado_em = self.login_verificado_em
+        aba._aba = True
+        return aba
+    
     async def _close_browser(self):
         """Fecha o browser mantendo os dados"""
+        if self._fechamentos:
+            # Cada um já tem timeout próprio (_fechar_pagina)
+            await asyncio.gather(*self._fechamentos, return_exceptions=True)
+        if self._aba:
+            # Aba de outro scraper: fecha só a página
+            if self.page and not self.page.is_closed():
+                await self.page.close()
+            self.page = self.context = None
+            return
+        try:
+            self.ranking.salvar()
+        except Exception as e:
+            print(f"⚠️ Não foi possível salvar ranking de estratégias: {e}")
         if self.context:
             await self.context.close()
         if self.playwright:
             await self.playwright.stop()
+        self.page = self.context = self.playwright = None
+        self.login_verificado_em = None
+        self._listagem_carregada = None
+        self._pagina_quebrada = None
+    
+    # =========================================
+    # WATCHDOG DA PÁGINA
+    # =========================================
+    
+    def _vigiar_pagina(self):
+        """Marca a página atual como quebrada se o renderer cair ou ela fechar"""
+        pagina = self.page
+        
+        def marcar(motivo: str):
+            # Eventos de uma página já substituída (ou fechada por nós) não contam
+            if self.page is pagina:
+                self._pagina_quebrada = motivo
+        
+        pagina.on("crash", lambda _: marcar("crash do renderer"))
+        pagina.on("close", lambda _: marcar("página fechada"))
+    
+    async def diagnosticar_pagina(self) -> Optional[str]:
+        """Motivo da página estar inutilizável (crash, fechada, travada) ou None se responde"""
+        if self._pagina_quebrada:
+            return self._pagina_quebrada
+        if self.page is None or self.page.is_closed():
+            return "página fechada"
+        try:
+            await asyncio.wait_for(self.page.evaluate("1"), timeout=self.SAUDE_TIMEOUT_S)
+        except asyncio.TimeoutError:
+            return f"sem resposta em {self.SAUDE_TIMEOUT_S}s"
+        except Exception as e:
+            return f"evaluate falhou: {str(e)[:80]}"
+        return None
+    
+    async def trocar_pagina(self, motivo: str):
+        """
+        Substitui a página por uma nova no mesmo contexto (cookies e sessão
+        continuam). A antiga é fechada sem esperar por ela (pode estar travada).
+        
+        Raises:
+            Exception: o contexto também caiu (browser inteiro fora)
+        """
+        with self._span("trocar_pagina", motivo=motivo):
+            print(f"     🩺 Página inutilizável ({motivo}): abrindo outra no mesmo contexto")
+            antiga = self.page
+            self.page = await self.context.new_page()
+            self._pagina_quebrada = None
+            self._vigiar_pagina()
+            # A listagem carregada ficou na página antiga
+            self._listagem_carregada = None
+            self.paginas_trocadas += 1
+            if antiga is not None:
+                # Referência guardada até terminar (o loop só mantém referência fraca às tarefas)
+                tarefa = asyncio.create_task(self._fechar_pagina(antiga))
+                self._fechamentos.add(tarefa)
+                tarefa.add_done_callback(self._fechamentos.discard)
+    
+    async def _fechar_pagina(self, pagina: Page):
+        try:
+            await asyncio.wait_for(pagina.close(), timeout=self.SAUDE_TIMEOUT_S)
+        except Exception:
+            pass
+    
+    async def garantir_pagina(self) -> bool:
+        """Checagem entre produtos: troca a página se ela não responde. True = trocou"""
+        if self.context is None:
+            return False
+        motivo = await self.diagnosticar_pagina()
+        if motivo is None:
+            return False
+        await self.trocar_pagina(motivo)
+        return True
+    
+    def _restante_ms(self) -> Optional[float]:
+        """Menor tempo restante entre o prazo do produto e o da execução"""
+        restantes = [
+            r for r in (self._prazo_produto.restante_ms(), self._prazo_run.restante_ms())
+            if r is not None
+        ]
+        return min(restantes) if restantes else None
+    
+    def _timeout(self, ms: int) -> int:
+        """
+        Limita um timeout do Playwright pelo que resta dos prazos ativos.
+        
+        Raises:
+            PrazoEsgotado: se o prazo do produto ou da execução já acabou
+        """
+        restante = self._restante_ms()
+        if restante is None:
+            return ms
+        if restante <= 0:
+            raise PrazoEsgotado("Prazo esgotado")
+        # Playwright interpreta 0 como "sem timeout", então nunca retorna 0
+        return max(1, int(min(ms, restante)))
     
     async def _human_delay(self, min_ms: int = 500, max_ms: int = 1500):
         """Delay humanizado para evitar detecção"""
         import random
         delay = random.randint(min_ms, max_ms)
+        restante = self._restante_ms()
+        if restante is not None:
+            delay = min(delay, restante)
         await asyncio.sleep(delay / 1000)
     
-    async def _scroll_suave(self, page: Page, vezes: int = 3):
-        """Scroll suave para carregar lazy loading"""
-        for i in range(vezes):
-            await page.evaluate('window.scrollBy(0, window.innerHeight * 0.8)')
-            await self._human_delay(300, 800)
+    def _span(self, nome: str, **args):
+        """Span no trace da execução (no-op sem rastreador)"""
+        if self.trace is None:
+            return nullcontext(args)
+        return self.trace.span(nome, **args)
+    
+    async def _navegar(
+        self,
+        url: str,
+        wait_until: str = 'domcontentloaded',
+        timeout: int = 30000,
+        pagina: Optional[Page] = None,
+        recarregar: bool = False
+    ):
+        """
+        page.goto passando pelo controle de ritmo AIMD.
+        
+        Espera o intervalo atual do controlador, navega e informa status HTTP,
+        latência e URL final para ajustar a taxa.
+        
+        Args:
+            pagina: Página a navegar (padrão: self.page)
+            recarregar: Usa page.reload() em vez de goto (URLs com #hash não recarregam via goto)
+        """
+        pagina = pagina or self.page
+        espera_ms = self.pacing.tempo_espera() * 1000
+        restante = self._restante_ms()
+        if restante is not None:
+            espera_ms = min(espera_ms, restante)
+        if espera_ms > 0:
+            with self._span("pacing", espera_ms=round(espera_ms)):
+                await asyncio.sleep(espera_ms / 1000)
+        
+        pedido_ms = timeout
+        timeout = self._timeout(timeout)
+        inicio = time.monotonic()
+        with self._span("reload" if recarregar else "goto", url=url, wait_until=wait_until) as span:
+            try:
+                if recarregar:
+                    resposta = await pagina.reload(wait_until=wait_until, timeout=timeout)
+                else:
+                    resposta = await pagina.goto(url, wait_until=wait_until, timeout=timeout)
+            except Exception as e:
+                # Timeout encurtado pelo nosso prazo não é sinal de servidor lento/bloqueando:
+                # não reduz a taxa das outras navegações
+                cortado = timeout < pedido_ms and isinstance(e, PlaywrightTimeoutError)
+                if isinstance(e, PrazoEsgotado) or cortado:
+                    span["cortado_pelo_prazo"] = True
+                else:
+                    self.pacing.registrar(None, time.monotonic() - inicio, url)
+                raise
+            span["status"] = resposta.status if resposta else None
+        
+        # networkidle é lento por natureza: só conta lentidão do domcontentloaded
+        latencia = time.monotonic() - inicio if wait_until == 'domcontentloaded' else 0.0
+        status = resposta.status if resposta else 200
+        retry_after = None
+        if resposta:
+            try:
+                retry_after = float(resposta.headers.get("retry-after") or 0) or None
+            except ValueError:
+                pass
+        if self.pacing.registrar(status, latencia, pagina.url, retry_after):
+            print(f"     🐢 Back-off: {self.pacing.eventos[-1]['motivo']} → {self.pacing.taxa:.2f} req/s")
+        return resposta
+    
+    async def _scroll_suave(self, page: Page, vezes: int = 3) -> bool:
+        """
+        Scroll suave a partir da posição atual, em direção ao fim da página
+        (lazy loading). Não volta ao topo: a próxima chamada continua daqui.
         
-        # Volta ao topo
-        await page.evaluate('window.scrollTo(0, 0)')
-        await self._human_delay(200, 400)
+        Returns:
+            True se chegou ao fim da página
+        """
+        with self._span("scroll", vezes=vezes) as span:
+            no_fim = False
+            for i in range(vezes):
+                no_fim = await page.evaluate("""() => {
+                    window.scrollBy(0, window.innerHeight * 0.8);
+                    return window.scrollY + window.innerHeight >= document.body.scrollHeight - 2;
+                }""")
+                await self._human_delay(300, 800)
+                if no_fim:
+                    break
+            span["fim"] = no_fim
+            return no_fim
+    
+    @staticmethod
+    def _url_pagina(url: str, pagina: int) -> str:
+        """URL da listagem na página N (?page=N)"""
+        partes = urlsplit(url)
+        query = [(k, v) for k, v in parse_qsl(partes.query) if k != "page"] + [("page", str(pagina))]
+        return urlunsplit(partes._replace(query=urlencode(query)))
     
     # =========================================
     # LOGIN
     # =========================================
     
-    async def verificar_login(self) -> bool:
-        """Verifica se está logado como afiliado"""
+    @property
+    def browser_ativo(self) -> bool:
+        """Browser inicializado e página ainda aberta"""
+        return self.page is not None and not self.page.is_closed()
+    
+    async def verificar_login(self, max_idade_s: Optional[float] = None) -> bool:
+        """
+        Verifica se está logado como afiliado
+        
+        Args:
+            max_idade_s: Se o login foi confirmado há menos que isso, não navega de novo
+        """
+        if (
+            max_idade_s
+            and self.login_verificado_em is not None
+            and time.monotonic() - self.login_verificado_em < max_idade_s
+        ):
+            with self._span("verificar_login", em_cache=True):
+                return True
+        
+        with self._span("verificar_login") as span:
+            span["logado"] = logado = await self._verificar_login()
+        return logado
+    
+    async def _verificar_login(self) -> bool:
+        self.login_verificado_em = None
         try:
-            await self.page.goto(self.URL_OFERTAS, wait_until='networkidle', timeout=30000)
+            await self._navegar(self.URL_OFERTAS, wait_until='networkidle', timeout=30000)
+            # A página de ofertas fica carregada: obter_links_ofertas pode reaproveitá-la
+            self._listagem_carregada = (self.URL_OFERTAS, time.monotonic())
             await self._human_delay(1000, 2000)
             
             # Procura elementos que só aparecem quando logado como afiliado
@@ -264,6 +848,7 @@ class ScraperMLAfiliado:
             
             if afiliado_element:
                 print("✅ Login de afiliado detectado!")
+                self.login_verificado_em = time.monotonic()
                 return True
             
             # Verifica se tem o nome do usuário no header
@@ -273,11 +858,14 @@ class ScraperMLAfiliado:
             
             if user_element:
                 print("✅ Usuário logado detectado!")
+                self.login_verificado_em = time.monotonic()
                 return True
             
             print("❌ Não está logado")
             return False
             
+        except PrazoEsgotado:
+            raise
         except Exception as e:
             print(f"❌ Erro ao verificar login: {e}")
             return False
@@ -296,7 +884,7 @@ class ScraperMLAfiliado:
         print("="*60 + "\n")
         
         # Abre página de login
-        await self.page.goto("https://www.mercadolivre.com.br", wait_until='networkidle')
+        await self._navegar("https://www.mercadolivre.com.br", wait_until='networkidle')
         await self._human_delay(1000, 2000)
         
         # Clica no botão de entrar
@@ -324,47 +912,182 @@ class ScraperMLAfiliado:
     # SCRAPING DE OFERTAS
     # =========================================
     
-    async def obter_links_ofertas(self, url: str = None) -> list[str]:
+    # Extrai links + dados do card de cada oferta da listagem
+    JS_CARDS_OFERTAS = """
+        () => {
+            const cards = [];
+            const vistos = new Set();
+            const anchors = document.querySelectorAll('a[href*="/p/MLB"], a[href*="produto.mercadolivre"]');
+            const valor = (el) => {
+                if (!el) return '';
+                const fracao = el.querySelector('.andes-money-amount__fraction');
+                const centavos = el.querySelector('.andes-money-amount__cents');
+                const texto = fracao?.textContent?.trim() || '';
+                return centavos ? `${texto},${centavos.textContent.trim()}` : texto;
+            };
+            
+            anchors.forEach(a => {
+                const href = a.href;
+                if (!href || !(href.includes('/p/MLB') || href.includes('produto.mercadolivre'))) return;
+                // Remove parâmetros de tracking
+                const url = href.split('#')[0].split('?')[0];
+                if (vistos.has(url)) return;
+                vistos.add(url);
+                
+                const card = a.closest('.poly-card, .promotion-item, .andes-card, li') || a;
+                const atual = card.querySelector('.poly-price__current .andes-money-amount, .andes-money-amount:not(.andes-money-amount--previous)');
+                const original = card.querySelector('.andes-money-amount--previous, s.andes-money-amount');
+                const desconto = card.querySelector('.poly-price__off, .andes-money-amount__discount, [class*="discount"]');
+                const vendedor = card.querySelector('.poly-component__seller, [class*="seller"]');
+                const foto = card.querySelector('img');
+                cards.push({
+                    url,
+                    href,  // URL completa: wid/item_id da query/hash ajudam a identificar o produto
+                    nome: (card.querySelector('.poly-card__title, .poly-component__title, .promotion-item__title, h2, h3') || a).textContent?.trim() || '',
+                    preco_atual: valor(atual),
+                    preco_original: valor(original),
+                    desconto: desconto?.textContent?.trim() || '',
+                    vendedor: vendedor?.textContent?.trim().replace(/^por\\s+/i, '') || null,
+                    categoria: card.dataset?.category || card.querySelector('[data-category]')?.dataset?.category || null,
+                    imagem: foto?.getAttribute('data-src') || foto?.src || null,  // agrupamento de similares
+                });
+            });
+            
+            return cards;
+        }
+    """
+    
+    async def obter_links_ofertas(
+        self,
+        url: str = None,
+        filtros: Optional[FiltrosOferta] = None,
+        limite: Optional[int] = None
+    ) -> list[str]:
         """
         Obtém lista de links de produtos da página de ofertas
         
+        Args:
+            url: URL da página de ofertas
+            filtros: Filtros avaliados nos cards antes de visitar os produtos
+            limite: Máximo de links (padrão: self.max_produtos)
+        
         Returns:
             Lista de URLs dos produtos
         """
-        url = url or self.URL_OFERTAS
-        
-        print(f"\n🔄 Acessando página de ofertas: {url}")
-        
-        # MUDANÇA 3: Também usa domcontentloaded aqui
-        await self.page.goto(url, wait_until='domcontentloaded', timeout=30000)
-        print(f"   ✅ Página de ofertas carregada")
-        
-        await self._human_delay(1500, 2500)
+        links = []
+        async for lote in self._colher_links(url, filtros, limite):
+            links.extend(lote)
+        print(f"✅ Encontrados {len(links)} produtos")
+        return links
+    
+    async def _colher_links(
+        self,
+        url: Optional[str] = None,
+        filtros: Optional[FiltrosOferta] = None,
+        limite: Optional[int] = None,
+        max_rodadas: int = 4
+    ):
+        """
+        Gera os links da página de ofertas em lotes, à medida que aparecem:
+        o primeiro lote sai assim que a página carrega, os seguintes a cada
+        rodada. Cada rodada rola a página até o fim (lazy loading); no fim da
+        página sem cards novos, segue para a próxima página da listagem
+        (?page=N). Para no limite, quando a próxima página não traz cards
+        novos ou após max_rodadas.
         
-        # Scroll para carregar mais produtos
-        await self._scroll_suave(self.page, vezes=5)
+        Yields:
+            Lista de URLs novas (canônicas, um link por produto)
+        """
+        url = url or self.URL_OFERTAS
+        limite = limite or self.max_produtos
+        filtros = filtros if filtros and filtros.ativo() else None
         
-        # Extrai links de produtos
-        links = await self.page.evaluate(f"""
-            () => {{
-                const links = new Set();
-                const anchors = document.querySelectorAll('a[href*="/p/MLB"], a[href*="produto.mercadolivre"]');
+        with self._span("listagem", url=url) as span:
+            print(f"\n🔄 Acessando página de ofertas: {url}")
+            
+            carregada = self._listagem_carregada
+            self._listagem_carregada = None
+            if (
+                carregada
+                and carregada[0] == url
+                and self.page.url.split('#')[0].rstrip('/') == url.rstrip('/')
+                and time.monotonic() - carregada[1] < self.LISTAGEM_VALIDADE_S
+            ):
+                # Acabou de ser carregada (verificar_login/aquecimento): não navega de novo
+                print(f"   ✅ Página de ofertas já carregada")
+            else:
+                # MUDANÇA 3: Também usa domcontentloaded aqui
+                await self._navegar(url, wait_until='domcontentloaded', timeout=30000)
+                print(f"   ✅ Página de ofertas carregada")
                 
-                anchors.forEach(a => {{
-                    const href = a.href;
-                    if (href && (href.includes('/p/MLB') || href.includes('produto.mercadolivre'))) {{
-                        // Remove parâmetros de tracking
-                        const url = href.split('#')[0].split('?')[0];
-                        links.add(url);
-                    }}
-                }});
+                await self._human_delay(1500, 2500)
+            
+            self.cards_listagem = {}
+            cards = self._normalizar_cards(await self.page.evaluate(self.JS_CARDS_OFERTAS))
+            emitidos: set[str] = set()
+            rodada = 0
+            pagina = 1
+            while True:
+                # Seleção gulosa na ordem da página: cards novos no fim não mudam os já escolhidos
+                selecionados = filtros.selecionar(cards, limite, fixos=emitidos) if filtros else cards[:limite]
+                # Dados do card ficam disponíveis para quem precisar (ex: filtros pós-extração)
+                self.cards_listagem.update((card["url"], card) for card in cards)
+                novos = [card["url"] for card in selecionados if card["url"] not in emitidos]
+                if novos:
+                    emitidos.update(novos)
+                    span["links"] = len(emitidos)
+                    yield novos
+                if len(emitidos) >= limite or rodada >= max_rodadas:
+                    break
                 
-                return Array.from(links).slice(0, {self.max_produtos});
-            }}
-        """)
+                # Mais produtos: rola a página atual; no fim dela sem novidade, próxima página
+                rodada += 1
+                no_fim = await self._scroll_suave(self.page, vezes=5)
+                novos_cards = self._cards_novos(cards, await self.page.evaluate(self.JS_CARDS_OFERTAS))
+                if not novos_cards and no_fim:
+                    pagina += 1
+                    await self._navegar(self._url_pagina(url, pagina), wait_until='domcontentloaded', timeout=30000)
+                    await self._human_delay(1000, 2000)
+                    novos_cards = self._cards_novos(cards, await self.page.evaluate(self.JS_CARDS_OFERTAS))
+                    span["paginas"] = pagina
+                    if not novos_cards:
+                        break
+                cards = cards + novos_cards
+            
+            if filtros:
+                print(f"   🔎 Filtros: {len(emitidos)} de {len(cards)} ofertas aprovadas")
+                if filtros.agrupados:
+                    print(f"   🧬 {filtros.agrupados} oferta(s) repetida(s) de outro vendedor/anúncio agrupada(s)")
+                    span["agrupados"] = filtros.agrupados
+    
+    def _cards_novos(self, cards: list[dict], lidos: list[dict]) -> list[dict]:
+        """Cards lidos agora (normalizados) que ainda não estão em `cards` (mesma chave de produto)"""
+        conhecidas = {card["chave"] for card in cards}
+        return [card for card in self._normalizar_cards(lidos) if card["chave"] not in conhecidas]
+    
+    def _normalizar_cards(self, cards: list[dict]) -> list[dict]:
+        """
+        Converte preços/desconto dos cards em números e resolve a chave
+        canônica de cada um; cards do mesmo produto (catálogo, anúncio,
+        variante) ficam só no primeiro.
+        """
+        unicos, chaves = [], set()
+        for card in cards:
+            card["chave"] = self.identidades.chave(card.pop("href", None) or card["url"])
+            card["url"] = url_canonica(card["url"])
+            if card["chave"] not in chaves:
+                chaves.add(card["chave"])
+                unicos.append(card)
+        cards = unicos
         
-        print(f"✅ Encontrados {len(links)} produtos")
-        return links
+        for card in cards:
+            card["preco_atual"] = self._parse_preco(card.get("preco_atual"))
+            card["preco_original"] = self._parse_preco(card.get("preco_original"))
+            card["desconto"] = self._parse_desconto(card.get("desconto"))
+            if card["desconto"] is None and card["preco_atual"] and card["preco_original"]:
+                if card["preco_original"] > card["preco_atual"]:
+                    card["desconto"] = round((1 - card["preco_atual"] / card["preco_original"]) * 100)
+        return cards
     
     async def extrair_dados_produto(self, url: str) -> dict:
         """
@@ -376,21 +1099,28 @@ class ScraperMLAfiliado:
         Returns:
             Dict com dados do produto incluindo link de afiliado
         """
-        produto = {
-            "url_original": url,
-            "url_afiliado": None,
-            "url_curta": None,
-            "product_id": None,
-            "mlb_id": None,
-            "nome": None,
-            "foto_url": None,
-            "preco_original": None,
-            "preco_atual": None,
-            "preco_pix": None,
-            "desconto": None,
-            "status": "pendente",
-            "erro": None
-        }
+        # Página que caiu/travou no produto anterior é trocada antes de começar
+        await self.garantir_pagina()
+        # Orçamento de tempo do produto: vale também para a nova tentativa com página nova
+        self._prazo_produto = Prazo(self.produto_timeout_s)
+        try:
+            with self._span("produto", url=url) as span:
+                produto = await self._extrair_dados_produto(url)
+                # Falhou porque a página quebrou no meio: uma nova tentativa, com página nova
+                if produto["status"] in ("erro", "timeout") and not (self._prazo_produto.esgotado or self._prazo_run.esgotado):
+                    if await self.garantir_pagina():
+                        print(f"     🔁 Repetindo o produto com a página nova")
+                        produto = await self._extrair_dados_produto(url)
+                        span["repetido"] = True
+                span["status"] = produto["status"]
+        finally:
+            # O prazo vale só para este produto: navegações seguintes (monitor, listagem) não herdam
+            self._prazo_produto = Prazo()
+        return produto
+    
+    async def _extrair_dados_produto(self, url: str) -> dict:
+        produto = self._novo_produto(url)
+        tarefa_imagem = None
         
         try:
             # Acessa a página do produto
@@ -398,67 +1128,55 @@ class ScraperMLAfiliado:
             
             # MUDANÇA 1: Usa 'domcontentloaded' ao invés de 'networkidle'
             # É mais rápido e não espera todas as requisições pararem
-            await self.page.goto(url, wait_until='domcontentloaded', timeout=30000)
+            await self._navegar(url, wait_until='domcontentloaded', timeout=30000)
             print(f"     ✅ Página carregada (DOM pronto)")
             
-            # MUDANÇA 2: Aguarda elementos essenciais aparecerem ao invés de networkidle
-            try:
-                await self.page.wait_for_selector('h1, .ui-pdp-title', timeout=10000)
-                print(f"     ✅ Título do produto visível")
-            except Exception as e:
-                print(f"     ⚠️ Timeout aguardando título: {e}")
-                # Continua mesmo assim, pode ser que a página já tenha carregado
+            # MLB ID da página (catálogo /p/MLB..., anúncio MLB-... ou /up/MLBU...)
+            produto["mlb_id"] = id_principal(url)
             
-            await self._human_delay(1000, 2000)
+            print(f"     🔍 Extraindo dados do produto...")
             
-            # Extrai MLB ID da URL
-            mlb_match = re.search(r'MLB[-]?(\d+)', url)
-            if mlb_match:
-                produto["mlb_id"] = f"MLB{mlb_match.group(1)}"
+            # Dados estruturados (JSON-LD / estado pré-carregado) já estão no HTML:
+            # se vierem completos, não é preciso esperar os widgets de preço renderizarem
+            with self._span("dados_estruturados") as span:
+                dados = await self.page.evaluate(self.JS_DADOS_PRODUTO)
+                span["completos"] = self._dados_estruturados_completos(dados)
             
-            print(f"     🔍 Extraindo dados do produto...")
+            if not span["completos"]:
+                # MUDANÇA 2: Aguarda elementos essenciais aparecerem ao invés de networkidle
+                try:
+                    with self._span("espera_titulo"):
+                        await self.page.wait_for_selector('h1, .ui-pdp-title', timeout=self._timeout(10000))
+                    print(f"     ✅ Título do produto visível")
+                except PrazoEsgotado:
+                    raise
+                except Exception as e:
+                    print(f"     ⚠️ Timeout aguardando título: {e}")
+                    # Continua mesmo assim, pode ser que a página já tenha carregado
+                
+                # Relê a página para o fallback CSS
+                dados = await self.page.evaluate(self.JS_DADOS_PRODUTO)
+            else:
+                print(f"     ✅ Dados estruturados encontrados")
             
-            # Extrai dados básicos via JS
-            dados = await self.page.evaluate("""
-                () => {
-                    const dados = {};
-                    
-                    // Nome
-                    const titulo = document.querySelector('h1.ui-pdp-title, .ui-pdp-title, h1');
-                    dados.nome = titulo?.textContent?.trim() || '';
-                    
-                    // Foto
-                    const foto = document.querySelector('.ui-pdp-image, img[data-zoom], .ui-pdp-gallery__figure img');
-                    dados.foto = foto?.src || foto?.dataset?.src || '';
-                    
-                    // Preço atual
-                    const precoAtual = document.querySelector('.ui-pdp-price__second-line .andes-money-amount__fraction');
-                    dados.preco_atual = precoAtual?.textContent?.trim() || '';
-                    
-                    // Preço original (riscado)
-                    const precoOriginal = document.querySelector('.ui-pdp-price__original-value .andes-money-amount__fraction, s .andes-money-amount__fraction');
-                    dados.preco_original = precoOriginal?.textContent?.trim() || '';
-                    
-                    // Desconto
-                    const desconto = document.querySelector('.ui-pdp-price__second-line__label, .andes-money-amount__discount');
-                    dados.desconto = desconto?.textContent?.trim() || '';
-                    
-                    return dados;
-                }
-            """)
+            await self._human_delay(1000, 2000)
             
-            produto["nome"] = dados.get("nome")
-            produto["foto_url"] = dados.get("foto")
-            produto["preco_atual"] = self._parse_preco(dados.get("preco_atual"))
-            produto["preco_original"] = self._parse_preco(dados.get("preco_original"))
-            produto["desconto"] = self._parse_desconto(dados.get("desconto"))
+            self._aplicar_dados_produto(produto, dados)
+            # Redirect (anúncio -> catálogo) e item_id da página vinculam IDs do mesmo produto
+            produto["chave"] = self.identidades.aprender(url, self.page.url, produto["item_id"])
             
             print(f"     ✅ Dados extraídos: {produto['nome'][:40] if produto['nome'] else 'N/A'}...")
             
+            # Baixa a foto para o cache local em paralelo com a extração do link
+            if self.cache_imagens and produto["foto_url"]:
+                tarefa_imagem = asyncio.create_task(self.cache_imagens.obter(produto["foto_url"]))
+            
             # ===================================
             # EXTRAI LINK DE AFILIADO
             # ===================================
-            link_afiliado = await self._extrair_link_afiliado()
+            with self._span("link_afiliado") as span:
+                link_afiliado = await self._extrair_link_afiliado()
+                span["ok"] = bool(link_afiliado)
             
             if link_afiliado:
                 produto["url_afiliado"] = link_afiliado.get("url_longa")
@@ -466,171 +1184,225 @@ class ScraperMLAfiliado:
                 produto["product_id"] = link_afiliado.get("product_id")
                 produto["status"] = "sucesso"
                 print(f"     ✅ Link: {produto['url_curta']}")
+            elif self._prazo_produto.esgotado or self._prazo_run.esgotado:
+                raise PrazoEsgotado("Prazo esgotado durante extração do link")
             else:
                 produto["status"] = "sem_link"
                 print(f"     ⚠️ Não conseguiu extrair link de afiliado")
             
         except Exception as e:
-            produto["status"] = "erro"
-            produto["erro"] = str(e)
-            print(f"     ❌ Erro na extração: {e}")
-            import traceback
-            print(f"     📋 Stack trace: {traceback.format_exc()}")
+            if isinstance(e, PrazoEsgotado) or self._prazo_produto.esgotado or self._prazo_run.esgotado:
+                produto["status"] = "timeout"
+                produto["erro"] = "Prazo esgotado"
+                print(f"     ⏱️ Prazo esgotado para este produto")
+            else:
+                produto["status"] = "erro"
+                produto["erro"] = str(e)
+                print(f"     ❌ Erro na extração: {e}")
+                import traceback
+                print(f"     📋 Stack trace: {traceback.format_exc()}")
+        
+        if tarefa_imagem:
+            produto["foto_local"] = await self._aguardar_imagem(tarefa_imagem, produto["status"])
         
         return produto
     
+    async def _aguardar_imagem(self, tarefa: asyncio.Task, status: str) -> Optional[str]:
+        """
+        Referência local da foto baixada em paralelo, dentro do prazo do produto.
+        
+        Produto que falhou não espera a foto; se o prazo acabar antes do
+        download, ele é cancelado e o produto sai sem foto_local.
+        """
+        restante = self._restante_ms()
+        if status in ("erro", "timeout") or (restante is not None and restante <= 0):
+            tarefa.cancel()
+            return None
+        try:
+            info = await asyncio.wait_for(tarefa, None if restante is None else restante / 1000)
+        except asyncio.TimeoutError:
+            print(f"     ⏱️ Foto não baixada dentro do prazo do produto")
+            return None
+        return referencia_local(info)
+    
+    def _novo_produto(self, url: str, status: str = "pendente") -> dict:
+        """Estrutura base de um produto (todos os campos de Produto vazios)"""
+        return Produto(
+            url_original=url,
+            chave=self.identidades.chave(url),  # identidade canônica (ver identidade_produto.py)
+            etiqueta=self.etiqueta,  # conta de afiliado que gerou o link
+            status=status
+        ).para_dict(CAMPOS_PRODUTO)
+    
+    async def _procurar_btn_compartilhar(self) -> Optional[tuple]:
+        """
+        Tenta as estratégias do botão Compartilhar na ordem do ranking.
+        
+        Só as falhas vão direto para o ranking: o sucesso da estratégia é
+        registrado por quem chamou, depois de o link sair (um botão errado
+        também "aparece").
+        
+        Returns:
+            (botão, estratégia, latência em ms) ou None
+        """
+        nomes = [nome for nome, _, _ in self.ESTRATEGIAS_BTN_COMPARTILHAR]
+        por_nome = {nome: (seletor, padrao) for nome, seletor, padrao in self.ESTRATEGIAS_BTN_COMPARTILHAR}
+        
+        for nome in self.ranking.ordenar("btn_compartilhar", nomes):
+            seletor, padrao = por_nome[nome]
+            inicio = time.monotonic()
+            with self._span("btn_compartilhar", estrategia=nome) as span:
+                try:
+                    btn = await self.page.wait_for_selector(
+                        seletor,
+                        timeout=self._timeout(self.ranking.timeout_ms("btn_compartilhar", nome, padrao))
+                    )
+                except PrazoEsgotado:
+                    raise
+                except Exception:
+                    btn = None
+                span["ok"] = bool(btn)
+            latencia = (time.monotonic() - inicio) * 1000
+            
+            if btn:
+                print(f"     ✅ Botão encontrado via {nome} ({latencia:.0f}ms)")
+                return btn, nome, latencia
+            self.ranking.registrar("btn_compartilhar", nome, False, latencia)
+            print(f"     ⚠️ Estratégia {nome} falhou, tentando próxima...")
+        
+        return None
+    
+    async def _link_modal_xpath(self) -> Optional[str]:
+        """Extrai o link usando o XPath específico do modal"""
+        xpath_base = "/html/body/div[1]/nav/div/div[3]/div[2]/div[2]/div/div/div/div/div[2]/div/div/div/div[2]/div/div"
+        elemento_xpath = await self.page.query_selector(f"xpath={xpath_base}")
+        if elemento_xpath:
+            # Procura input dentro desse elemento
+            input_link = await elemento_xpath.query_selector("input[type='text'], input[readonly]")
+            if input_link:
+                url_curta = await input_link.get_attribute("value")
+                if url_curta and ("mercadolivre.com/sec/" in url_curta or "meli.to/" in url_curta):
+                    return url_curta
+        return None
+    
+    async def _link_modal_inputs(self) -> Optional[str]:
+        """Busca todos os inputs visíveis com link"""
+        inputs = await self.page.query_selector_all("input[type='text'], input[readonly]")
+        for input_elem in inputs:
+            value = await input_elem.get_attribute("value") or ""
+            if "mercadolivre.com/sec/" in value or "meli.to/" in value:
+                return value
+        return None
+    
+    async def _link_modal_clipboard(self) -> Optional[str]:
+        """Clica no botão de copiar e lê o clipboard"""
+        btn_copiar = await self.page.query_selector(
+            "button:has-text('Copiar'), button[aria-label*='Copiar'], [class*='copy'] button"
+        )
+        if not btn_copiar:
+            return None
+        
+        await btn_copiar.click()
+        await self._human_delay(300, 600)
+        
+        # Tenta ler do clipboard via JS
+        clipboard_text = await self.page.evaluate("""
+            async () => {
+                try {
+                    const text = await navigator.clipboard.readText();
+                    return text;
+                } catch {
+                    return null;
+                }
+            }
+        """)
+        
+        if clipboard_text and ("mercadolivre.com/sec/" in clipboard_text or "meli.to/" in clipboard_text):
+            return clipboard_text
+        return None
+    
+    async def _link_modal_js(self) -> Optional[str]:
+        """Procura o link em qualquer texto da página via JavaScript"""
+        return await self.page.evaluate("""
+            () => {
+                // Procura em todos os elementos de texto
+                const allElements = document.querySelectorAll('*');
+                for (const el of allElements) {
+                    const text = el.textContent || el.innerText || el.value || '';
+                    if (text.includes('mercadolivre.com/sec/') || text.includes('meli.to/')) {
+                        // Extrai URL
+                        const match = text.match(/(https?:\\/\\/[\\w.-]+\\/sec\\/[\\w-]+)|(https?:\\/\\/meli\\.to\\/[\\w-]+)/);
+                        if (match) {
+                            return match[0];
+                        }
+                    }
+                }
+                return null;
+            }
+        """)
+    
     async def _extrair_link_afiliado(self) -> Optional[dict]:
         """
         Clica em Compartilhar e extrai o link de afiliado do modal
         
+        As estratégias de busca do botão e os métodos de extração do modal
+        são tentados na ordem do ranking adaptativo (sucesso x latência).
+        
         Returns:
             Dict com url_curta, url_longa, product_id ou None se falhar
         """
+        # Estratégia do botão que funcionou: entra no ranking só quando o link sai (ver finally)
+        estrategia_btn = None
+        resultado = {}
         try:
             print("     🔍 Procurando botão Compartilhar...")
 
-            btn_compartilhar = None
-            
-            # MÉTODO 1: XPath específico (mais rápido e confiável se estrutura não mudou)
-            try:
-                btn_compartilhar = await self.page.wait_for_selector(
-                    "xpath=/html/body/div[1]/nav/div/div[3]/div[2]/div/button",
-                    timeout=5000
-                )
-                if btn_compartilhar:
-                    print("     ✅ Botão encontrado via XPath!")
-            except:
-                print("     ⚠️ XPath falhou, tentando fallback...")
-
-            # MÉTODO 2: Busca no header/nav da página (fallback confiável)
-            if not btn_compartilhar:
-                try:
-                    btn_compartilhar = await self.page.wait_for_selector(
-                        "nav button:has-text('Compartilhar'), header button:has-text('Compartilhar')",
-                        timeout=5000
-                    )
-                    if btn_compartilhar:
-                        print("     ✅ Botão encontrado no header/nav!")
-                except:
-                    pass
-
-            # MÉTODO 3: Busca em qualquer lugar (último recurso)
-            if not btn_compartilhar:
-                try:
-                    btn_compartilhar = await self.page.wait_for_selector(
-                        "button:has-text('Compartilhar')",
-                        timeout=3000
-                    )
-                    if btn_compartilhar:
-                        print("     ✅ Botão encontrado na página!")
-                except:
-                    pass
+            encontrado = await self._procurar_btn_compartilhar()
 
-            if not btn_compartilhar:
+            if not encontrado:
                 print("     ⚠️ Botão Compartilhar não encontrado em nenhum método")
                 return None
+            btn_compartilhar, estrategia_btn, latencia_btn = encontrado
             
             # Clica no botão
             await btn_compartilhar.click()
             await self._human_delay(1000, 2000)
 
             # Aguarda o modal aparecer - usando múltiplos seletores
-            await self.page.wait_for_selector(
-                "input[value*='mercadolivre.com/sec'], input[value*='meli.to'], div:has-text('Link do produto')",
-                timeout=5000
-            )
+            with self._span("espera_modal"):
+                await self.page.wait_for_selector(
+                    "input[value*='mercadolivre.com/sec'], input[value*='meli.to'], div:has-text('Link do produto')",
+                    timeout=self._timeout(5000)
+                )
 
             await self._human_delay(500, 1000)
 
-            # MÉTODO 1: Tenta extrair usando o XPath específico do modal
-            resultado = {}
-
-            try:
-                # Usa o XPath fornecido como base para encontrar o input
-                xpath_base = "/html/body/div[1]/nav/div/div[3]/div[2]/div[2]/div/div/div/div/div[2]/div/div/div/div[2]/div/div"
-                elemento_xpath = await self.page.query_selector(f"xpath={xpath_base}")
-
-                if elemento_xpath:
-                    # Procura input dentro desse elemento
-                    input_link = await elemento_xpath.query_selector("input[type='text'], input[readonly]")
-                    if input_link:
-                        url_curta = await input_link.get_attribute("value")
-                        if url_curta and ("mercadolivre.com/sec/" in url_curta or "meli.to/" in url_curta):
-                            resultado["url_curta"] = url_curta.strip()
-                            print(f"     ✅ Link extraído via XPath: {url_curta[:50]}...")
-            except Exception as e:
-                print(f"     ⚠️ XPath não funcionou: {e}")
-
-            # MÉTODO 2: Busca todos os inputs visíveis com link
-            if not resultado.get("url_curta"):
-                try:
-                    inputs = await self.page.query_selector_all("input[type='text'], input[readonly]")
-                    for input_elem in inputs:
-                        value = await input_elem.get_attribute("value") or ""
-                        if "mercadolivre.com/sec/" in value or "meli.to/" in value:
-                            resultado["url_curta"] = value.strip()
-                            print(f"     ✅ Link extraído via input: {value[:50]}...")
-                            break
-                except Exception as e:
-                    print(f"     ⚠️ Busca por inputs falhou: {e}")
-
-            # MÉTODO 3: Tenta copiar clicando no botão de copiar
-            if not resultado.get("url_curta"):
-                try:
-                    # Procura botão de copiar
-                    btn_copiar = await self.page.query_selector(
-                        "button:has-text('Copiar'), button[aria-label*='Copiar'], [class*='copy'] button"
-                    )
-
-                    if btn_copiar:
-                        # Clica para copiar
-                        await btn_copiar.click()
-                        await self._human_delay(300, 600)
-
-                        # Tenta ler do clipboard via JS
-                        clipboard_text = await self.page.evaluate("""
-                            async () => {
-                                try {
-                                    const text = await navigator.clipboard.readText();
-                                    return text;
-                                } catch {
-                                    return null;
-                                }
-                            }
-                        """)
+            # Tenta os métodos de extração na ordem do ranking
+            metodos = {
+                "xpath": self._link_modal_xpath,
+                "inputs": self._link_modal_inputs,
+                "clipboard": self._link_modal_clipboard,
+                "js": self._link_modal_js,
+            }
 
-                        if clipboard_text and ("mercadolivre.com/sec/" in clipboard_text or "meli.to/" in clipboard_text):
-                            resultado["url_curta"] = clipboard_text.strip()
-                            print(f"     ✅ Link copiado do clipboard: {clipboard_text[:50]}...")
-                except Exception as e:
-                    print(f"     ⚠️ Método clipboard falhou: {e}")
+            for nome in self.ranking.ordenar("modal_link", self.METODOS_MODAL_LINK):
+                inicio = time.monotonic()
+                with self._span("metodo_link", metodo=nome) as span:
+                    try:
+                        url_curta = await metodos[nome]()
+                    except PrazoEsgotado:
+                        raise
+                    except Exception as e:
+                        print(f"     ⚠️ Método {nome} falhou: {e}")
+                        url_curta = None
+                    span["ok"] = bool(url_curta)
+                latencia = (time.monotonic() - inicio) * 1000
+                self.ranking.registrar("modal_link", nome, bool(url_curta), latencia)
 
-            # MÉTODO 4: Busca via JavaScript (fallback)
-            if not resultado.get("url_curta"):
-                try:
-                    js_resultado = await self.page.evaluate("""
-                        () => {
-                            // Procura em todos os elementos de texto
-                            const allElements = document.querySelectorAll('*');
-                            for (const el of allElements) {
-                                const text = el.textContent || el.innerText || el.value || '';
-                                if (text.includes('mercadolivre.com/sec/') || text.includes('meli.to/')) {
-                                    // Extrai URL
-                                    const match = text.match(/(https?:\\/\\/[\\w.-]+\\/sec\\/[\\w-]+)|(https?:\\/\\/meli\\.to\\/[\\w-]+)/);
-                                    if (match) {
-                                        return match[0];
-                                    }
-                                }
-                            }
-                            return null;
-                        }
-                    """)
-
-                    if js_resultado:
-                        resultado["url_curta"] = js_resultado.strip()
-                        print(f"     ✅ Link extraído via JS: {js_resultado[:50]}...")
-                except Exception as e:
-                    print(f"     ⚠️ Busca via JS falhou: {e}")
+                if url_curta:
+                    resultado["url_curta"] = url_curta.strip()
+                    print(f"     ✅ Link extraído via {nome}: {url_curta[:50]}...")
+                    break
 
             # Extrai ID do produto se possível
             try:
@@ -671,18 +1443,85 @@ class ScraperMLAfiliado:
             except:
                 pass
             return None
+        finally:
+            link_ok = bool(resultado.get("url_curta"))
+            # Prazo que acabou no meio não diz nada sobre a estratégia
+            if estrategia_btn and (link_ok or not (self._prazo_produto.esgotado or self._prazo_run.esgotado)):
+                self.ranking.registrar("btn_compartilhar", estrategia_btn, link_ok, latencia_btn)
+    
+    def _dados_estruturados_completos(self, dados: dict) -> bool:
+        """True se JSON-LD/estado trouxeram pelo menos nome e preço atual"""
+        estado = dados.get("estado") or {}
+        jsonld = dados.get("jsonld") or {}
+        nome = estado.get("titulo") or jsonld.get("nome")
+        preco = estado.get("preco_atual") or jsonld.get("preco")
+        return bool(nome and preco)
+    
+    def _aplicar_dados_produto(self, produto: dict, dados: dict):
+        """
+        Preenche o produto com o resultado de JS_DADOS_PRODUTO.
+        
+        Prioridade: estado pré-carregado > JSON-LD > seletores CSS.
+        """
+        estado = dados.get("estado") or {}
+        jsonld = dados.get("jsonld") or {}
+        css = dados.get("css") or {}
+        
+        produto["nome"] = estado.get("titulo") or jsonld.get("nome") or css.get("nome") or None
+        
+        fotos = estado.get("fotos") or jsonld.get("fotos") or []
+        produto["fotos"] = fotos
+        produto["foto_url"] = fotos[0] if fotos else (css.get("foto") or None)
+        
+        produto["preco_atual"] = (
+            estado.get("preco_atual") or jsonld.get("preco") or self._parse_preco(css.get("preco_atual"))
+        )
+        produto["preco_original"] = estado.get("preco_original") or self._parse_preco(css.get("preco_original"))
+        produto["preco_pix"] = estado.get("preco_pix") or self._parse_preco(css.get("preco_pix"))
+        produto["parcelas"] = estado.get("parcelas") or self._parse_parcelas(css.get("parcelas"))
+        produto["item_id"] = estado.get("item_id") or jsonld.get("sku")
+        
+        desconto = estado.get("desconto")
+        produto["desconto"] = self._percentual(desconto) if desconto else self._parse_desconto(css.get("desconto"))
+        # Sem rótulo de desconto: calcula pelos preços
+        if produto["desconto"] is None and produto["preco_atual"] and produto["preco_original"]:
+            if produto["preco_original"] > produto["preco_atual"]:
+                produto["desconto"] = round((1 - produto["preco_atual"] / produto["preco_original"]) * 100)
     
     def _parse_preco(self, valor: str) -> Optional[float]:
-        """Converte string de preço para float"""
+        """Converte string de preço para float (aceita '1.299,90', '1.299' e '264.90')"""
         if not valor:
             return None
         try:
-            # Remove pontos de milhar e troca vírgula por ponto
-            valor = valor.replace('.', '').replace(',', '.').strip()
-            return float(re.sub(r'[^\d.]', '', valor))
+            valor = re.sub(r'[^\d.,]', '', valor)
+            if ',' in valor:
+                # Formato BR: pontos de milhar e vírgula decimal
+                valor = valor.replace('.', '').replace(',', '.')
+            elif not re.search(r'\.\d{1,2}$', valor):
+                # Só pontos de milhar (grupos de 3 dígitos)
+                valor = valor.replace('.', '')
+            return float(valor)
         except:
             return None
     
+    def _parse_parcelas(self, valor: str) -> Optional[dict]:
+        """Extrai parcelamento de textos como 'em 10x R$ 47,99 sem juros'"""
+        if not valor:
+            return None
+        match = re.search(r'(\d+)\s*x\s*(?:de\s*)?(?:R\$)?\s*([\d.]+(?:,\d{1,2})?)', valor)
+        if not match:
+            return None
+        return {
+            "quantidade": int(match.group(1)),
+            "valor": self._parse_preco(match.group(2)),
+            "sem_juros": "sem juros" in valor.lower(),
+        }
+    
+    @staticmethod
+    def _percentual(valor: float) -> int:
+        """Desconto do estado da página em %: taxas (0.44) viram 44, porcentagens (44) ficam"""
+        return round(valor * 100) if 0 < valor < 1 else round(valor)
+    
     def _parse_desconto(self, valor: str) -> Optional[int]:
         """Extrai porcentagem de desconto"""
         if not valor:
@@ -699,49 +1538,286 @@ class ScraperMLAfiliado:
     # MÉTODO PRINCIPAL
     # =========================================
     
-    async def scrape_ofertas(self, url: str = None, max_produtos: int = None) -> list[dict]:
+    async def scrape_ofertas(
+        self,
+        url: str = None,
+        max_produtos: int = None,
+        sink: Optional[SinkResultados] = None,
+        manter_resultados: bool = True,
+        checkpoint: Optional[CheckpointStore] = None,
+        run_id: Optional[str] = None,
+        resume: bool = False,
+        historico: Optional[HistoricoPrecos] = None,
+        filtros: Optional[FiltrosOferta] = None,
+        outbox: Optional[OutboxWebhooks] = None,
+        links: Optional[list[str]] = None,
+        pedido: Optional[dict] = None
+    ) -> list[dict]:
         """
         Executa o scraping completo das ofertas
         
+        Pipeline com filas limitadas: a listagem entrega links em lotes
+        enquanto rola a página, `concorrencia` extratores (uma aba cada) geram
+        dados + link de afiliado, e um estágio de gravação registra cada
+        produto (checkpoint, histórico, outbox, sink). A extração começa
+        com o primeiro lote da listagem; com concorrencia=1 ela usa a própria
+        página principal, depois da listagem.
+        
         Args:
             url: URL da página de ofertas (padrão: ofertas gerais)
             max_produtos: Limite de produtos (padrão: self.max_produtos)
+            sink: Se informado, cada produto é gravado assim que é extraído
+            manter_resultados: False para não acumular produtos em memória
+                (útil com sink em execuções longas; o retorno fica vazio)
+            checkpoint: Se informado, grava links e produtos concluídos após cada passo
+            run_id: Identificador da execução no checkpoint (gerado se omitido)
+            resume: Retoma a execução run_id: reaproveita links e produtos já concluídos
+            historico: Se informado, cada preço extraído vira uma observação no histórico
+            filtros: Filtros aplicados nos cards da listagem (só visita o que passar)
+            outbox: Se informado, produtos com link entram na outbox de webhooks
+            links: Links já coletados (ex: fatia de um lote dividido entre contas);
+                pula a página de ofertas
+            pedido: Parâmetros da execução gravados no checkpoint (para retomar igual)
             
         Returns:
             Lista de produtos com links de afiliado
         """
         max_produtos = max_produtos or self.max_produtos
         
-        # Verifica login
-        if not await self.verificar_login():
-            print("\n⚠️ Você precisa fazer login primeiro!")
-            logou = await self.fazer_login_manual()
-            if not logou:
-                return []
+        # Deadline da execução inteira (login + listagem + produtos)
+        self._prazo_run = Prazo(self.run_timeout_s)
+        self._prazo_produto = Prazo()
+        
+        # Checkpoint: estado anterior (resume) e registro da execução
+        estado = None
+        if checkpoint:
+            self.run_id = run_id or CheckpointStore.novo_run_id()
+            if resume:
+                estado = checkpoint.carregar(self.run_id)
+                if estado is None or estado.get("links") is None:
+                    print(f"⚠️ Nenhum checkpoint com links para {self.run_id}, iniciando do zero")
+                    estado = None
+                else:
+                    url = url or estado.get("url")
+            checkpoint.iniciar(self.run_id, url, max_produtos, pedido)
+            print(f"📌 Execução: {self.run_id}")
         
-        # Obtém lista de links
-        links = await self.obter_links_ofertas(url)
-        links = links[:max_produtos]
+        try:
+            # Browser reaproveitado (API) pode estar com a página caída desde a última execução
+            await self.garantir_pagina()
+            # Verifica login (confirmação recente vale: browser reaproveitado pela API)
+            if not await self.verificar_login(max_idade_s=self.LOGIN_VALIDADE_S):
+                print("\n⚠️ Você precisa fazer login primeiro!")
+                logou = await self.fazer_login_manual()
+                if not logou:
+                    self._prazo_run = Prazo()
+                    return []
+        except PrazoEsgotado:
+            print("\n⏱️ Prazo da execução esgotado antes da extração")
+            self._prazo_run = Prazo()
+            return []
         
-        print(f"\n🚀 Iniciando extração de {len(links)} produtos...")
-        print("="*60)
+        # Links já conhecidos (resume ou fatia de lote) dispensam a listagem
+        if estado:
+            links = estado["pendentes"]
+            print(f"\n♻️ Retomando: {len(estado['concluidos'])} concluídos, {len(links)} pendentes")
+        elif links is not None:
+            links = self.identidades.deduplicar(links)  # um link por produto
+            if checkpoint:
+                checkpoint.salvar_links(self.run_id, links)
         
         produtos = []
-        for i, link in enumerate(links, 1):
-            print(f"\n[{i}/{len(links)}]")
-            produto = await self.extrair_dados_produto(link)
-            produtos.append(produto)
-            
-            # Delay entre produtos para evitar rate limit
-            if i < len(links):
-                await self._human_delay(1500, 3000)
+        contagem = {"sucesso": 0, "timeout": 0, "total": 0, "duplicados": 0, "iniciados": 0}
+        trocadas_antes = self.paginas_trocadas  # o scraper pode vir reaproveitado de outra execução
+        # Chaves dos produtos já processados nesta execução: nenhum produto é visitado duas vezes
+        processados: set[str] = set()
+        
+        def registrar(produto: dict, salvar_checkpoint: bool = True):
+            processados.add(produto.get("chave") or self.identidades.chave(produto["url_original"]))
+            # Instante da gravação: cursor `since` da API (produtos restaurados mantêm o original;
+            # os cortados pelo prazo, que não vão para o checkpoint, também são carimbados)
+            if salvar_checkpoint or not produto.get("atualizado_em"):
+                produto["atualizado_em"] = datetime.now().isoformat(timespec="microseconds")
+            contagem["total"] += 1
+            if produto["status"] in ("sucesso", "timeout"):
+                contagem[produto["status"]] += 1
+            # Produtos reaproveitados do checkpoint já foram gravados nos arquivos da execução anterior.
+            # O sink vai antes do checkpoint: concluído no checkpoint já está em disco
+            if sink and salvar_checkpoint:
+                sink.escrever(produto)
+                if checkpoint:
+                    sink.descarregar()
+            if checkpoint and salvar_checkpoint:
+                checkpoint.registrar_produto(self.run_id, produto)
+            # Idem para o histórico: já foram observados na execução anterior
+            if historico and salvar_checkpoint:
+                historico.registrar(produto)
+            # Idem para webhooks: já foram enfileirados na execução anterior
+            if outbox and salvar_checkpoint and produto.get("url_curta"):
+                outbox.enfileirar(produto)
+            if manter_resultados:
+                produtos.append(produto)
+        
+        # Produtos concluídos em execução anterior entram no resultado
+        for produto in (estado["concluidos"] if estado else []):
+            registrar(produto, salvar_checkpoint=False)
+        anteriores = len(produtos)
+        
+        # ===================================
+        # PIPELINE: listagem -> extração (dados + link) -> gravação
+        # ===================================
+        # Filas limitadas dão backpressure: a listagem anda no máximo
+        # FILA_PIPELINE links por extrator à frente da extração. Dados e link
+        # de afiliado saem da mesma página do produto (o modal Compartilhar
+        # fica nela), então formam um estágio só, com uma aba por extrator.
+        extratores = max(1, self.concorrencia)
+        colher_listagem = links is None
+        # Um extrator só usa a página principal (sem abrir aba): se ela também
+        # faz a listagem, a extração começa quando a listagem termina
+        usar_principal = extratores == 1 or not colher_listagem
+        em_serie = colher_listagem and usar_principal
+        fila_links: asyncio.Queue = asyncio.Queue(maxsize=0 if em_serie else self.FILA_PIPELINE * extratores)
+        fila_resultados: asyncio.Queue = asyncio.Queue(maxsize=self.FILA_PIPELINE * extratores)
+        colhidos: list[str] = [] if colher_listagem else list(links)
+        em_curso: set[str] = set()
+        situacao = {"interrompido": False, "erro_listagem": None}
+        
+        print(f"\n🚀 Pipeline: {'listagem → ' if colher_listagem else ''}extração ({extratores} aba(s)) → gravação")
+        print("="*60)
+        
+        async def listar():
+            try:
+                if colher_listagem:
+                    async for lote in self._colher_links(url, filtros, max_produtos):
+                        colhidos.extend(lote)
+                        if checkpoint:
+                            checkpoint.salvar_links(self.run_id, colhidos)
+                        for link in lote:
+                            await fila_links.put(link)
+                else:
+                    for link in links:
+                        await fila_links.put(link)
+            except PrazoEsgotado:
+                print("\n⏱️ Prazo da execução esgotado durante a listagem")
+                situacao["interrompido"] = True
+            except Exception as e:
+                situacao["erro_listagem"] = e
+            finally:
+                for _ in range(extratores):
+                    await fila_links.put(None)
+        
+        async def extrair(scraper: "ScraperMLAfiliado", numero: int):
+            if self.trace:
+                Rastreador.definir_faixa(f"{Rastreador.faixa_atual()} · extrator {numero}")
+            while (link := await fila_links.get()) is not None:
+                # Corte antecipado: o restante sai como timeout (e segue pendente no checkpoint)
+                if self._prazo_run.esgotado:
+                    item = self._novo_produto(link, status="timeout")
+                    item["erro"] = "Prazo da execução esgotado"
+                    situacao["interrompido"] = True
+                    await fila_resultados.put((item, False))
+                    continue
+        
+                # Vínculo aprendido num produto anterior (ex: anúncio -> catálogo) revela duplicado
+                chave = self.identidades.chave(link)
+                if chave in processados or chave in em_curso:
+                    contagem["duplicados"] += 1
+                    print(f"\n♻️ Mesmo produto já processado nesta execução, pulando: {link[:60]}")
+                    continue
+                em_curso.add(chave)
+                try:
+                    contagem["iniciados"] += 1
+                    print(f"\n[{contagem['iniciados']}/{len(colhidos)}]")
+                    produto = await scraper.extrair_dados_produto(link)
+                    processados.update((chave, produto["chave"]))
+                finally:
+                    # Extração que falhou/foi cancelada não deixa o produto marcado como em curso
+                    em_curso.discard(chave)
+                await fila_resultados.put((produto, True))
+                # O intervalo entre produtos é dado pelo controle de ritmo (ver _navegar)
+            await fila_resultados.put(None)
+        
+        async def gravar():
+            restantes = extratores
+            while restantes:
+                item = await fila_resultados.get()
+                if item is None:
+                    restantes -= 1
+                    continue
+                produto, salvar_checkpoint = item
+                registrar(produto, salvar_checkpoint=salvar_checkpoint)
+        
+        # A listagem fica na página principal; os demais extratores usam abas da mesma sessão
+        abas: list["ScraperMLAfiliado"] = []
+        tarefas: list[asyncio.Task] = []
+        try:
+            try:
+                if em_serie:
+                    await listar()
+                for _ in range(extratores - 1 if usar_principal else extratores):
+                    aba = await self.abrir_aba()
+                    aba.trace = self.trace
+                    aba._prazo_run = self._prazo_run
+                    abas.append(aba)
+                paginas = [self] + abas if usar_principal else abas
+                tarefas = [asyncio.create_task(gravar())]
+                if not em_serie:
+                    tarefas.append(asyncio.create_task(listar()))
+                tarefas += [asyncio.create_task(extrair(scraper, n)) for n, scraper in enumerate(paginas, 1)]
+                await asyncio.gather(*tarefas)
+            finally:
+                # Estágio que falhou não deixa os outros rodando nas abas que vão fechar
+                for tarefa in tarefas:
+                    tarefa.cancel()
+                await asyncio.gather(*tarefas, return_exceptions=True)
+                for aba in abas:
+                    try:
+                        await aba._close_browser()
+                    except Exception:
+                        pass
+        except BaseException:
+            # Erro (ou cancelamento) no meio do pipeline: a execução fica retomável
+            self._prazo_produto = Prazo()
+            self._prazo_run = Prazo()
+            if checkpoint:
+                checkpoint.finalizar(self.run_id, "interrompido")
+            raise
+        
+        if situacao["erro_listagem"]:
+            if not colhidos:
+                self._prazo_produto = Prazo()
+                self._prazo_run = Prazo()
+                raise situacao["erro_listagem"]
+            print(f"\n⚠️ Listagem falhou depois de {len(colhidos)} links: {situacao['erro_listagem']}")
+            situacao["interrompido"] = True
+        interrompido = situacao["interrompido"]
+        
+        # Com vários extratores os produtos terminam fora de ordem: volta à ordem da listagem
+        if extratores > 1 and manter_resultados:
+            posicao = {link: i for i, link in enumerate(colhidos)}
+            produtos[anteriores:] = sorted(
+                produtos[anteriores:], key=lambda p: posicao.get(p["url_original"], len(posicao))
+            )
+        
+        # Prazos valem só para esta execução (o scraper pode ser reaproveitado)
+        self._prazo_produto = Prazo()
+        self._prazo_run = Prazo()
+        self.ranking.salvar()
+        if checkpoint:
+            checkpoint.finalizar(self.run_id, "interrompido" if interrompido else "concluido")
         
         # Resumo
-        sucesso = sum(1 for p in produtos if p["status"] == "sucesso")
-        falha = len(produtos) - sucesso
+        sucesso = contagem["sucesso"]
+        timeout = contagem["timeout"]
+        falha = contagem["total"] - sucesso - timeout
         
         print("\n" + "="*60)
-        print(f"✅ Concluído: {sucesso} com link | ❌ {falha} sem link")
+        print(f"✅ Concluído: {sucesso} com link | ❌ {falha} sem link | ⏱️ {timeout} timeout")
+        if contagem["duplicados"]:
+            print(f"♻️ {contagem['duplicados']} links eram do mesmo produto de outro e foram pulados")
+        trocadas = self.paginas_trocadas - trocadas_antes + sum(aba.paginas_trocadas for aba in abas)
+        if trocadas:
+            print(f"🩺 {trocadas} página(s) quebrada(s) substituída(s) durante a execução")
         print("="*60)
         
         return produtos
@@ -755,40 +1831,122 @@ class ScraperMLAfiliado:
         
         print(f"💾 Resultados salvos em: {arquivo}")
         return arquivo
-
-
+        
+        
 # =========================================
 # EXECUÇÃO
 # =========================================
 
 async def main():
     """Exemplo de uso"""
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Scraper de ofertas ML com links de afiliado")
+    parser.add_argument("--max-produtos", type=int, default=50)
+    parser.add_argument("--formato", choices=("json",) + FORMATOS, default="jsonl",
+                        help="json = arquivo único no fim; demais gravam cada produto ao ser extraído")
+    parser.add_argument("--compressao", choices=("gzip", "zstd"), default=None)
+    parser.add_argument("--rotacao-mb", type=float, default=None, help="Rotaciona o arquivo a cada N MB")
+    parser.add_argument("--rotacao-min", type=float, default=None, help="Rotaciona o arquivo a cada N minutos")
+    parser.add_argument("--saida", default=".", help="Diretório dos arquivos de resultado")
+    parser.add_argument("--resume", nargs="?", const="ultimo", default=None, metavar="RUN_ID",
+                        help="Retoma uma execução interrompida (sem RUN_ID: a mais recente)")
+    parser.add_argument("--min-desconto", type=int, default=None, help="Só ofertas com desconto >= N%%")
+    parser.add_argument("--preco-min", type=float, default=None)
+    parser.add_argument("--preco-max", type=float, default=None)
+    parser.add_argument("--incluir", nargs="*", default=[], metavar="PALAVRA", help="Título deve conter uma das palavras")
+    parser.add_argument("--excluir", nargs="*", default=[], metavar="PALAVRA", help="Título não pode conter as palavras")
+    parser.add_argument("--max-por-vendedor", type=int, default=None)
+    parser.add_argument("--agrupar-similares", action="store_true",
+                        help="Mesmo item de vendedores/anúncios diferentes: só a melhor oferta")
+    parser.add_argument("--concorrencia", type=int, default=1, help="Produtos extraídos em paralelo (abas)")
+    parser.add_argument("--sem-cache-estaticos", action="store_true",
+                        help="Não serve os JS/CSS do ML do cache local (scraper_data/estaticos)")
+    parser.add_argument("--trace", default=None, metavar="ARQUIVO",
+                        help="Grava o trace da execução (Chrome trace JSON, abre no Perfetto)")
+    args = parser.parse_args()
+    
+    filtros = FiltrosOferta(
+        min_desconto=args.min_desconto,
+        preco_min=args.preco_min,
+        preco_max=args.preco_max,
+        palavras_incluir=args.incluir,
+        palavras_excluir=args.excluir,
+        max_por_vendedor=args.max_por_vendedor,
+        agrupar_similares=args.agrupar_similares,
+    )
     
     print("\n" + "="*60)
     print("🛒 SCRAPER MERCADO LIVRE AFILIADO")
     print("="*60)
     
+    sink = None
+    if args.formato != "json":
+        sink = criar_sink(
+            args.formato,
+            args.saida,
+            compressao=args.compressao,
+            max_bytes=int(args.rotacao_mb * 1024 * 1024) if args.rotacao_mb else None,
+            max_segundos=args.rotacao_min * 60 if args.rotacao_min else None
+        )
+    
     # headless=False para ver o navegador (necessário para login manual)
-    async with ScraperMLAfiliado(
+    scraper = ScraperMLAfiliado(
         headless=False,
         wait_ms=1500,
-        max_produtos=50,
-        etiqueta="egnofertas"
-    ) as scraper:
-        
-        # Executa scraping
-        produtos = await scraper.scrape_ofertas()
-        
-        # Salva resultados
-        if produtos:
-            await scraper.salvar_resultados(produtos)
-            
-            # Mostra amostra
-            print("\n📋 Amostra dos resultados:")
-            for p in produtos[:3]:
-                print(f"\n  • {p['nome'][:50] if p['nome'] else 'N/A'}...")
-                print(f"    Preço: R$ {p['preco_atual']}")
-                print(f"    Link: {p['url_curta']}")
+        max_produtos=args.max_produtos,
+        etiqueta="egnofertas",
+        concorrencia=args.concorrencia
+    )
+    if not args.sem_cache_estaticos:
+        scraper.cache_estaticos = CacheEstaticos(os.path.join(scraper.data_dir, "estaticos"))
+    if args.trace:
+        scraper.trace = Rastreador()
+    try:
+        async with scraper:
+            
+            checkpoint = CheckpointStore(os.path.join(scraper.data_dir, "checkpoints"))
+            run_id = None
+            if args.resume:
+                run_id = checkpoint.ultimo_incompleto() if args.resume == "ultimo" else args.resume
+                if not run_id:
+                    print("⚠️ Nenhuma execução incompleta para retomar, iniciando do zero")
+            
+            # Executa scraping
+            try:
+                # Com sink, os produtos vão direto para disco (memória constante)
+                produtos = await scraper.scrape_ofertas(
+                    sink=sink,
+                    manter_resultados=sink is None,
+                    checkpoint=checkpoint,
+                    run_id=run_id,
+                    resume=bool(run_id),
+                    filtros=filtros
+                )
+            finally:
+                if sink:
+                    sink.fechar()
+            
+            # Salva resultados
+            if produtos:
+                if not sink:
+                    await scraper.salvar_resultados(produtos)
+                
+                # Mostra amostra
+                print("\n📋 Amostra dos resultados:")
+                for p in produtos[:3]:
+                    print(f"\n  • {p['nome'][:50] if p['nome'] else 'N/A'}...")
+                    print(f"    Preço: R$ {p['preco_atual']}")
+                    print(f"    Link: {p['url_curta']}")
+    finally:
+        if scraper.cache_estaticos:
+            scraper.cache_estaticos.fechar()
+    
+    if scraper.trace:
+        scraper.trace.run_id = scraper.run_id
+        with open(args.trace, 'w', encoding='utf-8') as f:
+            json.dump(scraper.trace.exportar_chrome(), f, ensure_ascii=False)
+        print(f"\n🧭 Trace salvo em {args.trace} (abra em https://ui.perfetto.dev)")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,302 @@
+"""
+Sinks de resultados em streaming (append-only)
+
+Cada produto é gravado assim que é extraído, em vez de um json.dump no fim
+da execução. Assim um crash não perde o que já foi feito (em jsonl/csv; o
+parquet só fica legível ao fechar cada arquivo) e execuções longas usam
+memória constante.
+
+Formatos: jsonl, csv e parquet (parquet requer pyarrow).
+Compressão: gzip ou zstd (zstd em jsonl/csv requer zstandard; no parquet a
+compressão é a interna do formato, com o zstd embutido no pyarrow).
+Rotação: por tamanho (bytes gravados, antes da compressão) e/ou por tempo.
+Nomes: {prefixo}_{data_hora}_{identificador}_{sequência}; o identificador
+(run_id ou aleatório) evita colisão entre execuções no mesmo segundo.
+
+Uso:
+    with criar_sink("jsonl", "./resultados", compressao="gzip") as sink:
+        sink.escrever(produto)
+"""
+
+import csv
+import gzip
+import io
+import json
+import os
+import time
+import uuid
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Optional
+
+from checkpoints_execucao import caminho_contido
+from modelo_produto import CAMPOS_PRODUTO
+
+try:
+    import zstandard
+except ImportError:  # opcional
+    zstandard = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # opcional
+    pa = None
+    pq = None
+
+
+FORMATOS = ("jsonl", "csv", "parquet")
+COMPRESSOES = (None, "gzip", "zstd")
+
+# Colunas fixas: CAMPOS_PRODUTO (modelo_produto.Produto); tipos das colunas numéricas
+CAMPOS_FLOAT = {"preco_original", "preco_atual", "preco_pix"}
+CAMPOS_INT = {"desconto"}
+
+
+class SinkResultados(ABC):
+    """
+    Base dos sinks: cuida de nomes de arquivo, rotação e compressão.
+
+    Subclasses implementam _abrir_arquivo/_gravar/_fechar_arquivo.
+    """
+
+    extensao = ""
+    # False = o formato comprime internamente (o arquivo não ganha .gz/.zst)
+    compressao_externa = True
+
+    def __init__(
+        self,
+        diretorio: str,
+        prefixo: str = "ofertas_ml",
+        compressao: Optional[str] = None,
+        max_bytes: Optional[int] = None,
+        max_segundos: Optional[float] = None,
+        identificador: Optional[str] = None,
+    ):
+        if compressao not in COMPRESSOES:
+            raise ValueError(f"Compressao invalida: {compressao}. Use uma de {COMPRESSOES}")
+        if compressao == "zstd" and self.compressao_externa and zstandard is None:
+            raise RuntimeError("Compressao zstd requer o pacote 'zstandard' (pip install zstandard)")
+
+        self.diretorio = diretorio
+        self.prefixo = prefixo
+        self.identificador = identificador or uuid.uuid4().hex[:8]
+        self.compressao = compressao
+        self.max_bytes = max_bytes
+        self.max_segundos = max_segundos
+
+        self.arquivos: list[str] = []
+        self.total = 0
+        self._sequencia = 0
+        self._bytes = 0
+        self._aberto_em = 0.0
+        self._caminho: Optional[str] = None
+
+        os.makedirs(self.diretorio, exist_ok=True)
+
+    # -----------------------------------------
+    # API pública
+    # -----------------------------------------
+
+    def escrever(self, produto: dict):
+        """Grava um produto (rotaciona o arquivo se necessário)"""
+        if self._caminho is None or self._precisa_rotacionar():
+            self._rotacionar()
+        self._bytes += self._gravar(produto)
+        self.total += 1
+
+    def descarregar(self):
+        """
+        Garante em disco tudo o que já foi escrito (chamado a cada checkpoint).
+
+        JSONL e CSV já fazem flush a cada produto; Parquet não tem como garantir
+        antes do close (ver SinkParquet).
+        """
+
+    def fechar(self):
+        """Fecha o arquivo atual"""
+        if self._caminho is not None:
+            self._fechar_arquivo()
+            self._caminho = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.fechar()
+
+    # -----------------------------------------
+    # Rotação
+    # -----------------------------------------
+
+    def _precisa_rotacionar(self) -> bool:
+        if self.max_bytes and self._bytes >= self.max_bytes:
+            return True
+        if self.max_segundos and time.monotonic() - self._aberto_em >= self.max_segundos:
+            return True
+        return False
+
+    def _rotacionar(self):
+        self.fechar()
+        self._sequencia += 1
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        nome = f"{self.prefixo}_{timestamp}_{self.identificador}_{self._sequencia:03d}.{self.extensao}"
+        if self.compressao_externa and self.compressao == "gzip":
+            nome += ".gz"
+        elif self.compressao_externa and self.compressao == "zstd":
+            nome += ".zst"
+        self._caminho = caminho_contido(self.diretorio, nome)
+        self._bytes = 0
+        self._aberto_em = time.monotonic()
+        self._abrir_arquivo(self._caminho)
+        self.arquivos.append(self._caminho)
+        print(f"💾 Gravando resultados em: {self._caminho}")
+
+    def _abrir_texto(self, caminho: str):
+        """Abre arquivo de texto em append aplicando a compressão configurada"""
+        if self.compressao == "gzip":
+            return gzip.open(caminho, 'at', encoding='utf-8', newline='')
+        if self.compressao == "zstd":
+            bruto = open(caminho, 'ab')
+            escritor = zstandard.ZstdCompressor().stream_writer(bruto, closefd=True)
+            return io.TextIOWrapper(escritor, encoding='utf-8', newline='', write_through=True)
+        return open(caminho, 'a', encoding='utf-8', newline='')
+
+    @abstractmethod
+    def _abrir_arquivo(self, caminho: str):
+        ...
+
+    @abstractmethod
+    def _gravar(self, produto: dict) -> int:
+        """Grava o produto e retorna quantos bytes (descomprimidos) foram escritos"""
+
+    @abstractmethod
+    def _fechar_arquivo(self):
+        ...
+
+
+class SinkJSONL(SinkResultados):
+    """Um produto JSON por linha"""
+
+    extensao = "jsonl"
+
+    def _abrir_arquivo(self, caminho: str):
+        self._arquivo = self._abrir_texto(caminho)
+
+    def _gravar(self, produto: dict) -> int:
+        linha = json.dumps(produto, ensure_ascii=False) + "\n"
+        self._arquivo.write(linha)
+        self._arquivo.flush()
+        return len(linha.encode('utf-8'))
+
+    def _fechar_arquivo(self):
+        self._arquivo.close()
+
+
+class SinkCSV(SinkResultados):
+    """CSV com colunas fixas; campos aninhados (fotos, parcelas) viram JSON"""
+
+    extensao = "csv"
+
+    def _abrir_arquivo(self, caminho: str):
+        self._arquivo = self._abrir_texto(caminho)
+        self._writer = csv.writer(self._arquivo)
+        self._writer.writerow(CAMPOS_PRODUTO)
+
+    def _gravar(self, produto: dict) -> int:
+        linha = []
+        for campo in CAMPOS_PRODUTO:
+            valor = produto.get(campo)
+            if isinstance(valor, (dict, list)):
+                valor = json.dumps(valor, ensure_ascii=False)
+            linha.append("" if valor is None else valor)
+        buffer = io.StringIO()
+        csv.writer(buffer).writerow(linha)
+        texto = buffer.getvalue()
+        self._arquivo.write(texto)
+        self._arquivo.flush()
+        return len(texto.encode('utf-8'))
+
+    def _fechar_arquivo(self):
+        self._arquivo.close()
+
+
+class SinkParquet(SinkResultados):
+    """
+    Parquet colunar gravado em row groups.
+
+    Produtos ficam em buffer até completar um lote (tamanho_lote) e então
+    viram um row group; o buffer é esvaziado ao fechar/rotacionar.
+
+    Não é durável a crash: o rodapé (metadados dos row groups) só é escrito
+    no close, então um arquivo ainda aberto não pode ser lido. Para execuções
+    longas use rotação (max_bytes/max_segundos): cada parte fechada fica íntegra.
+    """
+
+    extensao = "parquet"
+    compressao_externa = False
+
+    def __init__(self, *args, tamanho_lote: int = 200, **kwargs):
+        if pa is None:
+            raise RuntimeError("Formato parquet requer o pacote 'pyarrow' (pip install pyarrow)")
+        super().__init__(*args, **kwargs)
+        self.tamanho_lote = tamanho_lote
+        self._buffer: list[dict] = []
+        self._schema = pa.schema([
+            (campo, pa.float64() if campo in CAMPOS_FLOAT else pa.int64() if campo in CAMPOS_INT else pa.string())
+            for campo in CAMPOS_PRODUTO
+        ])
+
+    def _abrir_arquivo(self, caminho: str):
+        self._writer = pq.ParquetWriter(caminho, self._schema, compression=self.compressao or "none")
+
+    def _gravar(self, produto: dict) -> int:
+        linha = {}
+        for campo in CAMPOS_PRODUTO:
+            valor = produto.get(campo)
+            if isinstance(valor, (dict, list)):
+                valor = json.dumps(valor, ensure_ascii=False)
+            elif valor is not None and campo not in CAMPOS_FLOAT and campo not in CAMPOS_INT:
+                valor = str(valor)
+            linha[campo] = valor
+        self._buffer.append(linha)
+        if len(self._buffer) >= self.tamanho_lote:
+            self._descarregar()
+        return len(json.dumps(linha, ensure_ascii=False).encode('utf-8'))
+
+    def _descarregar(self):
+        if self._buffer:
+            self._writer.write_table(pa.Table.from_pylist(self._buffer, schema=self._schema))
+            self._buffer = []
+
+    def _fechar_arquivo(self):
+        self._descarregar()
+        self._writer.close()
+
+
+def criar_sink(
+    formato: str,
+    diretorio: str,
+    prefixo: str = "ofertas_ml",
+    compressao: Optional[str] = None,
+    max_bytes: Optional[int] = None,
+    max_segundos: Optional[float] = None,
+    identificador: Optional[str] = None,
+) -> SinkResultados:
+    """
+    Cria o sink do formato pedido (jsonl, csv ou parquet)
+
+    Args:
+        identificador: parte única dos nomes de arquivo (ex: run_id); None = aleatório
+    """
+    classes = {"jsonl": SinkJSONL, "csv": SinkCSV, "parquet": SinkParquet}
+    if formato not in classes:
+        raise ValueError(f"Formato invalido: {formato}. Use um de {FORMATOS}")
+    return classes[formato](
+        diretorio,
+        prefixo=prefixo,
+        compressao=compressao,
+        max_bytes=max_bytes,
+        max_segundos=max_segundos,
+        identificador=identificador,
+    )
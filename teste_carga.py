@@ -0,0 +1,532 @@
+#!/usr/bin/env python3
+"""
+Teste de carga da API com backend de scraper simulado
+======================================================
+
+Sobe a API (api_ml_afiliado) num processo separado com um ScraperFalso no
+lugar do ScraperMLAfiliado: sem browser, com latências sorteadas
+(lognormal: mediana e dispersão) e taxas de falha configuráveis. O resto é
+o código real: admissão (fila/429), reserva de browser/abas por conta,
+pipeline do scrape_ofertas, checkpoint, cache de links e serialização das
+respostas.
+
+N clientes concorrentes disparam uma mistura de endpoints durante a
+duração pedida. O relatório mostra vazão, latência (p50/p90/p99/máx), erros
+por tipo (429, 4xx, 5xx, conexão) por endpoint e o RSS do processo da API
+ao longo do tempo (junto com quantas requisições estavam em voo).
+
+Uso:
+    python teste_carga.py --clientes 20 --duracao 60
+    python teste_carga.py --clientes 50 --mix scrape=1,auth_status=5,auth_check=1 \\
+        --latencia-produto 800:0.6 --falha-produto 0.05 --max-scrapes 2
+    python teste_carga.py --url http://localhost:8000 --pid 1234   # API já rodando
+
+Estado (checkpoints, cache, perfil com cookies falsos) vai para um
+diretório temporário; o perfil/dados reais não são tocados.
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import socket
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+import httpx
+
+from scraper_ml_afiliado import ScraperMLAfiliado
+
+
+# =========================================
+# BACKEND SIMULADO
+# =========================================
+
+@dataclass
+class Latencia:
+    """Lognormal com mediana (ms) e dispersão sigma (0 = constante)"""
+    mediana_ms: float
+    sigma: float = 0.5
+
+    @classmethod
+    def parse(cls, texto: str) -> "Latencia":
+        """"800" ou "800:0.6" (mediana_ms[:sigma])"""
+        mediana, _, sigma = texto.partition(":")
+        return cls(float(mediana), float(sigma) if sigma else 0.5)
+
+    def amostrar_s(self) -> float:
+        if self.sigma <= 0:
+            return self.mediana_ms / 1000
+        return random.lognormvariate(math.log(self.mediana_ms), self.sigma) / 1000
+
+
+@dataclass
+class ConfigBackend:
+    init: Latencia = field(default_factory=lambda: Latencia(3000, 0.3))
+    login: Latencia = field(default_factory=lambda: Latencia(1500, 0.4))
+    listagem: Latencia = field(default_factory=lambda: Latencia(2000, 0.4))
+    produto: Latencia = field(default_factory=lambda: Latencia(4000, 0.5))
+    falha_init: float = 0.0  # browser não abre (exceção)
+    falha_login: float = 0.0  # verificar_login retorna False
+    falha_produto: float = 0.02  # status "erro"
+    sem_link: float = 0.05  # status "sem_link"
+
+
+class ContextoFalso:
+    """Só identidade: abas da mesma sessão compartilham o contexto"""
+
+
+class ScraperFalso(ScraperMLAfiliado):
+    """
+    ScraperMLAfiliado sem browser: navegações viram sleeps sorteados.
+
+    Substitui só as bordas (abrir/fechar browser, abas, login, listagem e
+    visita ao produto); scrape_ofertas, checkpoint e registro rodam reais.
+    """
+
+    config = ConfigBackend()
+
+    async def _abrir_browser(self):
+        await asyncio.sleep(self.config.init.amostrar_s())
+        if random.random() < self.config.falha_init:
+            raise RuntimeError("Falha simulada ao abrir o browser")
+        self.context = ContextoFalso()
+
+    async def abrir_aba(self) -> "ScraperFalso":
+        aba = ScraperFalso(
+            headless=self.headless,
+            wait_ms=self.wait_ms,
+            max_produtos=self.max_produtos,
+            etiqueta=self.etiqueta,
+            user_data_dir=self.user_data_dir,
+            data_dir=self.data_dir,
+            produto_timeout_s=self.produto_timeout_s,
+            run_timeout_s=self.run_timeout_s,
+            pacing=self.pacing,
+            cache_imagens=self.cache_imagens,
+            cache_estaticos=self.cache_estaticos,
+            identidades=self.identidades
+        )
+        aba.ranking = self.ranking
+        aba.context = self.context
+        aba.login_verificado_em = self.login_verificado_em
+        aba._aba = True
+        return aba
+
+    async def _close_browser(self):
+        self.context = None
+        self.login_verificado_em = None
+
+    @property
+    def browser_ativo(self) -> bool:
+        return self.context is not None
+
+    async def garantir_pagina(self) -> bool:
+        return False
+
+    async def _verificar_login(self) -> bool:
+        await asyncio.sleep(self.config.login.amostrar_s())
+        logado = random.random() >= self.config.falha_login
+        self.login_verificado_em = time.monotonic() if logado else None
+        return logado
+
+    async def _colher_links(self, url=None, filtros=None, limite=None, max_rodadas=4):
+        limite = limite or self.max_produtos
+        with self._span("listagem", url=url, simulado=True):
+            await asyncio.sleep(self.config.listagem.amostrar_s())
+            links = [f"https://www.mercadolivre.com.br/p/MLB{random.randrange(10**7, 10**8)}" for _ in range(limite)]
+            # Lotes como a listagem real (um por rodada de scroll)
+            for inicio in range(0, len(links), 10):
+                if inicio:
+                    await asyncio.sleep(self.config.listagem.amostrar_s() / 4)
+                yield links[inicio:inicio + 10]
+
+    async def _extrair_dados_produto(self, url: str) -> dict:
+        produto = self._novo_produto(url)
+        espera = self.config.produto.amostrar_s()
+        restante_ms = self._restante_ms()
+        limite = math.inf if restante_ms is None else max(0.0, restante_ms / 1000)
+        await asyncio.sleep(min(espera, limite))
+        if espera > limite:
+            produto["status"], produto["erro"] = "timeout", "Prazo esgotado"
+            return produto
+
+        sorteio = random.random()
+        if sorteio < self.config.falha_produto:
+            produto["status"], produto["erro"] = "erro", "Falha simulada"
+            return produto
+        produto.update({
+            "mlb_id": url.rsplit("/", 1)[-1],
+            "nome": f"Produto simulado {url[-6:]}",
+            "preco_atual": round(random.uniform(20, 2000), 2),
+            "item_id": f"MLB{random.randrange(10**9, 10**10)}",
+        })
+        produto["chave"] = self.identidades.aprender(url, url, produto["item_id"])
+        if sorteio < self.config.falha_produto + self.config.sem_link:
+            produto["status"] = "sem_link"
+        else:
+            produto["url_curta"] = f"https://mercadolivre.com/sec/{random.randrange(16**6):06x}"
+            produto["url_afiliado"] = f"{url}?matt_tool={self.etiqueta}"
+            produto["status"] = "sucesso"
+        return produto
+
+
+def _criar_perfil_falso(perfil: str):
+    """Perfil com banco de cookies contendo uma sessão do ML válida por 30 dias (ver cookies_perfil)"""
+    os.makedirs(os.path.join(perfil, "Default", "Network"), exist_ok=True)
+    epoca = datetime(1601, 1, 1, tzinfo=timezone.utc)
+    agora = datetime.now(timezone.utc)
+    microssegundos = lambda d: int((d - epoca).total_seconds() * 1e6)
+    db = sqlite3.connect(os.path.join(perfil, "Default", "Network", "Cookies"))
+    db.execute(
+        "CREATE TABLE IF NOT EXISTS cookies (creation_utc INTEGER, host_key TEXT, name TEXT, "
+        "value TEXT, expires_utc INTEGER, has_expires INTEGER)"
+    )
+    db.execute(
+        "INSERT INTO cookies VALUES (?, '.mercadolivre.com.br', 'ssid', '', ?, 1)",
+        (microssegundos(agora), microssegundos(agora + timedelta(days=30))),
+    )
+    db.commit()
+    db.close()
+
+
+def servir(args):
+    """
+    Processo da API com o backend simulado (chamado pelo próprio script).
+
+    Os dados ficam em args.dados, diretório temporário criado e removido pelo
+    processo principal (o uvicorn encerra repassando o SIGTERM, sem finally aqui).
+    """
+    os.environ["SCRAPER_DATA_DIR"] = os.path.join(args.dados, "scraper_data")
+    os.environ["ML_BROWSER_DATA_DIR"] = os.path.join(args.dados, "ml_browser_data")
+    _criar_perfil_falso(os.environ["ML_BROWSER_DATA_DIR"])
+
+    ScraperFalso.config = config_backend(args)
+    import contas_afiliado
+    contas_afiliado.ScraperMLAfiliado = ScraperFalso  # SessaoConta.novo_scraper
+    import uvicorn
+    import api_ml_afiliado
+    uvicorn.run(api_ml_afiliado.app, host="127.0.0.1", port=args.porta, log_level="warning")
+
+
+def config_backend(args) -> ConfigBackend:
+    return ConfigBackend(
+        init=Latencia.parse(args.latencia_init),
+        login=Latencia.parse(args.latencia_login),
+        listagem=Latencia.parse(args.latencia_listagem),
+        produto=Latencia.parse(args.latencia_produto),
+        falha_init=args.falha_init,
+        falha_login=args.falha_login,
+        falha_produto=args.falha_produto,
+        sem_link=args.sem_link,
+    )
+
+
+# =========================================
+# CLIENTES
+# =========================================
+
+def cenarios(args) -> dict:
+    """Endpoint -> (método, caminho, corpo)"""
+    colunas = f"?fields={args.fields}" if args.fields else ""
+    return {
+        "scrape": lambda: ("POST", f"/scrape/ofertas{colunas}", {
+            "max_produtos": args.produtos,
+            "concorrencia": args.concorrencia_scrape,
+            "cachear_imagens": False,
+            "enviar_webhooks": False,
+            "produto_timeout_s": args.produto_timeout_s,
+        }),
+        "produtos": lambda: ("POST", f"/scrape/produtos{colunas}", {
+            "itens": [f"MLB{random.randrange(10**7, 10**8)}" for _ in range(args.produtos)],
+            "concorrencia": args.concorrencia_scrape,
+            "cachear_imagens": False,
+            "produto_timeout_s": args.produto_timeout_s,
+        }),
+        "auth_status": lambda: ("GET", "/auth/status", None),
+        "auth_check": lambda: ("GET", "/auth/check", None),
+        "health": lambda: ("GET", "/health", None),
+        "admissao": lambda: ("GET", "/stats/admissao", None),
+    }
+
+
+def parse_mix(texto: str, disponiveis: dict) -> dict[str, float]:
+    """"scrape=1,auth_status=3" -> pesos por cenário"""
+    mix = {}
+    for parte in texto.split(","):
+        nome, _, peso = parte.strip().partition("=")
+        if nome not in disponiveis:
+            raise SystemExit(f"Cenario desconhecido: {nome} (use {', '.join(disponiveis)})")
+        mix[nome] = float(peso or 1)
+    return mix
+
+
+def ler_rss_mb(pid: Optional[int]) -> Optional[float]:
+    """RSS do processo (Linux /proc; psutil se instalado)"""
+    if pid is None:
+        return None
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for linha in f:
+                if linha.startswith("VmRSS:"):
+                    return int(linha.split()[1]) / 1024
+    except OSError:
+        pass
+    try:
+        import psutil
+        return psutil.Process(pid).memory_info().rss / 1024 / 1024
+    except Exception:
+        return None
+
+
+def percentil(valores: list[float], p: float) -> Optional[float]:
+    if not valores:
+        return None
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, max(0, math.ceil(p / 100 * len(ordenados)) - 1))]
+
+
+async def gerar_carga(args, base_url: str, pid: Optional[int]) -> dict:
+    disponiveis = cenarios(args)
+    mix = parse_mix(args.mix, disponiveis)
+    nomes, pesos = list(mix), list(mix.values())
+    amostras: list[tuple] = []  # (cenario, status, latencia_s, fim_s)
+    linha_tempo: list[dict] = []
+    em_voo = 0
+    inicio = time.monotonic()
+    fim = inicio + args.duracao
+
+    async def cliente(http: httpx.AsyncClient):
+        nonlocal em_voo
+        while time.monotonic() < fim:
+            nome = random.choices(nomes, weights=pesos)[0]
+            metodo, caminho, corpo = disponiveis[nome]()
+            em_voo += 1
+            t0 = time.monotonic()
+            try:
+                resposta = await http.request(metodo, caminho, json=corpo)
+                status = resposta.status_code
+            except httpx.HTTPError as e:
+                status = f"conexao:{type(e).__name__}"
+            finally:
+                em_voo -= 1
+            amostras.append((nome, status, time.monotonic() - t0, time.monotonic() - inicio))
+            if args.pausa_ms:
+                await asyncio.sleep(random.uniform(0, 2 * args.pausa_ms) / 1000)
+
+    async def amostrar_memoria():
+        while time.monotonic() < fim:
+            linha_tempo.append({
+                "t_s": round(time.monotonic() - inicio, 1),
+                "rss_mb": ler_rss_mb(pid),
+                "em_voo": em_voo,
+                "concluidas": len(amostras),
+            })
+            await asyncio.sleep(args.intervalo_rss_s)
+
+    limites = httpx.Limits(max_connections=args.clientes, max_keepalive_connections=args.clientes)
+    async with httpx.AsyncClient(
+        base_url=base_url,
+        headers={"X-API-Key": args.api_key},
+        timeout=args.timeout_s,
+        limits=limites
+    ) as http:
+        print(f"🚀 {args.clientes} clientes por {args.duracao}s: {mix}")
+        memoria = asyncio.create_task(amostrar_memoria())
+        await asyncio.gather(*(cliente(http) for _ in range(args.clientes)))
+        memoria.cancel()
+    duracao = time.monotonic() - inicio
+    linha_tempo.append({"t_s": round(duracao, 1), "rss_mb": ler_rss_mb(pid), "em_voo": 0, "concluidas": len(amostras)})
+    return relatorio(amostras, linha_tempo, duracao, args)
+
+
+def relatorio(amostras: list[tuple], linha_tempo: list[dict], duracao: float, args) -> dict:
+    por_cenario: dict[str, dict] = {}
+    for nome in sorted({a[0] for a in amostras}):
+        do_cenario = [a for a in amostras if a[0] == nome]
+        latencias = [a[2] * 1000 for a in do_cenario]
+        ok = [a for a in do_cenario if isinstance(a[1], int) and a[1] < 400]
+        por_cenario[nome] = {
+            "total": len(do_cenario),
+            "ok": len(ok),
+            "vazao_rps": round(len(ok) / duracao, 2),
+            "erros": {
+                "429": sum(1 for a in do_cenario if a[1] == 429),
+                "4xx": sum(1 for a in do_cenario if isinstance(a[1], int) and 400 <= a[1] < 500 and a[1] != 429),
+                "5xx": sum(1 for a in do_cenario if isinstance(a[1], int) and a[1] >= 500),
+                "conexao": sum(1 for a in do_cenario if not isinstance(a[1], int)),
+            },
+            "taxa_erro": round(1 - len(ok) / len(do_cenario), 3) if do_cenario else 0,
+            "latencia_ms": {
+                "p50": round(percentil(latencias, 50)),
+                "p90": round(percentil(latencias, 90)),
+                "p99": round(percentil(latencias, 99)),
+                "max": round(max(latencias)),
+            },
+        }
+
+    rss = [p["rss_mb"] for p in linha_tempo if p["rss_mb"] is not None]
+    pico_em_voo = max((p["em_voo"] for p in linha_tempo), default=0)
+    memoria = None
+    if rss:
+        memoria = {
+            "inicial_mb": round(rss[0], 1),
+            "pico_mb": round(max(rss), 1),
+            "final_mb": round(rss[-1], 1),
+            # Estimativa grosseira: crescimento até o pico dividido pelo pico de requisições em voo
+            "por_requisicao_em_voo_mb": round((max(rss) - rss[0]) / pico_em_voo, 2) if pico_em_voo else None,
+        }
+    return {
+        "executado_em": datetime.now().isoformat(),
+        "duracao_s": round(duracao, 1),
+        "clientes": args.clientes,
+        "mix": args.mix,
+        "total": len(amostras),
+        "vazao_rps": round(sum(c["ok"] for c in por_cenario.values()) / duracao, 2),
+        "pico_em_voo": pico_em_voo,
+        "cenarios": por_cenario,
+        "memoria": memoria,
+        "linha_tempo": linha_tempo,
+    }
+
+
+def imprimir(rel: dict):
+    print(f"\n{'='*78}")
+    print(f"RESULTADO: {rel['total']} requisições em {rel['duracao_s']}s | "
+          f"{rel['vazao_rps']} req/s ok | pico em voo: {rel['pico_em_voo']}")
+    print(f"{'='*78}")
+    print(f"{'cenario':<12} {'total':>6} {'ok':>6} {'rps':>7} {'429':>5} {'4xx':>5} {'5xx':>5} {'conn':>5} "
+          f"{'p50':>7} {'p90':>7} {'p99':>7} {'max':>7}")
+    for nome, c in rel["cenarios"].items():
+        lat, err = c["latencia_ms"], c["erros"]
+        print(f"{nome:<12} {c['total']:>6} {c['ok']:>6} {c['vazao_rps']:>7} {err['429']:>5} {err['4xx']:>5} "
+              f"{err['5xx']:>5} {err['conexao']:>5} {lat['p50']:>7} {lat['p90']:>7} {lat['p99']:>7} {lat['max']:>7}")
+    print("(latências em ms)")
+
+    memoria = rel["memoria"]
+    if memoria:
+        print(f"\nRSS da API: {memoria['inicial_mb']} MB -> pico {memoria['pico_mb']} MB -> final {memoria['final_mb']} MB"
+              f" (~{memoria['por_requisicao_em_voo_mb']} MB por requisição em voo)")
+        passo = max(1, len(rel["linha_tempo"]) // 20)
+        for ponto in rel["linha_tempo"][::passo]:
+            barra = "#" * int((ponto["rss_mb"] or 0) / max(memoria["pico_mb"], 1) * 40)
+            print(f"  {ponto['t_s']:>6}s {ponto['rss_mb'] or 0:>8.1f} MB  em voo {ponto['em_voo']:>4}  {barra}")
+    else:
+        print("\nRSS indisponível (informe --pid, ou use Linux/psutil)")
+
+
+def porta_livre() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def esperar_api(base_url: str, processo: Optional[subprocess.Popen], timeout_s: float = 60):
+    limite = time.monotonic() + timeout_s
+    async with httpx.AsyncClient(base_url=base_url, timeout=2) as http:
+        while time.monotonic() < limite:
+            if processo and processo.poll() is not None:
+                raise SystemExit(f"A API simulada encerrou (código {processo.returncode}); veja --log-servidor")
+            try:
+                if (await http.get("/health")).status_code == 200:
+                    return
+            except httpx.HTTPError:
+                pass
+            await asyncio.sleep(0.3)
+    raise SystemExit(f"API nao respondeu em {timeout_s}s: {base_url}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Teste de carga da API com backend de scraper simulado")
+    parser.add_argument("--clientes", type=int, default=10, help="Clientes concorrentes")
+    parser.add_argument("--duracao", type=float, default=30, help="Segundos de carga")
+    parser.add_argument("--mix", default="scrape=1,auth_status=4,auth_check=1",
+                        help="Pesos por cenario: scrape, produtos, auth_status, auth_check, health, admissao")
+    parser.add_argument("--produtos", type=int, default=5, help="max_produtos (scrape) / itens (produtos) por requisição")
+    parser.add_argument("--concorrencia-scrape", type=int, default=1, help="'concorrencia' nos POSTs de scraping")
+    parser.add_argument("--produto-timeout-s", type=float, default=25)
+    parser.add_argument("--fields", default=None, help="Colunas dos produtos nas respostas (ex: mlb_id,url_curta)")
+    parser.add_argument("--pausa-ms", type=float, default=0, help="Pausa média de cada cliente entre requisições")
+    parser.add_argument("--timeout-s", type=float, default=600, help="Timeout HTTP do cliente")
+    parser.add_argument("--intervalo-rss-s", type=float, default=1.0)
+    parser.add_argument("--saida", default=None, metavar="ARQUIVO", help="Relatório completo em JSON")
+    # API já rodando (sem backend simulado)
+    parser.add_argument("--url", default=None, help="Usa uma API já rodando em vez de subir a simulada")
+    parser.add_argument("--pid", type=int, default=None, help="PID da API externa (para medir RSS)")
+    parser.add_argument("--api-key", default=os.getenv("SCRAPER_API_KEY", "egn-2025-secret-key"))
+    # API simulada
+    parser.add_argument("--max-scrapes", type=int, default=None, help="MAX_SCRAPES_CONCORRENTES da API simulada")
+    parser.add_argument("--max-fila", type=int, default=None, help="MAX_FILA_SCRAPES da API simulada")
+    parser.add_argument("--preaquecer", action="store_true", help="Aquece o browser simulado no startup")
+    parser.add_argument("--log-servidor", default=None, metavar="ARQUIVO", help="Saída da API simulada (padrão: descartada)")
+    parser.add_argument("--latencia-init", default="3000:0.3", metavar="MS[:SIGMA]", help="Abrir browser")
+    parser.add_argument("--latencia-login", default="1500:0.4", metavar="MS[:SIGMA]", help="verificar_login")
+    parser.add_argument("--latencia-listagem", default="2000:0.4", metavar="MS[:SIGMA]", help="Página de ofertas")
+    parser.add_argument("--latencia-produto", default="4000:0.5", metavar="MS[:SIGMA]", help="Dados + link de um produto")
+    parser.add_argument("--falha-init", type=float, default=0.0, help="Probabilidade do browser não abrir")
+    parser.add_argument("--falha-login", type=float, default=0.0, help="Probabilidade de sessão deslogada")
+    parser.add_argument("--falha-produto", type=float, default=0.02, help="Probabilidade de erro no produto")
+    parser.add_argument("--sem-link", type=float, default=0.05, help="Probabilidade de produto sem link")
+    # Interno: processo da API simulada
+    parser.add_argument("--servidor", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--porta", type=int, default=None, help=argparse.SUPPRESS)
+    parser.add_argument("--dados", default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.servidor:
+        servir(args)
+        return
+
+    processo = None
+    dados = None
+    base_url, pid = args.url, args.pid
+    if base_url is None:
+        args.porta = porta_livre()
+        base_url = f"http://127.0.0.1:{args.porta}"
+        ambiente = {**os.environ, "PREAQUECER": "1" if args.preaquecer else "0", "PYTHONUNBUFFERED": "1"}
+        if args.max_scrapes:
+            ambiente["MAX_SCRAPES_CONCORRENTES"] = str(args.max_scrapes)
+        if args.max_fila is not None:
+            ambiente["MAX_FILA_SCRAPES"] = str(args.max_fila)
+        saida = open(args.log_servidor, "w") if args.log_servidor else subprocess.DEVNULL
+        # Checkpoints, caches e perfil falso da API simulada: removidos no fim (finally abaixo)
+        dados = tempfile.TemporaryDirectory(prefix="teste_carga_", ignore_cleanup_errors=True)
+        comando = [
+            sys.executable, os.path.abspath(__file__), *sys.argv[1:],
+            "--servidor", "--porta", str(args.porta), "--dados", dados.name,
+        ]
+        processo = subprocess.Popen(comando, env=ambiente, stdout=saida, stderr=subprocess.STDOUT)
+        pid = processo.pid
+        print(f"🧪 API simulada em {base_url} (pid {pid})")
+
+    try:
+        asyncio.run(esperar_api(base_url, processo))
+        rel = asyncio.run(gerar_carga(args, base_url, pid))
+    finally:
+        if processo:
+            processo.terminate()
+            try:
+                processo.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                processo.kill()
+                processo.wait()
+        if dados:
+            dados.cleanup()
+
+    imprimir(rel)
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as f:
+            json.dump(rel, f, ensure_ascii=False, indent=2)
+        print(f"\n💾 Relatório salvo em: {args.saida}")
+
+
+if __name__ == "__main__":
+    main()
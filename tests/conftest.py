@@ -0,0 +1,6 @@
+"""Os módulos ficam na raiz do repositório (como no container): deixa importáveis nos testes"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
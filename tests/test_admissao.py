@@ -0,0 +1,97 @@
+import asyncio
+
+import pytest
+
+from admissao import ControleAdmissao, FilaCheia
+
+
+def test_executa_direto_ate_o_limite_e_depois_enfileira():
+    async def cenario():
+        controle = ControleAdmissao(max_concorrentes=2, max_fila=5)
+        primeira, segunda = controle.entrar(), controle.entrar()
+        terceira = controle.entrar()
+        assert controle.ativos == 2
+        assert controle.na_fila == 1
+        async with primeira:
+            pass
+        # A vaga liberada passa para quem estava na fila
+        assert controle.ativos == 2
+        async with terceira:
+            assert controle.na_fila == 0
+        async with segunda:
+            pass
+        assert controle.ativos == 0
+
+    asyncio.run(cenario())
+
+
+def test_fila_cheia_recusa_com_retry_after():
+    async def cenario():
+        controle = ControleAdmissao(max_concorrentes=1, max_fila=1)
+        controle.entrar()
+        controle.entrar()
+        with pytest.raises(FilaCheia) as erro:
+            controle.entrar()
+        assert erro.value.retry_after_s >= 1
+        assert controle.recusados == 1
+
+    asyncio.run(cenario())
+
+
+def test_prioridade_alta_passa_na_frente():
+    async def cenario():
+        controle = ControleAdmissao(max_concorrentes=1, max_fila=5)
+        ordem = []
+
+        async def rodar(vaga, nome):
+            async with vaga:
+                ordem.append(nome)
+
+        ocupada = controle.entrar()
+        tarefas = [
+            asyncio.create_task(rodar(controle.entrar("baixa"), "baixa")),
+            asyncio.create_task(rodar(controle.entrar("normal"), "normal")),
+            asyncio.create_task(rodar(controle.entrar("alta"), "alta")),
+        ]
+        await asyncio.sleep(0)
+        assert controle.resumo()["fila_por_prioridade"] == {"alta": 1, "normal": 1, "baixa": 1}
+        async with ocupada:
+            pass
+        await asyncio.gather(*tarefas)
+        assert ordem == ["alta", "normal", "baixa"]
+
+    asyncio.run(cenario())
+
+
+def test_cliente_que_desiste_na_fila_nao_prende_a_vaga():
+    async def cenario():
+        controle = ControleAdmissao(max_concorrentes=1, max_fila=5)
+        ocupada = controle.entrar()
+        desistente = controle.entrar()
+        seguinte = controle.entrar()
+
+        async def esperar(vaga):
+            async with vaga:
+                pass
+
+        tarefa = asyncio.create_task(esperar(desistente))
+        await asyncio.sleep(0)
+        tarefa.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await tarefa
+        assert controle.na_fila == 1
+
+        async with ocupada:
+            pass
+        await asyncio.wait_for(esperar(seguinte), timeout=1)
+        assert controle.ativos == 0
+
+    asyncio.run(cenario())
+
+
+def test_prioridade_invalida():
+    async def cenario():
+        with pytest.raises(ValueError):
+            ControleAdmissao().entrar("urgente")
+
+    asyncio.run(cenario())
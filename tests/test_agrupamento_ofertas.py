@@ -0,0 +1,92 @@
+from agrupamento_ofertas import AgrupadorOfertas, codigos, id_foto, normalizar_titulo
+from scraper_ml_afiliado import FiltrosOferta
+
+
+FOTO = "https://http2.mlstatic.com/D_NQ_NP_2X_812345-MLA79012345678_012024-F.webp"
+
+
+def card(url, nome, preco, desconto=None, imagem=None, **extras):
+    return {"url": url, "nome": nome, "preco_atual": preco, "desconto": desconto, "imagem": imagem, **extras}
+
+
+def test_normalizar_titulo_remove_acentos_e_junta_unidades():
+    palavras = normalizar_titulo("Fone de Ouvido Sem Fio Promoção 128 GB")
+    assert palavras == frozenset({"fone", "ouvido", "sem", "fio", "128gb"})
+    assert codigos(palavras) == frozenset({"128gb"})
+
+
+def test_id_foto_igual_em_tamanhos_diferentes():
+    outra = FOTO.replace("2X_", "").replace("-F.webp", "-O.jpg")
+    assert id_foto(FOTO) == id_foto(outra) == "812345-MLA79012345678_012024"
+    assert id_foto("https://example.com/foto.jpg") is None
+
+
+def test_titulos_parecidos_e_preco_proximo_viram_um_grupo():
+    cards = [
+        card("a", "Fone JBL Tune 520BT Bluetooth Preto", 199.0),
+        card("b", "Fone De Ouvido JBL Tune 520BT Bluetooth Preto", 189.0),
+        card("c", "Cafeteira Expresso Oster 15 Bar", 499.0),
+    ]
+    assert AgrupadorOfertas().grupos(cards) == [[0, 1], [2]]
+
+
+def test_codigos_diferentes_nao_agrupam():
+    cards = [
+        card("a", "Smartphone Samsung Galaxy A15 128gb Azul", 899.0),
+        card("b", "Smartphone Samsung Galaxy A25 128gb Azul", 899.0),
+    ]
+    assert AgrupadorOfertas().grupos(cards) == [[0], [1]]
+
+
+def test_preco_distante_nao_agrupa_mesmo_com_a_mesma_foto():
+    cards = [card("a", "Kit 1", 50.0, imagem=FOTO), card("b", "Kit 2", 500.0, imagem=FOTO)]
+    assert AgrupadorOfertas().grupos(cards) == [[0], [1]]
+
+
+def test_mesma_foto_agrupa_titulos_diferentes():
+    cards = [card("a", "Panela", 100.0, imagem=FOTO), card("b", "Jogo de panelas antiaderente", 105.0, imagem=FOTO)]
+    assert AgrupadorOfertas().grupos(cards) == [[0, 1]]
+
+
+def test_representante_e_a_menor_oferta_com_similares():
+    cards = [
+        card("a", "Fone JBL Tune 520BT Bluetooth Preto", 199.0),
+        card("b", "Fone De Ouvido JBL Tune 520BT Bluetooth Preto", 189.0),
+    ]
+    agrupador = AgrupadorOfertas()
+    escolhidos = agrupador.representantes(cards)
+    assert [c["url"] for c in escolhidos] == ["b"]
+    assert escolhidos[0]["similares"] == ["a"]
+    assert agrupador.agrupados == 1
+
+
+def test_representante_fixo_continua_mesmo_com_oferta_melhor():
+    cards = [
+        card("a", "Fone JBL Tune 520BT Bluetooth Preto", 199.0),
+        card("b", "Fone De Ouvido JBL Tune 520BT Bluetooth Preto", 189.0),
+    ]
+    escolhidos = AgrupadorOfertas().representantes(cards, fixos=["a"])
+    assert [c["url"] for c in escolhidos] == ["a"]
+
+
+def test_filtros_antes_do_agrupamento():
+    # A oferta mais barata do grupo não passa no desconto mínimo: o grupo
+    # continua representado pela oferta aprovada, em vez de sumir
+    cards = [
+        card("a", "Fone JBL Tune 520BT Bluetooth Preto", 189.0, desconto=10),
+        card("b", "Fone De Ouvido JBL Tune 520BT Bluetooth Preto", 199.0, desconto=35),
+    ]
+    com_grupo = FiltrosOferta(min_desconto=30, agrupar_similares=True).selecionar([dict(c) for c in cards], 10)
+    sem_grupo = FiltrosOferta(min_desconto=30).selecionar([dict(c) for c in cards], 10)
+    assert [c["url"] for c in com_grupo] == [c["url"] for c in sem_grupo] == ["b"]
+
+
+def test_limite_por_vendedor_depois_do_agrupamento():
+    cards = [
+        card("a", "Fone JBL Tune 520BT Bluetooth Preto", 189.0, vendedor="loja1"),
+        card("b", "Fone De Ouvido JBL Tune 520BT Bluetooth Preto", 199.0, vendedor="loja2"),
+        card("c", "Cafeteira Expresso Oster 15 Bar", 499.0, vendedor="loja1"),
+    ]
+    filtros = FiltrosOferta(agrupar_similares=True, max_por_vendedor=1)
+    assert [c["url"] for c in filtros.selecionar(cards, 10)] == ["a"]
+    assert filtros.agrupados == 1
@@ -0,0 +1,61 @@
+import time
+
+import pytest
+
+from cache_links import CacheLinks
+from identidade_produto import RegistroIdentidades
+
+
+CATALOGO = "https://www.mercadolivre.com.br/fone-jbl/p/MLB19698034"
+ANUNCIO = "https://produto.mercadolivre.com.br/MLB-4123456789-fone-jbl-_JM"
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = CacheLinks(str(tmp_path / "cache_links.db"))
+    yield cache
+    cache.fechar()
+
+
+def produto(chave, etiqueta="conta1", url_curta="https://mercadolivre.com/sec/1"):
+    return {"chave": chave, "etiqueta": etiqueta, "url_curta": url_curta, "url_original": ANUNCIO}
+
+
+def test_guarda_so_produto_com_link(cache):
+    assert cache.guardar(produto("i:MLB4123456789")) is True
+    assert cache.guardar(produto("i:MLB1", url_curta=None)) is False
+    assert cache.guardar(produto(None)) is False
+    assert cache.obter("i:MLB4123456789", "conta1")["url_curta"] == "https://mercadolivre.com/sec/1"
+    assert cache.obter("i:MLB4123456789", "conta2") is None
+
+
+def test_idade_maxima(cache):
+    cache.guardar(produto("i:MLB4123456789"), ts=int(time.time()) - 3600)
+    assert cache.obter("i:MLB4123456789", "conta1", max_idade_s=60) is None
+    assert cache.obter("i:MLB4123456789", "conta1", max_idade_s=7200)["cache_idade_s"] >= 3600
+    assert (cache.acertos, cache.faltas) == (1, 1)
+
+
+def test_link_acompanha_a_mudanca_de_chave(cache):
+    registro = RegistroIdentidades(ao_mudar_chave=cache.migrar_chaves)
+    chave_anuncio = registro.aprender(ANUNCIO)
+    cache.guardar(produto(chave_anuncio))
+
+    # O anúncio se revela do catálogo: a chave passa a ser a do catálogo
+    chave = registro.aprender(ANUNCIO, url_final=CATALOGO)
+    assert chave == "p:MLB19698034" != chave_anuncio
+    guardado = cache.obter(registro.chave(ANUNCIO), "conta1")
+    assert guardado["chave"] == chave
+    assert cache.obter(chave_anuncio, "conta1") is None
+    registro.fechar()
+
+
+def test_migrar_mantem_o_mais_recente_por_etiqueta(cache):
+    agora = int(time.time())
+    cache.guardar(produto("i:MLB1", url_curta="https://mercadolivre.com/sec/antigo"), ts=agora - 100)
+    cache.guardar(produto("p:MLB9", url_curta="https://mercadolivre.com/sec/novo"), ts=agora)
+    cache.guardar(produto("i:MLB1", etiqueta="conta2"), ts=agora - 100)
+    cache.migrar_chaves(["i:MLB1"], "p:MLB9")
+    assert cache.obter("p:MLB9", "conta1")["url_curta"] == "https://mercadolivre.com/sec/novo"
+    assert cache.obter("p:MLB9", "conta2")["chave"] == "p:MLB9"
+    assert cache.resumo()["produtos"] == 2
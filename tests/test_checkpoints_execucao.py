@@ -0,0 +1,71 @@
+import re
+
+import pytest
+
+from checkpoints_execucao import PADRAO_RUN_ID, CheckpointStore
+from rastreamento import ArmazemTraces
+
+
+LINKS = ["https://www.mercadolivre.com.br/a/p/MLB1", "https://www.mercadolivre.com.br/b/p/MLB2", "https://www.mercadolivre.com.br/c/p/MLB3"]
+
+
+@pytest.fixture
+def store(tmp_path):
+    return CheckpointStore(str(tmp_path / "checkpoints"))
+
+
+def test_novo_run_id_segue_o_padrao():
+    assert re.fullmatch(PADRAO_RUN_ID, CheckpointStore.novo_run_id())
+
+
+def test_carregar_separa_concluidos_e_pendentes(store):
+    store.iniciar("run1", "https://www.mercadolivre.com.br/ofertas", 3, pedido={"conta": "x"})
+    store.salvar_links("run1", LINKS)
+    store.registrar_produto("run1", {"url_original": LINKS[0], "status": "sucesso"})
+    store.registrar_produto("run1", {"url_original": LINKS[1], "status": "timeout"})
+    store.registrar_produto("run1", {"url_original": LINKS[2], "status": "erro"})
+    # Último registro vence: o erro refeito com sucesso conta como concluído
+    store.registrar_produto("run1", {"url_original": LINKS[2], "status": "sem_link"})
+
+    estado = store.carregar("run1")
+    assert estado["pedido"] == {"conta": "x"}
+    assert [p["url_original"] for p in estado["concluidos"]] == [LINKS[0], LINKS[2]]
+    assert estado["pendentes"] == [LINKS[1]]
+
+
+def test_linha_truncada_por_crash_e_ignorada(store):
+    store.iniciar("run1", None, None)
+    store.salvar_links("run1", LINKS[:2])
+    store.registrar_produto("run1", {"url_original": LINKS[0], "status": "sucesso"})
+    with open(store._produtos_path("run1"), 'a', encoding='utf-8') as f:
+        f.write('{"url_original": "https://www.merc')
+
+    estado = store.carregar("run1")
+    assert len(estado["concluidos"]) == 1
+    assert estado["pendentes"] == [LINKS[1]]
+
+
+def test_resume_mantem_o_pedido_original(store):
+    store.iniciar("run1", None, 3, pedido={"conta": "x"})
+    store.finalizar("run1", "interrompido")
+    meta = store.iniciar("run1", None, 3)
+    assert meta["status"] == "em_andamento"
+    assert meta["pedido"] == {"conta": "x"}
+
+
+def test_ultimo_incompleto(store):
+    assert store.ultimo_incompleto() is None
+    store.iniciar("antigo", None, None)
+    store.iniciar("novo", None, None)
+    store.finalizar("novo")
+    assert store.ultimo_incompleto() == "antigo"
+    assert store.carregar("inexistente") is None
+
+
+@pytest.mark.parametrize("run_id", ["../fora", "/tmp/fora", "a/../../fora"])
+def test_run_id_nao_escapa_do_diretorio(store, tmp_path, run_id):
+    with pytest.raises(ValueError):
+        store.iniciar(run_id, None, None)
+    with pytest.raises(ValueError):
+        ArmazemTraces(str(tmp_path / "traces")).carregar(run_id)
+    assert not (tmp_path / "fora.json").exists()
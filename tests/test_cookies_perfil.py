@@ -0,0 +1,78 @@
+import os
+import sqlite3
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from cookies_perfil import inspecionar_perfil
+
+
+EPOCA_CHROMIUM = datetime(1601, 1, 1, tzinfo=timezone.utc)
+
+
+def chromium(instante: datetime) -> int:
+    return int((instante - EPOCA_CHROMIUM).total_seconds() * 1_000_000)
+
+
+@pytest.fixture
+def perfil(tmp_path):
+    """Perfil com o banco de cookies em WAL, aberto como o Chromium deixa (sem checkpoint)"""
+    caminho = tmp_path / "Default" / "Network" / "Cookies"
+    caminho.parent.mkdir(parents=True)
+    db = sqlite3.connect(caminho)
+    db.execute("PRAGMA journal_mode=WAL")
+    db.execute("PRAGMA wal_autocheckpoint=0")
+    db.execute("CREATE TABLE cookies (name TEXT, host_key TEXT, creation_utc INTEGER, expires_utc INTEGER, has_expires INTEGER)")
+    db.commit()
+    yield str(tmp_path), db
+    db.close()
+
+
+def gravar(db, nome, dominio, criado, expira=None):
+    db.execute(
+        "INSERT INTO cookies VALUES (?, ?, ?, ?, ?)",
+        (nome, dominio, chromium(criado), chromium(expira) if expira else 0, 1 if expira else 0),
+    )
+    db.commit()
+
+
+def test_perfil_sem_banco(tmp_path):
+    sessao = inspecionar_perfil(str(tmp_path))
+    assert sessao["cookies_exist"] is False
+    assert sessao["logado"] is False
+
+
+def test_sessao_valida_ate_o_primeiro_cookie_expirar(perfil):
+    caminho, db = perfil
+    agora = datetime.now(timezone.utc)
+    gravar(db, "ssid", ".mercadolivre.com.br", agora - timedelta(days=1), agora + timedelta(days=30, hours=1))
+    gravar(db, "orguseridp", ".mercadolivre.com.br", agora - timedelta(days=2), agora + timedelta(days=10, hours=1))
+    gravar(db, "ssid", ".exemplo.com", agora, agora + timedelta(days=1))  # outro domínio: ignorado
+    gravar(db, "_ga", ".mercadolivre.com.br", agora, agora + timedelta(days=1))  # não é de sessão
+
+    sessao = inspecionar_perfil(caminho)
+    assert sessao["logado"] is True
+    assert sessao["dias_restantes"] == 10
+    assert sessao["cookies"] == ["orguseridp", "ssid"]
+
+
+def test_sessao_expirada(perfil):
+    caminho, db = perfil
+    agora = datetime.now(timezone.utc)
+    gravar(db, "ssid", ".mercadolivre.com.br", agora - timedelta(days=40), agora - timedelta(days=1))
+    sessao = inspecionar_perfil(caminho)
+    assert sessao["sessao_encontrada"] is True
+    assert sessao["logado"] is False
+
+
+def test_le_cookies_ainda_no_wal_e_renova_o_cache(perfil):
+    caminho, db = perfil
+    assert inspecionar_perfil(caminho)["sessao_encontrada"] is False
+
+    # Login novo: fica no -wal até o Chromium fazer checkpoint
+    gravar(db, "ssid", ".mercadolivre.com.br", datetime.now(timezone.utc))
+    assert os.path.getsize(os.path.join(caminho, "Default", "Network", "Cookies-wal")) > 0
+    sessao = inspecionar_perfil(caminho)
+    assert sessao["logado"] is True
+    # Cookie sem data: vale até o logout
+    assert sessao["expira_em"] is None
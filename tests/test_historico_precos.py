@@ -0,0 +1,63 @@
+import time
+
+import pytest
+
+from historico_precos import HistoricoPrecos
+
+
+@pytest.fixture
+def historico(tmp_path):
+    historico = HistoricoPrecos(str(tmp_path / "precos.db"))
+    yield historico
+    historico.fechar()
+
+
+def produto(mlb_id, preco, **extras):
+    return {"mlb_id": mlb_id, "preco_atual": preco, "nome": f"Produto {mlb_id}", **extras}
+
+
+def test_resumo_com_minimo_e_ultimo_preco(historico):
+    agora = int(time.time())
+    historico.registrar(produto("MLB1", 120.0), agora - 200)
+    historico.registrar(produto("MLB1", 90.0), agora - 100)
+    historico.registrar(produto("MLB1", 100.0), agora)
+    resumo = historico.resumo("MLB1")
+    assert resumo["ultimo_preco"] == 100.0
+    assert resumo["minimo_historico"] == 90.0
+    assert resumo["no_minimo"] is False
+    assert resumo["observacoes"] == 3
+    assert [o["preco_atual"] for o in historico.historico("MLB1")] == [100.0, 90.0, 120.0]
+
+
+def test_mesmo_segundo_substitui_sem_contar_de_novo(historico):
+    agora = int(time.time())
+    historico.registrar(produto("MLB1", 100.0), agora)
+    historico.registrar(produto("MLB1", 95.0), agora)
+    assert historico.resumo("MLB1")["observacoes"] == 1
+    assert [o["preco_atual"] for o in historico.historico("MLB1")] == [95.0]
+    # Lote com o mesmo timestamp: um produto repetido conta uma vez
+    assert historico.registrar_varios([produto("MLB2", 10.0), produto("MLB2", 10.0)], agora) == 2
+    assert historico.resumo("MLB2")["observacoes"] == 1
+
+
+def test_sem_mlb_id_ou_preco_nao_registra(historico):
+    assert historico.registrar({"preco_atual": 10.0}) is False
+    assert historico.registrar({"mlb_id": "MLB1", "preco_atual": None}) is False
+    assert historico.resumo("MLB1") is None
+
+
+def test_quedas_na_janela(historico):
+    agora = int(time.time())
+    historico.registrar(produto("MLB1", 200.0), agora - 3600)
+    historico.registrar(produto("MLB1", 150.0), agora)  # -25%
+    historico.registrar(produto("MLB2", 100.0), agora - 3600)
+    historico.registrar(produto("MLB2", 95.0), agora)  # -5%
+    historico.registrar(produto("MLB3", 300.0), agora - 48 * 3600)  # fora da janela
+    historico.registrar(produto("MLB3", 100.0), agora)
+
+    quedas = historico.quedas(percentual=10, horas=24)
+    assert [q["mlb_id"] for q in quedas] == ["MLB1"]
+    assert quedas[0]["preco_maximo_janela"] == 200.0
+    assert quedas[0]["queda_percentual"] == 25.0
+    assert [q["mlb_id"] for q in historico.quedas(percentual=1, horas=24)] == ["MLB1", "MLB2"]
+    assert [q["mlb_id"] for q in historico.quedas(percentual=10, horas=72)] == ["MLB3", "MLB1"]
@@ -0,0 +1,94 @@
+import pytest
+
+from identidade_produto import (
+    RegistroIdentidades,
+    extrair_ids,
+    id_principal,
+    url_canonica,
+    url_de_id,
+    url_mercadolivre,
+)
+
+
+CATALOGO = "https://www.mercadolivre.com.br/fone-jbl/p/MLB19698034"
+ANUNCIO = "https://produto.mercadolivre.com.br/MLB-4123456789-fone-jbl-_JM"
+
+
+@pytest.fixture
+def registro():
+    registro = RegistroIdentidades()
+    yield registro
+    registro.fechar()
+
+
+def test_extrair_ids_catalogo_com_anuncio_na_query_e_no_hash():
+    url = f"{CATALOGO}?pdp_filters=item_id:MLB4123456789#wid=MLB4123456789"
+    assert extrair_ids(url) == ["p:MLB19698034", "i:MLB4123456789"]
+
+
+def test_extrair_ids_anuncio_e_user_product():
+    assert extrair_ids(ANUNCIO) == ["i:MLB4123456789"]
+    assert extrair_ids("https://www.mercadolivre.com.br/up/MLBU123456789") == ["u:MLBU123456789"]
+    assert extrair_ids("https://www.mercadolivre.com.br/ofertas") == []
+    assert id_principal(ANUNCIO) == "MLB4123456789"
+
+
+def test_url_canonica():
+    assert url_canonica("http://WWW.MercadoLivre.com.br/x/p/MLB1/?a=1#b") == "https://www.mercadolivre.com.br/x/p/MLB1"
+
+
+def test_url_de_id():
+    assert url_de_id("MLB-4123456789") == "https://produto.mercadolivre.com.br/MLB-4123456789"
+    assert url_de_id("mlb4123456789", catalogo=True) == "https://www.mercadolivre.com.br/p/MLB4123456789"
+    assert url_de_id("MLBU123456789") == "https://www.mercadolivre.com.br/up/MLBU123456789"
+    assert url_de_id("abc") is None
+
+
+def test_url_mercadolivre():
+    assert url_mercadolivre(CATALOGO)
+    assert url_mercadolivre("https://www.mercadolibre.com.ar/x/p/MLA123")
+    assert not url_mercadolivre("https://mercadolivre.com.br.exemplo.com/p/MLB19698034")
+    assert not url_mercadolivre("ftp://www.mercadolivre.com.br/p/MLB19698034")
+
+
+def test_mesma_chave_em_todas_as_urls_do_produto(registro):
+    # Redirect do anúncio para o catálogo vincula os dois IDs
+    chave = registro.aprender(ANUNCIO, url_final=CATALOGO)
+    assert chave == "p:MLB19698034"
+    assert registro.chave(ANUNCIO) == registro.chave(CATALOGO) == chave
+    assert registro.chave(f"{CATALOGO}?tracking=1") == chave
+
+
+def test_chave_de_url_sem_id_e_a_url_canonica(registro):
+    assert registro.chave("https://www.mercadolivre.com.br/ofertas?page=2") == "https://www.mercadolivre.com.br/ofertas"
+
+
+def test_vincular_funde_grupos_preferindo_catalogo(registro):
+    registro.vincular("i:MLB4123456789", "u:MLBU123456789")
+    assert registro.chave(ANUNCIO) == "i:MLB4123456789"
+    registro.vincular("p:MLB19698034", "u:MLBU123456789")
+    assert registro.chave(ANUNCIO) == "p:MLB19698034"
+
+
+def test_item_id_da_pagina_vincula(registro):
+    registro.aprender(CATALOGO, item_id="MLB4123456789")
+    assert registro.chave(ANUNCIO) == registro.chave(CATALOGO)
+
+
+def test_deduplicar_mantem_ordem_e_canoniza(registro):
+    registro.aprender(ANUNCIO, url_final=CATALOGO)
+    outro = "https://www.mercadolivre.com.br/outro/p/MLB22222222"
+    assert registro.deduplicar([f"{CATALOGO}?a=1", ANUNCIO, outro]) == [CATALOGO, outro]
+
+
+def test_url_produto_aceita_so_produtos_do_mercado_livre(registro):
+    assert registro.url_produto(f"  {CATALOGO}  ") == CATALOGO
+    assert registro.url_produto("https://exemplo.com/MLB-4123456789") is None
+    assert registro.url_produto("https://www.mercadolivre.com.br/ofertas") is None
+    assert registro.url_produto("nem url nem id") is None
+
+
+def test_url_produto_de_id_conhecido_como_catalogo(registro):
+    assert registro.url_produto("MLB19698034") == "https://produto.mercadolivre.com.br/MLB-19698034"
+    registro.vincular("p:MLB19698034")
+    assert registro.url_produto("MLB19698034") == "https://www.mercadolivre.com.br/p/MLB19698034"
@@ -0,0 +1,53 @@
+import json
+
+import pytest
+from pydantic import ValidationError
+
+from modelo_produto import CAMPOS_PRODUTO, CAMPOS_RESPOSTA, Produto, parse_campos, serializar
+
+
+def test_parse_campos():
+    assert parse_campos(None) is None
+    assert parse_campos("  ") is None
+    assert parse_campos(" , ") is None
+    # Espaços e repetidos: ordem da primeira ocorrência
+    assert parse_campos("mlb_id, url_curta,mlb_id") == ("mlb_id", "url_curta")
+
+
+def test_parse_campos_desconhecido():
+    with pytest.raises(ValueError, match="preco"):
+        parse_campos("mlb_id,preco")
+
+
+def test_de_dict_converte_tipos_e_ignora_chaves_extras():
+    produto = Produto.de_dict({
+        "url_original": "https://www.mercadolivre.com.br/x/p/MLB1",
+        "item_id": 4123456789,
+        "preco_atual": "189.9",
+        "desconto": 15,
+        "status": "sucesso",
+        "similares": ["https://www.mercadolivre.com.br/y/p/MLB2"],
+    })
+    assert produto.item_id == "4123456789"
+    assert produto.preco_atual == 189.9
+    assert produto.fotos == []
+    assert not hasattr(produto, "similares")
+
+
+def test_de_dict_invalido():
+    with pytest.raises(ValidationError):
+        Produto.de_dict({"url_original": "x", "preco_atual": "caro"})
+    with pytest.raises(ValidationError):
+        Produto.de_dict({"nome": "sem url"})
+
+
+def test_serializar_com_campos():
+    produto = Produto(url_original="a", mlb_id="MLB1", url_curta="https://mercadolivre.com/sec/1")
+    dados = json.loads(serializar({"total": 1, "itens": [produto]}, campos=("mlb_id", "url_curta")))
+    assert dados == {"total": 1, "itens": [{"mlb_id": "MLB1", "url_curta": "https://mercadolivre.com/sec/1"}]}
+    assert list(json.loads(serializar(produto))) == list(CAMPOS_RESPOSTA)
+
+
+def test_campos_gravados_nao_incluem_os_so_de_resposta():
+    assert "cache_idade_s" in CAMPOS_RESPOSTA
+    assert "cache_idade_s" not in CAMPOS_PRODUTO
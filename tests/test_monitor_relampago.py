@@ -0,0 +1,74 @@
+import asyncio
+
+from monitor_relampago import MonitorRelampago
+from scraper_ml_afiliado import FiltrosOferta
+
+
+class PaginaFalsa:
+    def __init__(self, cards):
+        self.cards = cards
+
+    async def evaluate(self, _script):
+        return self.cards
+
+
+class ScraperFalso:
+    JS_CARDS_OFERTAS = ""
+
+    def __init__(self):
+        self.extraidos = []
+
+    async def _navegar(self, *args, **kwargs):
+        pass
+
+    def _normalizar_cards(self, cards):
+        return [dict(card) for card in cards]
+
+    async def extrair_dados_produto(self, url):
+        self.extraidos.append(url)
+        return {"url_original": url, "url_curta": None}
+
+
+def card(n, **extras):
+    return {"url": f"https://www.mercadolivre.com.br/x/p/MLB{n}", "chave": f"p:MLB{n}", "nome": f"Oferta {n}", **extras}
+
+
+def monitor(cards, **kwargs):
+    async def notificar(produto):
+        pass
+
+    scraper = ScraperFalso()
+    m = MonitorRelampago(scraper, notificar, max_por_ciclo=2, **kwargs)
+    m.pagina = PaginaFalsa(cards)
+    return m, scraper
+
+
+def test_ofertas_alem_do_limite_do_ciclo_ficam_para_o_proximo():
+    m, scraper = monitor([card(1), card(2), card(3)])
+    asyncio.run(m.ciclo())
+    assert scraper.extraidos == [card(1)["url"], card(2)["url"]]
+    asyncio.run(m.ciclo())
+    assert scraper.extraidos[2:] == [card(3)["url"]]
+
+
+def test_reprovadas_pelo_filtro_nao_voltam_e_cortadas_pelo_limite_voltam():
+    cards = [
+        card(1, desconto=10, vendedor="a"),
+        card(2, desconto=50, vendedor="a"),
+        card(3, desconto=50, vendedor="a"),
+    ]
+    m, scraper = monitor(cards, filtros=FiltrosOferta(min_desconto=30, max_por_vendedor=1))
+    asyncio.run(m.ciclo())
+    assert scraper.extraidos == [card(2)["url"]]
+    # 1 foi reprovada (memorizada); 3 só ficou de fora pelo limite do vendedor
+    asyncio.run(m.ciclo())
+    assert scraper.extraidos[1:] == [card(3)["url"]]
+    asyncio.run(m.ciclo())
+    assert len(scraper.extraidos) == 2
+
+
+def test_baseline_memoriza_tudo():
+    m, scraper = monitor([card(1), card(2), card(3)])
+    asyncio.run(m.ciclo(baseline=True))
+    assert asyncio.run(m.ciclo()) == []
+    assert scraper.extraidos == []
@@ -0,0 +1,66 @@
+import pytest
+
+import pacing_aimd
+from pacing_aimd import ControladorTaxa
+
+
+class Relogio:
+    def __init__(self):
+        self.agora = 1000.0
+
+    def __call__(self):
+        return self.agora
+
+
+@pytest.fixture
+def relogio(monkeypatch):
+    relogio = Relogio()
+    monkeypatch.setattr(pacing_aimd.time, "monotonic", relogio)
+    return relogio
+
+
+def test_aumento_aditivo_ate_o_teto():
+    controlador = ControladorTaxa(taxa_inicial=0.9, taxa_max=1.0, incremento=0.05)
+    assert controlador.registrar(200, 1.0) is False
+    assert controlador.taxa == pytest.approx(0.95)
+    controlador.registrar(200, 1.0)
+    controlador.registrar(200, 1.0)
+    assert controlador.taxa == 1.0
+    assert controlador.sucessos == 3
+
+
+@pytest.mark.parametrize("status, latencia, url, motivo", [
+    (None, 1.0, "", "falha"),
+    (429, 1.0, "", "http_429"),
+    (503, 1.0, "", "http_503"),
+    (200, 1.0, "https://www.mercadolivre.com.br/gz/challenge?x=1", "redirect_bloqueio"),
+    (200, 9.0, "", "lento"),
+])
+def test_reducao_multiplicativa(status, latencia, url, motivo):
+    controlador = ControladorTaxa(taxa_inicial=0.4, taxa_min=0.15, fator_reducao=0.5)
+    assert controlador.registrar(status, latencia, url) is True
+    assert controlador.taxa == pytest.approx(0.2)
+    controlador.registrar(status, latencia, url)
+    assert controlador.taxa == 0.15
+    assert controlador.eventos[0]["motivo"] == motivo
+    assert controlador.backoffs == 2
+
+
+def test_primeira_navegacao_nao_espera(relogio):
+    assert ControladorTaxa().tempo_espera() == 0.0
+
+
+def test_pedidos_simultaneos_saem_espacados(relogio):
+    # Várias abas pedindo a vez no mesmo instante: cada uma reserva o próximo horário
+    controlador = ControladorTaxa(taxa_inicial=0.5, jitter=0)
+    esperas = [controlador.tempo_espera() for _ in range(3)]
+    assert esperas == [0.0, 2.0, 4.0]
+    relogio.agora += 4.0
+    assert controlador.tempo_espera() == pytest.approx(2.0)
+
+
+def test_retry_after_bloqueia_as_navegacoes(relogio):
+    controlador = ControladorTaxa(taxa_inicial=1.0, jitter=0)
+    controlador.tempo_espera()
+    controlador.registrar(429, 0.5, retry_after_s=30)
+    assert controlador.tempo_espera() == pytest.approx(30.0)
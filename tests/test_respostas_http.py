@@ -0,0 +1,110 @@
+import gzip
+import json
+from datetime import datetime, timezone
+
+import pytest
+from starlette.requests import Request
+
+import respostas_http
+from modelo_produto import Produto
+from respostas_http import (
+    escolher_codificacao,
+    etag_confere,
+    normalizar_since,
+    produtos_desde,
+    proximo_cursor,
+    resposta_json,
+)
+
+
+def pedido(**cabecalhos):
+    headers = [(nome.replace("_", "-").encode(), valor.encode()) for nome, valor in cabecalhos.items()]
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": headers})
+
+
+GRANDE = {"itens": [{"nome": f"Produto {i}", "preco": i} for i in range(200)]}
+
+
+def test_etag_e_304_com_if_none_match():
+    primeira = resposta_json(pedido(), GRANDE)
+    etag = primeira.headers["etag"]
+    assert etag.startswith('W/"')
+    segunda = resposta_json(pedido(if_none_match=f'"outro", {etag}'), GRANDE)
+    assert segunda.status_code == 304
+    assert segunda.body == b""
+    # Dados mudaram: ETag antigo não confere
+    assert resposta_json(pedido(if_none_match=etag), {"itens": []}).status_code == 200
+
+
+def test_etag_fraco_confere_com_ou_sem_prefixo():
+    assert etag_confere('"abc"', 'W/"abc"')
+    assert etag_confere("*", 'W/"abc"')
+    assert not etag_confere(None, 'W/"abc"')
+    assert not etag_confere('W/"abd"', 'W/"abc"')
+
+
+def test_post_nao_e_condicional():
+    resposta = resposta_json(pedido(if_none_match="*"), GRANDE, condicional=False)
+    assert resposta.status_code == 200
+    assert "etag" not in resposta.headers
+
+
+def test_gzip_acima_do_limite():
+    resposta = resposta_json(pedido(accept_encoding="gzip, deflate"), GRANDE)
+    assert resposta.headers["content-encoding"] == "gzip"
+    assert resposta.headers["vary"] == "Accept-Encoding"
+    assert json.loads(gzip.decompress(resposta.body)) == GRANDE
+
+
+def test_corpo_pequeno_nao_comprime():
+    resposta = resposta_json(pedido(accept_encoding="gzip"), {"ok": True})
+    assert "content-encoding" not in resposta.headers
+
+
+def test_escolher_codificacao(monkeypatch):
+    monkeypatch.setattr(respostas_http, "brotli", None)
+    assert escolher_codificacao("br, gzip") == "gzip"
+    assert escolher_codificacao("br") is None
+    assert escolher_codificacao("gzip;q=0, *;q=0.5") is None
+    assert escolher_codificacao("*") == "gzip"
+    assert escolher_codificacao(None) is None
+
+    monkeypatch.setattr(respostas_http, "brotli", object())
+    assert escolher_codificacao("gzip, br") == "br"  # empate: br comprime melhor
+    assert escolher_codificacao("gzip;q=1.0, br;q=0.5") == "gzip"
+    assert escolher_codificacao("gzip;q=0.5, br") == "br"
+
+
+@pytest.mark.skipif(respostas_http.brotli is None, reason="requer brotli")
+def test_brotli():
+    resposta = resposta_json(pedido(accept_encoding="br"), GRANDE)
+    assert resposta.headers["content-encoding"] == "br"
+    assert json.loads(respostas_http.brotli.decompress(resposta.body)) == GRANDE
+
+
+def test_normalizar_since():
+    assert normalizar_since(None) is None
+    assert normalizar_since("2026-10-19") == "2026-10-19T00:00:00.000000"
+    assert normalizar_since("2026-10-19T08:00:01.5") == "2026-10-19T08:00:01.500000"
+    # Com fuso: vira hora local, como o atualizado_em dos produtos
+    utc = datetime(2026, 10, 19, 11, 0, tzinfo=timezone.utc)
+    assert normalizar_since("2026-10-19T11:00:00Z") == utc.astimezone().replace(tzinfo=None).isoformat(timespec="microseconds")
+    with pytest.raises(ValueError):
+        normalizar_since("ontem")
+
+
+def test_since_e_cursor():
+    produtos = [
+        Produto(url_original="a", atualizado_em="2026-10-19T08:00:00.000000"),
+        Produto(url_original="b", atualizado_em="2026-10-19T08:00:05.000000"),
+        Produto(url_original="c"),
+    ]
+    assert produtos_desde(produtos, None) == produtos
+    since = normalizar_since("2026-10-19T08:00:00")
+    novos = produtos_desde(produtos, since)
+    assert [p.url_original for p in novos] == ["b"]
+    cursor = proximo_cursor(novos, since)
+    assert cursor == "2026-10-19T08:00:05.000000"
+    # Nada novo: o cursor fica onde estava
+    assert produtos_desde(produtos, cursor) == []
+    assert proximo_cursor([], cursor) == cursor
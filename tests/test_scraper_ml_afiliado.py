@@ -0,0 +1,18 @@
+from scraper_ml_afiliado import Prazo
+
+
+def test_prazo_sem_segundos_nunca_expira():
+    prazo = Prazo()
+    assert prazo.restante_ms() is None
+    assert not prazo.esgotado
+
+
+def test_prazo_zero_ou_negativo_ja_esgotado():
+    assert Prazo(0).esgotado
+    assert Prazo(-1).restante_ms() == 0.0
+
+
+def test_prazo_com_folga():
+    prazo = Prazo(60)
+    assert not prazo.esgotado
+    assert 59_000 < prazo.restante_ms() <= 60_000
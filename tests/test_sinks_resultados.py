@@ -0,0 +1,89 @@
+import csv
+import gzip
+import json
+import os
+
+import pytest
+
+import sinks_resultados
+from modelo_produto import CAMPOS_PRODUTO
+from sinks_resultados import criar_sink
+
+
+PRODUTO = {
+    "nome": "Fone JBL Tune 520BT",
+    "url_original": "https://www.mercadolivre.com.br/fone/p/MLB1",
+    "preco_atual": 189.9,
+    "desconto": 15,
+    "fotos": ["https://http2.mlstatic.com/a.jpg", "https://http2.mlstatic.com/b.jpg"],
+    "status": "sucesso",
+}
+
+
+def ler_jsonl(caminho):
+    abrir = gzip.open if caminho.endswith(".gz") else open
+    with abrir(caminho, 'rt', encoding='utf-8') as f:
+        return [json.loads(linha) for linha in f]
+
+
+def test_jsonl_grava_cada_produto_antes_de_fechar(tmp_path):
+    with criar_sink("jsonl", str(tmp_path), identificador="run1") as sink:
+        sink.escrever(PRODUTO)
+        sink.descarregar()
+        # Já legível com o arquivo aberto (o que um crash deixaria)
+        assert ler_jsonl(sink.arquivos[0]) == [PRODUTO]
+        sink.escrever({**PRODUTO, "nome": "outro"})
+    assert sink.total == 2
+    assert os.path.basename(sink.arquivos[0]).startswith("ofertas_ml_")
+    assert "_run1_001.jsonl" in sink.arquivos[0]
+
+
+def test_jsonl_gzip(tmp_path):
+    with criar_sink("jsonl", str(tmp_path), compressao="gzip") as sink:
+        sink.escrever(PRODUTO)
+    assert sink.arquivos[0].endswith(".jsonl.gz")
+    assert ler_jsonl(sink.arquivos[0]) == [PRODUTO]
+
+
+def test_csv_colunas_fixas_e_campos_aninhados_em_json(tmp_path):
+    with criar_sink("csv", str(tmp_path)) as sink:
+        sink.escrever(PRODUTO)
+    with open(sink.arquivos[0], newline='', encoding='utf-8') as f:
+        cabecalho, linha = list(csv.reader(f))
+    assert cabecalho == list(CAMPOS_PRODUTO)
+    registro = dict(zip(cabecalho, linha))
+    assert registro["nome"] == PRODUTO["nome"]
+    assert json.loads(registro["fotos"]) == PRODUTO["fotos"]
+    assert registro["url_curta"] == ""
+
+
+def test_rotacao_por_tamanho(tmp_path):
+    with criar_sink("jsonl", str(tmp_path), max_bytes=1) as sink:
+        for _ in range(3):
+            sink.escrever(PRODUTO)
+    assert [a[-9:] for a in sink.arquivos] == ["001.jsonl", "002.jsonl", "003.jsonl"]
+    assert all(len(ler_jsonl(a)) == 1 for a in sink.arquivos)
+
+
+def test_formato_e_compressao_invalidos(tmp_path):
+    with pytest.raises(ValueError):
+        criar_sink("xml", str(tmp_path))
+    with pytest.raises(ValueError):
+        criar_sink("jsonl", str(tmp_path), compressao="bz2")
+
+
+def test_identificador_nao_escapa_do_diretorio(tmp_path):
+    sink = criar_sink("jsonl", str(tmp_path / "resultados"), identificador="x/../../../fora")
+    with pytest.raises(ValueError):
+        sink.escrever(PRODUTO)
+
+
+@pytest.mark.skipif(sinks_resultados.pa is None, reason="requer pyarrow")
+def test_parquet_em_row_groups(tmp_path):
+    with criar_sink("parquet", str(tmp_path)) as sink:
+        sink.escrever(PRODUTO)
+        sink.descarregar()
+        sink.escrever({**PRODUTO, "desconto": None})
+    tabela = sinks_resultados.pq.read_table(sink.arquivos[0])
+    assert tabela.num_rows == 2
+    assert tabela.column("desconto").to_pylist() == [15, None]
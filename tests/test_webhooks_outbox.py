@@ -0,0 +1,113 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from webhooks_outbox import OutboxWebhooks
+
+
+DESTINO = "https://n8n.exemplo.com/webhook/ofertas"
+OUTRO = "https://outro.exemplo.com/webhook"
+
+
+@pytest.fixture
+def criar_outbox(tmp_path):
+    criadas = []
+
+    def criar(destinos=(DESTINO,), **kwargs):
+        outbox = OutboxWebhooks(str(tmp_path / "outbox.db"), list(destinos), **kwargs)
+        criadas.append(outbox)
+        return outbox
+
+    yield criar
+    for outbox in criadas:
+        asyncio.run(outbox.fechar())
+
+
+def enviar(outbox, status, lote):
+    """Envia o lote por um transporte falso; retorna os corpos recebidos"""
+    recebidos = []
+
+    def responder(request):
+        recebidos.append(json.loads(request.content))
+        return httpx.Response(status)
+
+    async def cenario():
+        outbox._client = httpx.AsyncClient(transport=httpx.MockTransport(responder))
+        await outbox._enviar(DESTINO, lote)
+
+    asyncio.run(cenario())
+    return recebidos
+
+
+def test_lote_respeita_max_lote_e_max_bytes(criar_outbox):
+    outbox = criar_outbox(max_lote=3, max_bytes=60)
+    for i in range(5):
+        outbox.enfileirar({"nome": f"Produto {i}"})
+    # Cada payload tem 21 bytes: cabem 2 em 60
+    assert [json.loads(linha[1])["nome"] for linha in outbox._reservar_lote(DESTINO)] == ["Produto 0", "Produto 1"]
+    outbox.max_bytes = 10_000
+    assert len(outbox._reservar_lote(DESTINO)) == 3
+
+
+def test_lote_parcial_espera_max_espera(criar_outbox):
+    outbox = criar_outbox(max_lote=3, max_espera_s=5)
+    assert outbox._proxima_espera(DESTINO) is None
+    outbox.enfileirar({"nome": "a"})
+    assert 4 < outbox._proxima_espera(DESTINO) <= 5
+    outbox.enfileirar({"nome": "b"})
+    outbox.enfileirar({"nome": "c"})
+    assert outbox._proxima_espera(DESTINO) == 0
+
+
+def test_entrega_remove_da_outbox(criar_outbox):
+    outbox = criar_outbox()
+    outbox.enfileirar({"nome": "a"})
+    outbox.enfileirar({"nome": "b"})
+    recebidos = enviar(outbox, 200, outbox._reservar_lote(DESTINO))
+    assert recebidos[0]["evento"] == "produtos"
+    assert [p["nome"] for p in recebidos[0]["produtos"]] == ["a", "b"]
+    assert outbox.resumo()["destinos"] == [{"url": DESTINO, "pendentes": 0}]
+    assert outbox.entregues == 2
+
+
+def test_falha_agenda_nova_tentativa_com_backoff(criar_outbox):
+    outbox = criar_outbox(backoff_base_s=10)
+    outbox.enfileirar({"nome": "a"})
+    enviar(outbox, 503, outbox._reservar_lote(DESTINO))
+    assert outbox._reservar_lote(DESTINO) == []
+    assert 8 <= outbox._proxima_espera(DESTINO) <= 12
+    tentativas, erro = outbox._db.execute("SELECT tentativas, ultimo_erro FROM outbox").fetchone()
+    assert (tentativas, erro) == (1, "HTTP 503")
+    assert outbox.falhas == 1
+
+
+def test_dead_letter_apos_max_tentativas_e_reprocessamento(criar_outbox):
+    outbox = criar_outbox(max_tentativas=2)
+    outbox.enfileirar({"nome": "a"})
+    lote = outbox._reservar_lote(DESTINO)
+    enviar(outbox, 500, lote)
+    enviar(outbox, 500, [(id_, payload, 1, criado_em) for id_, payload, _, criado_em in lote])
+    mortos = outbox.dead_letter()
+    assert [(m["produto"], m["tentativas"]) for m in mortos] == [({"nome": "a"}, 2)]
+    assert outbox.resumo()["destinos"][0]["pendentes"] == 0
+
+    assert outbox.reprocessar_dead_letter() == 1
+    assert outbox.dead_letter() == []
+    assert len(outbox._reservar_lote(DESTINO)) == 1
+
+
+def test_reprocessar_ignora_destino_que_saiu_da_configuracao(criar_outbox, tmp_path):
+    antiga = criar_outbox(destinos=(DESTINO, OUTRO), max_tentativas=1)
+    antiga.enfileirar({"nome": "a"})
+    for destino in (DESTINO, OUTRO):
+        antiga._falhou(destino, antiga._reservar_lote(destino), "HTTP 500")
+    asyncio.run(antiga.fechar())
+
+    # Reinício só com DESTINO: os itens de OUTRO ficam no dead-letter
+    outbox = criar_outbox()
+    assert outbox.reprocessar_dead_letter(OUTRO) == 0
+    assert outbox.reprocessar_dead_letter() == 1
+    assert [m["destino"] for m in outbox.dead_letter()] == [OUTRO]
+    assert outbox.resumo()["pendentes_outros"] == 0
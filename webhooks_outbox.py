@@ -0,0 +1,350 @@
+"""
+Entrega de produtos para webhooks via outbox durável (SQLite)
+
+O scraping só grava o produto na outbox (um INSERT local) e segue em frente;
+um worker por destino lê a outbox e faz o POST em lotes. Assim o scraping
+nunca espera consumidor lento, e se o consumidor estiver fora do ar os
+produtos ficam na outbox (sobrevivem a restart) até a entrega.
+
+- Lotes: até `max_lote` produtos e `max_bytes` por POST; um lote parcial
+  sai quando o item mais antigo espera `max_espera_s`
+- Falha (rede, timeout, status != 2xx): nova tentativa com backoff
+  exponencial + jitter
+- Após `max_tentativas`, o item vai para a tabela dead_letter (consultável
+  e reprocessável pela API)
+
+Payload enviado:
+    {"evento": "produtos", "enviado_em": "...", "produtos": [{...}, ...]}
+"""
+
+import asyncio
+import json
+import random
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from typing import Optional
+
+import httpx
+
+
+class OutboxWebhooks:
+    """Fila durável de entregas para webhooks"""
+
+    # Pausa do worker após um erro inesperado no próprio loop
+    ESPERA_ERRO_S = 5.0
+
+    def __init__(
+        self,
+        arquivo: str,
+        destinos: list[str],
+        headers: Optional[dict] = None,
+        max_lote: int = 50,
+        max_bytes: int = 512 * 1024,
+        max_espera_s: float = 5.0,
+        max_tentativas: int = 8,
+        backoff_base_s: float = 2.0,
+        backoff_max_s: float = 600.0,
+        timeout_s: float = 15.0,
+    ):
+        self.arquivo = arquivo
+        self.destinos = destinos
+        self.headers = headers or {}
+        self.max_lote = max_lote
+        self.max_bytes = max_bytes
+        self.max_espera_s = max_espera_s
+        self.max_tentativas = max_tentativas
+        self.backoff_base_s = backoff_base_s
+        self.backoff_max_s = backoff_max_s
+        self.timeout_s = timeout_s
+
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(arquivo, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS outbox (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                destino TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                tentativas INTEGER NOT NULL DEFAULT 0,
+                proximo_envio REAL NOT NULL,
+                criado_em REAL NOT NULL,
+                ultimo_erro TEXT
+            );
+
+            CREATE INDEX IF NOT EXISTS idx_outbox_destino ON outbox (destino, proximo_envio);
+
+            CREATE TABLE IF NOT EXISTS dead_letter (
+                id INTEGER PRIMARY KEY,
+                destino TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                tentativas INTEGER NOT NULL,
+                criado_em REAL NOT NULL,
+                descartado_em REAL NOT NULL,
+                ultimo_erro TEXT
+            );
+        """)
+        self._db.commit()
+
+        self._client: Optional[httpx.AsyncClient] = None
+        self._tarefas: list[asyncio.Task] = []
+        self._novos: dict[str, asyncio.Event] = {}
+        self._parar = asyncio.Event()
+
+        self.entregues = 0
+        self.lotes = 0
+        self.falhas = 0
+        self.ultimo_erro: Optional[str] = None
+
+    # -----------------------------------------
+    # Produtor
+    # -----------------------------------------
+
+    def enfileirar(self, produto: dict) -> int:
+        """Grava o produto na outbox para cada destino; retorna quantas entregas criou"""
+        if not self.destinos:
+            return 0
+        agora = time.time()
+        payload = json.dumps(produto, ensure_ascii=False)
+        with self._lock:
+            self._db.executemany(
+                "INSERT INTO outbox (destino, payload, proximo_envio, criado_em) VALUES (?, ?, ?, ?)",
+                [(destino, payload, agora, agora) for destino in self.destinos],
+            )
+            self._db.commit()
+        for destino in self.destinos:
+            if destino in self._novos:
+                self._novos[destino].set()
+        return len(self.destinos)
+
+    # -----------------------------------------
+    # Workers
+    # -----------------------------------------
+
+    def iniciar(self):
+        """Cria um worker por destino (destino fora do ar não atrasa os outros)"""
+        if self._tarefas:
+            return
+        self._parar.clear()
+        self._client = httpx.AsyncClient(timeout=self.timeout_s, headers=self.headers)
+        for destino in self.destinos:
+            self._novos[destino] = asyncio.Event()
+            self._tarefas.append(asyncio.create_task(self._worker(destino)))
+        if self.destinos:
+            print(f"📤 Outbox de webhooks: {len(self.destinos)} destino(s)")
+
+    async def fechar(self):
+        """Para os workers (o que não foi entregue continua na outbox) e fecha o banco"""
+        self._parar.set()
+        for evento in self._novos.values():
+            evento.set()
+        if self._tarefas:
+            await asyncio.gather(*self._tarefas, return_exceptions=True)
+            self._tarefas = []
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+        with self._lock:
+            self._db.close()
+
+    async def _worker(self, destino: str):
+        novos = self._novos[destino]
+        while not self._parar.is_set():
+            try:
+                await self._ciclo(destino, novos)
+            except Exception as e:
+                # Erro inesperado (ex: SQLite travado) não pode matar o worker do destino:
+                # registra, espera um pouco e tenta de novo (os itens seguem na outbox)
+                self.ultimo_erro = f"{datetime.now().isoformat()} {destino}: worker: {type(e).__name__}: {e}"
+                print(f"⚠️ Worker do webhook {destino} falhou: {type(e).__name__}: {e}")
+                try:
+                    await asyncio.wait_for(self._parar.wait(), timeout=self.ESPERA_ERRO_S)
+                except asyncio.TimeoutError:
+                    pass
+
+    async def _ciclo(self, destino: str, novos: asyncio.Event):
+        """Uma volta do worker: envia um lote vencido ou dorme até o próximo"""
+        novos.clear()
+        espera = self._proxima_espera(destino)
+        if espera is not None and espera <= 0:
+            lote = self._reservar_lote(destino)
+            if lote:
+                await self._enviar(destino, lote)
+                return
+            espera = None
+        # Dorme até o próximo item vencer, ou até chegar item novo
+        try:
+            await asyncio.wait_for(novos.wait(), timeout=espera if espera is not None else 60)
+        except asyncio.TimeoutError:
+            pass
+
+    def _proxima_espera(self, destino: str) -> Optional[float]:
+        """
+        Segundos até o próximo lote deste destino poder sair (None = outbox vazia).
+
+        Um lote sai quando está cheio ou quando o item mais antigo já esperou
+        max_espera_s; itens em backoff só contam quando proximo_envio vence.
+        """
+        agora = time.time()
+        with self._lock:
+            prontos, mais_antigo, proximo = self._db.execute(
+                """
+                SELECT
+                    SUM(CASE WHEN proximo_envio <= ? THEN 1 ELSE 0 END),
+                    MIN(CASE WHEN proximo_envio <= ? THEN criado_em END),
+                    MIN(proximo_envio)
+                FROM outbox WHERE destino = ?
+                """,
+                (agora, agora, destino),
+            ).fetchone()
+        if proximo is None:
+            return None
+        if not prontos:
+            return proximo - agora
+        if prontos >= self.max_lote:
+            return 0
+        return max(0.0, mais_antigo + self.max_espera_s - agora)
+
+    def _reservar_lote(self, destino: str) -> list[tuple]:
+        """Itens prontos do destino, em ordem de chegada, dentro de max_lote/max_bytes"""
+        with self._lock:
+            linhas = self._db.execute(
+                """
+                SELECT id, payload, tentativas, criado_em FROM outbox
+                WHERE destino = ? AND proximo_envio <= ?
+                ORDER BY id LIMIT ?
+                """,
+                (destino, time.time(), self.max_lote),
+            ).fetchall()
+        lote, tamanho = [], 0
+        for linha in linhas:
+            tamanho += len(linha[1].encode("utf-8"))
+            if lote and tamanho > self.max_bytes:
+                break
+            lote.append(linha)
+        return lote
+
+    async def _enviar(self, destino: str, lote: list[tuple]):
+        ids = [linha[0] for linha in lote]
+        corpo = (
+            '{"evento": "produtos", "enviado_em": ' + json.dumps(datetime.now().isoformat())
+            + ', "produtos": [' + ", ".join(linha[1] for linha in lote) + "]}"
+        )
+        try:
+            resposta = await self._client.post(
+                destino, content=corpo.encode("utf-8"), headers={"Content-Type": "application/json"}
+            )
+        except Exception as e:
+            self._falhou(destino, lote, f"{type(e).__name__}: {e}")
+            return
+        if not resposta.is_success:
+            self._falhou(destino, lote, f"HTTP {resposta.status_code}")
+            return
+
+        with self._lock:
+            self._db.executemany("DELETE FROM outbox WHERE id = ?", [(i,) for i in ids])
+            self._db.commit()
+        self.entregues += len(ids)
+        self.lotes += 1
+
+    def _falhou(self, destino: str, lote: list[tuple], erro: str):
+        self.falhas += 1
+        self.ultimo_erro = f"{datetime.now().isoformat()} {destino}: {erro}"
+        print(f"⚠️ Webhook {destino} falhou ({len(lote)} itens): {erro}")
+        agora = time.time()
+        with self._lock:
+            for id_, payload, tentativas, criado_em in lote:
+                tentativas += 1
+                if tentativas >= self.max_tentativas:
+                    self._db.execute(
+                        """
+                        INSERT INTO dead_letter (id, destino, payload, tentativas, criado_em, descartado_em, ultimo_erro)
+                        VALUES (?, ?, ?, ?, ?, ?, ?)
+                        """,
+                        (id_, destino, payload, tentativas, criado_em, agora, erro),
+                    )
+                    self._db.execute("DELETE FROM outbox WHERE id = ?", (id_,))
+                else:
+                    atraso = min(self.backoff_max_s, self.backoff_base_s * 2 ** (tentativas - 1))
+                    atraso *= random.uniform(0.8, 1.2)
+                    self._db.execute(
+                        "UPDATE outbox SET tentativas = ?, proximo_envio = ?, ultimo_erro = ? WHERE id = ?",
+                        (tentativas, agora + atraso, erro, id_),
+                    )
+            self._db.commit()
+
+    # -----------------------------------------
+    # Consultas / dead-letter
+    # -----------------------------------------
+
+    def resumo(self) -> dict:
+        """Pendências por destino, dead-letter e contadores de entrega"""
+        with self._lock:
+            pendentes = dict(self._db.execute(
+                "SELECT destino, COUNT(*) FROM outbox GROUP BY destino"
+            ).fetchall())
+            mortos = self._db.execute("SELECT COUNT(*) FROM dead_letter").fetchone()[0]
+        return {
+            "destinos": [
+                {"url": destino, "pendentes": pendentes.get(destino, 0)}
+                for destino in self.destinos
+            ],
+            "pendentes_outros": sum(n for d, n in pendentes.items() if d not in self.destinos),
+            "dead_letter": mortos,
+            "entregues": self.entregues,
+            "lotes": self.lotes,
+            "falhas": self.falhas,
+            "ultimo_erro": self.ultimo_erro,
+        }
+
+    def dead_letter(self, limite: int = 100) -> list[dict]:
+        """Itens descartados, mais recentes primeiro"""
+        with self._lock:
+            linhas = self._db.execute(
+                """
+                SELECT id, destino, payload, tentativas, criado_em, descartado_em, ultimo_erro
+                FROM dead_letter ORDER BY descartado_em DESC LIMIT ?
+                """,
+                (limite,),
+            ).fetchall()
+        return [
+            {
+                "id": id_,
+                "destino": destino,
+                "produto": json.loads(payload),
+                "tentativas": tentativas,
+                "criado_em": datetime.fromtimestamp(criado_em).isoformat(),
+                "descartado_em": datetime.fromtimestamp(descartado_em).isoformat(),
+                "ultimo_erro": erro,
+            }
+            for id_, destino, payload, tentativas, criado_em, descartado_em, erro in linhas
+        ]
+
+    def reprocessar_dead_letter(self, destino: Optional[str] = None) -> int:
+        """
+        Devolve itens do dead-letter para a outbox (tentativas zeradas).
+
+        Só os de destinos ainda configurados: sem worker, o item ficaria
+        parado na outbox; os demais continuam no dead-letter.
+        """
+        destinos = [d for d in self.destinos if destino is None or d == destino]
+        if not destinos:
+            return 0
+        filtro = f"WHERE destino IN ({', '.join('?' * len(destinos))})"
+        agora = time.time()
+        with self._lock:
+            cursor = self._db.execute(
+                f"""
+                INSERT INTO outbox (destino, payload, tentativas, proximo_envio, criado_em)
+                SELECT destino, payload, 0, ?, criado_em FROM dead_letter {filtro}
+                """,
+                (agora, *destinos),
+            )
+            self._db.execute(f"DELETE FROM dead_letter {filtro}", destinos)
+            self._db.commit()
+            quantidade = cursor.rowcount
+        for evento in self._novos.values():
+            evento.set()
+        return quantidade